@@ -2,14 +2,40 @@
 """
 Script para análise estatística dos dados experimentais
 Gera visualizações e relatório de pesquisa
+
+Uso:
+    python scripts/analyze_experimental_data.py [--data ARQUIVO] [--output-dir DIR]
+    python scripts/analyze_experimental_data.py --stream [--chunksize N]
+    python scripts/analyze_experimental_data.py [--preview] [--jobs N] [--force]
+
+O modo padrão carrega o arquivo inteiro num DataFrame. O modo --stream lê
+CSV ou Parquet em blocos e mantém apenas agregados online, de modo que a
+memória não cresce com o número de simulações: média e variância por
+Welford (combinadas bloco a bloco), quantis do IFF por t-digest, contadores
+agrupados por modo de falha, ruído e decisão, e uma amostra reservatório de
+tamanho fixo para as figuras. Os dois modos geram o mesmo
+experimental_report.json.
+
+As figuras são geradas em paralelo, uma por processo, e só quando a fatia
+de dados que cada uma usa mudou desde a última execução (hashes em
+.figures.json no diretório dos resultados; --force gera todas). --preview
+gera versões rápidas em resolução menor, com dispersões rasterizadas.
 """
 
-import pandas as pd
+import argparse
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from pathlib import Path
-import json
+
+from experimental_summary import ROWS, collapse, crosstab, merge_cubes, summary_cube, value_counts
 
 # Configurar estilo
 sns.set_style("darkgrid")
@@ -17,321 +43,627 @@ plt.rcParams['figure.figsize'] = (14, 10)
 plt.rcParams['font.size'] = 10
 
 # Caminho dos dados
-data_path = Path(__file__).parent.parent / 'experimental_data.csv'
-output_dir = Path(__file__).parent.parent / 'analysis_results'
-output_dir.mkdir(exist_ok=True)
+DATA_PATH = Path(__file__).parent.parent / 'experimental_data.csv'
+OUTPUT_DIR = Path(__file__).parent.parent / 'analysis_results'
 
-print("📊 Carregando dados experimentais...")
-df = pd.read_csv(data_path)
+IFF = 'IFF_indice_fidelidade'
+SIGMA = 'sigma_IFF_incerteza'
+DECISION = 'decisao_agentica'
+FAILURE_MODE = 'failure_mode'
+NOISE = 'noise_level_percent'
 
-print(f"✅ Dados carregados: {len(df)} simulações")
-print(f"📋 Colunas: {len(df.columns)}")
+DECISIONS = ['OPERATIONAL', 'WARNING', 'BLOCKED']
 
-# ============================================================================
-# 1. ANÁLISE DESCRITIVA DO IFF
-# ============================================================================
-print("\n" + "="*70)
-print("1. ANÁLISE DESCRITIVA DO ÍNDICE DE FIDELIDADE FÍSICA (IFF)")
-print("="*70)
-
-iff_stats = {
-    'Média': df['IFF_indice_fidelidade'].mean(),
-    'Mediana': df['IFF_indice_fidelidade'].median(),
-    'Desvio Padrão': df['IFF_indice_fidelidade'].std(),
-    'Mínimo': df['IFF_indice_fidelidade'].min(),
-    'Máximo': df['IFF_indice_fidelidade'].max(),
-    'Q1': df['IFF_indice_fidelidade'].quantile(0.25),
-    'Q3': df['IFF_indice_fidelidade'].quantile(0.75),
+DIMENSIONS = {
+    'D1 (Estado)': 'D1_fidelidade_estado',
+    'D2 (Dinâmica)': 'D2_fidelidade_dinamica',
+    'D3 (Energia)': 'D3_fidelidade_energia',
+    'D4 (Estabilidade)': 'D4_fidelidade_estabilidade',
 }
 
-for metric, value in iff_stats.items():
-    print(f"  {metric:.<20} {value:.6f}")
+DPI = 300
+PREVIEW_DPI = 100
+# No modo --preview as dispersões desenham no máximo esta quantidade de pontos
+PREVIEW_POINTS = 5000
 
-# ============================================================================
-# 2. ANÁLISE DE INCERTEZAS
-# ============================================================================
-print("\n" + "="*70)
-print("2. ANÁLISE DE INCERTEZAS (σ_IFF)")
-print("="*70)
-
-uncertainty_stats = {
-    'Média': df['sigma_IFF_incerteza'].mean(),
-    'Máxima': df['sigma_IFF_incerteza'].max(),
-    'Mínima': df['sigma_IFF_incerteza'].min(),
-}
+# Colunas lidas no modo --stream; os rótulos são carregados como categorias
+LABEL_COLUMNS = ['scenario', FAILURE_MODE, DECISION, 'hil_sincronizado']
+NUMERIC_COLUMNS = [IFF, SIGMA, NOISE, 'latencia_hil_ms', 'jitter_hil_ms'] + list(DIMENSIONS.values())
+
+def section(title):
+    print("\n" + "="*70)
+    print(title)
+    print("="*70)
 
-for metric, value in uncertainty_stats.items():
-    print(f"  {metric:.<20} {value:.6f}")
 
 # ============================================================================
-# 3. ANÁLISE DE DECISÕES AGÊNTICAS
+# ESTATÍSTICAS ONLINE
 # ============================================================================
-print("\n" + "="*70)
-print("3. ANÁLISE DE DECISÕES AGÊNTICAS")
-print("="*70)
 
-decisions = df['decisao_agentica'].value_counts()
-for decision, count in decisions.items():
-    percentage = (count / len(df)) * 100
-    print(f"  {decision:.<20} {count:>3} ({percentage:>5.1f}%)")
+class TDigest:
+    """
+    t-digest com fusão vetorizada para quantis em streaming
+
+    Os valores são agrupados em centróides cujo tamanho é limitado pela
+    função de escala k1 (arco-seno): pequenos nas caudas, maiores perto da
+    mediana. Enquanto cada centróide tem peso 1 o resultado é idêntico ao
+    quantil com interpolação linear do pandas.
+    """
+
+    def __init__(self, compression=1000, buffer_size=50000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self._buffer.append(values)
+        self._buffered += len(values)
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, np.ones(len(values))])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        total = weights.sum()
+        q_right = np.cumsum(weights) / total
+        q_left = q_right - weights / total
+        k = lambda q: self.compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0.0, 1.0) - 1)
+
+        # Um elemento abre um centróide novo quando seu limite esquerdo passa
+        # para outra unidade de k; o resto se funde ao centróide anterior
+        bins = np.floor(k(q_left) - k(0.0) + 1e-9)
+        starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q):
+        """Quantil q com a mesma interpolação linear do pandas"""
+        self._compress()
+        if len(self.weights) == 0:
+            return float('nan')
+        # Posição (base 0, como no pandas) do centro de cada centróide
+        centers = np.cumsum(self.weights) - (self.weights + 1) / 2
+        return float(np.interp(q * (self.weights.sum() - 1), centers, self.means))
+
+
+class ReservoirSample:
+    """Amostra aleatória uniforme de no máximo size linhas, para as figuras"""
+
+    def __init__(self, size=20000, seed=0):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+        self._rows = None
+        self._keys = np.empty(0)
+
+    def update(self, chunk):
+        keys = np.concatenate([self._keys, self._rng.random(len(chunk))])
+        rows = chunk if self._rows is None else pd.concat([self._rows, chunk], ignore_index=True)
+        if len(rows) > self.size:
+            keep = np.sort(np.argpartition(keys, self.size)[:self.size])
+            rows = rows.iloc[keep].reset_index(drop=True)
+            keys = keys[keep]
+        self._rows, self._keys = rows, keys
+
+    @property
+    def frame(self):
+        return self._rows if self._rows is not None else pd.DataFrame()
 
-# ============================================================================
-# 4. ANÁLISE POR MODO DE FALHA
-# ============================================================================
-print("\n" + "="*70)
-print("4. ANÁLISE POR MODO DE FALHA")
-print("="*70)
-
-failure_analysis = df.groupby('failure_mode').agg({
-    'IFF_indice_fidelidade': ['mean', 'std', 'min', 'max'],
-    'sigma_IFF_incerteza': 'mean',
-    'decisao_agentica': lambda x: (x == 'BLOCKED').sum(),
-}).round(6)
-
-print("\nIFF por Modo de Falha:")
-for mode in df['failure_mode'].unique():
-    mode_data = df[df['failure_mode'] == mode]
-    iff_mean = mode_data['IFF_indice_fidelidade'].mean()
-    blocked_count = (mode_data['decisao_agentica'] == 'BLOCKED').sum()
-    blocked_pct = (blocked_count / len(mode_data)) * 100
-    print(f"  {mode:.<25} IFF={iff_mean:.4f}, Bloqueados={blocked_count} ({blocked_pct:.1f}%)")
 
 # ============================================================================
-# 5. ANÁLISE POR NÍVEL DE RUÍDO
+# CÁLCULO DOS INDICADORES
 # ============================================================================
-print("\n" + "="*70)
-print("5. ANÁLISE POR NÍVEL DE RUÍDO")
-print("="*70)
-
-print("\nImpacto do Ruído no IFF:")
-for noise in sorted(df['noise_level_percent'].unique()):
-    noise_data = df[df['noise_level_percent'] == noise]
-    iff_mean = noise_data['IFF_indice_fidelidade'].mean()
-    sigma_mean = noise_data['sigma_IFF_incerteza'].mean()
-    blocked_count = (noise_data['decisao_agentica'] == 'BLOCKED').sum()
-    blocked_pct = (blocked_count / len(noise_data)) * 100
-    print(f"  Ruído {noise:>2}% - IFF={iff_mean:.4f}, σ={sigma_mean:.6f}, Bloqueados={blocked_pct:.1f}%")
+
+def summarize(cube, iff_quantiles):
+    """
+    Indicadores do relatório e das figuras a partir do cubo de agregação
+
+    Args:
+        cube: summary_cube() de todas as simulações
+        iff_quantiles: Quantis 0.25, 0.5 e 0.75 do IFF
+    """
+    totals = collapse(cube)
+    by_mode = collapse(cube, FAILURE_MODE)
+    by_noise = collapse(cube, NOISE).sort_index()
+    blocked = crosstab(cube, FAILURE_MODE, DECISION)
+    blocked_by_noise = crosstab(cube, NOISE, DECISION)
+
+    def blocked_count(table, index):
+        return table['BLOCKED'].reindex(index, fill_value=0) if 'BLOCKED' in table else 0
+
+    return {
+        'total': int(totals[('n', ROWS)]),
+        'iff_stats': {
+            'Média': totals[('mean', IFF)],
+            'Mediana': iff_quantiles[0.5],
+            'Desvio Padrão': totals[('std', IFF)],
+            'Mínimo': totals[('min', IFF)],
+            'Máximo': totals[('max', IFF)],
+            'Q1': iff_quantiles[0.25],
+            'Q3': iff_quantiles[0.75],
+        },
+        'uncertainty_stats': {
+            'Média': totals[('mean', SIGMA)],
+            'Máxima': totals[('max', SIGMA)],
+            'Mínima': totals[('min', SIGMA)],
+        },
+        'decisions': value_counts(cube, DECISION),
+        'failure_modes': value_counts(cube, FAILURE_MODE),
+        'scenarios': value_counts(cube, 'scenario'),
+        'by_mode': pd.DataFrame({
+            'iff_mean': by_mode[('mean', IFF)],
+            'blocked': blocked_count(blocked, by_mode.index),
+            'count': by_mode[('n', ROWS)],
+        }),
+        'by_noise': pd.DataFrame({
+            'iff_mean': by_noise[('mean', IFF)],
+            'iff_std': by_noise[('std', IFF)],
+            'sigma_mean': by_noise[('mean', SIGMA)],
+            'blocked': blocked_count(blocked_by_noise, by_noise.index),
+            'count': by_noise[('n', ROWS)],
+        }),
+        'mode_decisions': crosstab(cube, FAILURE_MODE, DECISION, normalize=True),
+        'dimensions': {
+            name: {stat: totals[(stat, col)] for stat in ('mean', 'std', 'min', 'max')}
+            for name, col in DIMENSIONS.items()
+        },
+        'hil': {
+            'synced': int(round(totals[('n', 'hil_sync')] * totals[('mean', 'hil_sync')])),
+            'latency_mean': totals[('mean', 'latencia_hil_ms')],
+            'jitter_mean': totals[('mean', 'jitter_hil_ms')],
+        },
+    }
+
+
+def summarize_frame(df):
+    """Indicadores do relatório a partir do DataFrame completo"""
+    quantiles = df[IFF].quantile([0.25, 0.5, 0.75])
+    return summarize(summary_cube(df), quantiles)
+
+
+class StreamingSummary:
+    """Cubo de agregação, quantis do IFF e amostra de linhas acumulados bloco a bloco"""
+
+    def __init__(self, sample_size=20000):
+        self.cube = None
+        self.iff_quantiles = TDigest()
+        self.sample = ReservoirSample(sample_size)
+
+    def update(self, chunk):
+        self.cube = merge_cubes(self.cube, summary_cube(chunk))
+        self.iff_quantiles.update(chunk[IFF])
+        self.sample.update(chunk)
+
+    def result(self):
+        quantiles = {q: self.iff_quantiles.quantile(q) for q in (0.25, 0.5, 0.75)}
+        return summarize(self.cube, quantiles)
+
+
+def read_chunks(path, chunksize):
+    """Blocos das colunas analisadas de um arquivo CSV ou Parquet"""
+    path = Path(path)
+    columns = LABEL_COLUMNS + NUMERIC_COLUMNS
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas().astype({name: 'category' for name in LABEL_COLUMNS})
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns,
+                               dtype={name: 'category' for name in LABEL_COLUMNS})
+
+
+def read_frame(path):
+    path = Path(path)
+    return pd.read_parquet(path) if path.suffix == '.parquet' else pd.read_csv(path)
+
 
 # ============================================================================
-# 6. ANÁLISE DE DIMENSÕES DE FIDELIDADE
+# RELATÓRIO NO CONSOLE
 # ============================================================================
-print("\n" + "="*70)
-print("6. ANÁLISE DE DIMENSÕES DE FIDELIDADE")
-print("="*70)
 
-dimensions = {
-    'D1 (Estado)': 'D1_fidelidade_estado',
-    'D2 (Dinâmica)': 'D2_fidelidade_dinamica',
-    'D3 (Energia)': 'D3_fidelidade_energia',
-    'D4 (Estabilidade)': 'D4_fidelidade_estabilidade',
-}
+def print_report(summary):
+    total = summary['total']
 
-for name, col in dimensions.items():
-    mean_val = df[col].mean()
-    std_val = df[col].std()
-    print(f"  {name:.<25} Média={mean_val:.4f}, Desvio={std_val:.4f}")
+    section("1. ANÁLISE DESCRITIVA DO ÍNDICE DE FIDELIDADE FÍSICA (IFF)")
+    for metric, value in summary['iff_stats'].items():
+        print(f"  {metric:.<20} {value:.6f}")
 
-# ============================================================================
-# 7. ANÁLISE HIL
-# ============================================================================
-print("\n" + "="*70)
-print("7. ANÁLISE HARDWARE-IN-THE-LOOP (HIL)")
-print("="*70)
+    section("2. ANÁLISE DE INCERTEZAS (σ_IFF)")
+    for metric, value in summary['uncertainty_stats'].items():
+        print(f"  {metric:.<20} {value:.6f}")
 
-hil_synced = (df['hil_sincronizado'] == 'SIM').sum()
-hil_sync_pct = (hil_synced / len(df)) * 100
-latency_mean = df['latencia_hil_ms'].mean()
-jitter_mean = df['jitter_hil_ms'].mean()
+    section("3. ANÁLISE DE DECISÕES AGÊNTICAS")
+    for decision, count in summary['decisions'].items():
+        percentage = (count / total) * 100
+        print(f"  {decision:.<20} {count:>3} ({percentage:>5.1f}%)")
+
+    section("4. ANÁLISE POR MODO DE FALHA")
+    print("\nIFF por Modo de Falha:")
+    for mode, row in summary['by_mode'].iterrows():
+        blocked_count = int(row['blocked'])
+        blocked_pct = (blocked_count / row['count']) * 100
+        print(f"  {mode:.<25} IFF={row['iff_mean']:.4f}, Bloqueados={blocked_count} ({blocked_pct:.1f}%)")
+
+    section("5. ANÁLISE POR NÍVEL DE RUÍDO")
+    print("\nImpacto do Ruído no IFF:")
+    for noise, row in summary['by_noise'].iterrows():
+        blocked_pct = (row['blocked'] / row['count']) * 100
+        print(f"  Ruído {noise:>2}% - IFF={row['iff_mean']:.4f}, σ={row['sigma_mean']:.6f}, Bloqueados={blocked_pct:.1f}%")
+
+    section("6. ANÁLISE DE DIMENSÕES DE FIDELIDADE")
+    for name, stats in summary['dimensions'].items():
+        print(f"  {name:.<25} Média={stats['mean']:.4f}, Desvio={stats['std']:.4f}")
+
+    section("7. ANÁLISE HARDWARE-IN-THE-LOOP (HIL)")
+    hil = summary['hil']
+    hil_sync_pct = (hil['synced'] / total) * 100
+    print(f"  Taxa de Sincronização:.... {hil_sync_pct:.1f}% ({hil['synced']}/{total})")
+    print(f"  Latência Média (ms):..... {hil['latency_mean']:.2f}")
+    print(f"  Jitter Médio (ms):....... {hil['jitter_mean']:.2f}")
 
-print(f"  Taxa de Sincronização:.... {hil_sync_pct:.1f}% ({hil_synced}/{len(df)})")
-print(f"  Latência Média (ms):..... {latency_mean:.2f}")
-print(f"  Jitter Médio (ms):....... {jitter_mean:.2f}")
 
 # ============================================================================
 # GERAR VISUALIZAÇÕES
 # ============================================================================
-print("\n" + "="*70)
-print("GERANDO VISUALIZAÇÕES")
-print("="*70)
-
-# Figura 1: Distribuição de IFF
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Análise do Índice de Fidelidade Física (IFF)', fontsize=16, fontweight='bold')
-
-# Histograma
-axes[0, 0].hist(df['IFF_indice_fidelidade'], bins=30, color='#3b82f6', edgecolor='black', alpha=0.7)
-axes[0, 0].axvline(df['IFF_indice_fidelidade'].mean(), color='red', linestyle='--', linewidth=2, label=f'Média: {df["IFF_indice_fidelidade"].mean():.4f}')
-axes[0, 0].axvline(0.95, color='green', linestyle='--', linewidth=2, label='Threshold Operacional')
-axes[0, 0].axvline(0.90, color='orange', linestyle='--', linewidth=2, label='Threshold Warning')
-axes[0, 0].set_xlabel('IFF')
-axes[0, 0].set_ylabel('Frequência')
-axes[0, 0].set_title('Distribuição de IFF')
-axes[0, 0].legend()
-axes[0, 0].grid(True, alpha=0.3)
-
-# Box plot por decisão
-df_plot = df.copy()
-df_plot['decisao_agentica'] = pd.Categorical(df_plot['decisao_agentica'], categories=['OPERATIONAL', 'WARNING', 'BLOCKED'], ordered=True)
-sns.boxplot(data=df_plot, x='decisao_agentica', y='IFF_indice_fidelidade', ax=axes[0, 1], palette=['green', 'orange', 'red'])
-axes[0, 1].set_title('IFF por Decisão Agêntica')
-axes[0, 1].set_ylabel('IFF')
-axes[0, 1].set_xlabel('Decisão')
-axes[0, 1].grid(True, alpha=0.3, axis='y')
-
-# IFF vs Ruído
-noise_data = df.groupby('noise_level_percent')['IFF_indice_fidelidade'].agg(['mean', 'std'])
-axes[1, 0].errorbar(noise_data.index, noise_data['mean'], yerr=noise_data['std'], marker='o', capsize=5, capthick=2, linewidth=2, markersize=8, color='#3b82f6')
-axes[1, 0].fill_between(noise_data.index, noise_data['mean'] - noise_data['std'], noise_data['mean'] + noise_data['std'], alpha=0.2, color='#3b82f6')
-axes[1, 0].set_xlabel('Nível de Ruído (%)')
-axes[1, 0].set_ylabel('IFF')
-axes[1, 0].set_title('Impacto do Ruído no IFF')
-axes[1, 0].grid(True, alpha=0.3)
-
-# Incerteza vs Ruído
-uncertainty_data = df.groupby('noise_level_percent')['sigma_IFF_incerteza'].mean()
-axes[1, 1].plot(uncertainty_data.index, uncertainty_data.values, marker='s', linewidth=2, markersize=8, color='#ef4444')
-axes[1, 1].set_xlabel('Nível de Ruído (%)')
-axes[1, 1].set_ylabel('σ_IFF')
-axes[1, 1].set_title('Propagação de Incerteza vs Ruído')
-axes[1, 1].grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig(output_dir / 'iff_analysis.png', dpi=300, bbox_inches='tight')
-print("✅ Salvo: iff_analysis.png")
-plt.close()
-
-# Figura 2: Análise de Dimensões
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Análise das Dimensões de Fidelidade', fontsize=16, fontweight='bold')
-
-for idx, (name, col) in enumerate(dimensions.items()):
-    ax = axes[idx // 2, idx % 2]
-    ax.hist(df[col], bins=25, color='#10b981', edgecolor='black', alpha=0.7)
-    ax.axvline(df[col].mean(), color='red', linestyle='--', linewidth=2, label=f'Média: {df[col].mean():.4f}')
-    ax.set_xlabel(name)
-    ax.set_ylabel('Frequência')
-    ax.set_title(f'Distribuição de {name}')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig(output_dir / 'dimensions_analysis.png', dpi=300, bbox_inches='tight')
-print("✅ Salvo: dimensions_analysis.png")
-plt.close()
-
-# Figura 3: Análise de Modos de Falha
-fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-fig.suptitle('Análise de Modos de Falha', fontsize=16, fontweight='bold')
-
-# IFF por modo de falha
-failure_iff = df.groupby('failure_mode')['IFF_indice_fidelidade'].mean().sort_values()
-axes[0].barh(failure_iff.index, failure_iff.values, color='#8b5cf6', edgecolor='black', alpha=0.7)
-axes[0].set_xlabel('IFF Médio')
-axes[0].set_title('IFF Médio por Modo de Falha')
-axes[0].grid(True, alpha=0.3, axis='x')
-
-# Decisões por modo de falha
-failure_decisions = pd.crosstab(df['failure_mode'], df['decisao_agentica'], normalize='index') * 100
-failure_decisions = failure_decisions[['OPERATIONAL', 'WARNING', 'BLOCKED']]
-failure_decisions.plot(kind='bar', ax=axes[1], color=['green', 'orange', 'red'], alpha=0.7, edgecolor='black')
-axes[1].set_ylabel('Percentual (%)')
-axes[1].set_xlabel('Modo de Falha')
-axes[1].set_title('Distribuição de Decisões por Modo de Falha')
-axes[1].legend(title='Decisão')
-axes[1].grid(True, alpha=0.3, axis='y')
-plt.setp(axes[1].xaxis.get_majorticklabels(), rotation=45, ha='right')
-
-plt.tight_layout()
-plt.savefig(output_dir / 'failure_modes_analysis.png', dpi=300, bbox_inches='tight')
-print("✅ Salvo: failure_modes_analysis.png")
-plt.close()
-
-# Figura 4: Análise HIL
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Análise Hardware-in-the-Loop (HIL)', fontsize=16, fontweight='bold')
-
-# Latência vs IFF
-axes[0, 0].scatter(df['latencia_hil_ms'], df['IFF_indice_fidelidade'], alpha=0.6, s=50, color='#3b82f6')
-axes[0, 0].set_xlabel('Latência (ms)')
-axes[0, 0].set_ylabel('IFF')
-axes[0, 0].set_title('Latência vs IFF')
-axes[0, 0].grid(True, alpha=0.3)
-
-# Jitter vs IFF
-axes[0, 1].scatter(df['jitter_hil_ms'], df['IFF_indice_fidelidade'], alpha=0.6, s=50, color='#f59e0b')
-axes[0, 1].set_xlabel('Jitter (ms)')
-axes[0, 1].set_ylabel('IFF')
-axes[0, 1].set_title('Jitter vs IFF')
-axes[0, 1].grid(True, alpha=0.3)
-
-# Distribuição de Latência
-axes[1, 0].hist(df['latencia_hil_ms'], bins=25, color='#3b82f6', edgecolor='black', alpha=0.7)
-axes[1, 0].axvline(df['latencia_hil_ms'].mean(), color='red', linestyle='--', linewidth=2, label=f'Média: {df["latencia_hil_ms"].mean():.2f} ms')
-axes[1, 0].set_xlabel('Latência (ms)')
-axes[1, 0].set_ylabel('Frequência')
-axes[1, 0].set_title('Distribuição de Latência HIL')
-axes[1, 0].legend()
-axes[1, 0].grid(True, alpha=0.3)
-
-# Sincronização HIL
-hil_sync_counts = df['hil_sincronizado'].value_counts()
-colors = ['green' if x == 'SIM' else 'red' for x in hil_sync_counts.index]
-axes[1, 1].bar(hil_sync_counts.index, hil_sync_counts.values, color=colors, alpha=0.7, edgecolor='black')
-axes[1, 1].set_ylabel('Contagem')
-axes[1, 1].set_title('Status de Sincronização HIL')
-for i, v in enumerate(hil_sync_counts.values):
-    axes[1, 1].text(i, v + 2, str(v), ha='center', fontweight='bold')
-axes[1, 1].grid(True, alpha=0.3, axis='y')
-
-plt.tight_layout()
-plt.savefig(output_dir / 'hil_analysis.png', dpi=300, bbox_inches='tight')
-print("✅ Salvo: hil_analysis.png")
-plt.close()
 
-# ============================================================================
-# SALVAR RELATÓRIO JSON
-# ============================================================================
-print("\n" + "="*70)
-print("SALVANDO RELATÓRIO JSON")
-print("="*70)
-
-report = {
-    'metadata': {
-        'total_simulations': len(df),
-        'timestamp_gerado': pd.Timestamp.now().isoformat(),
-    },
-    'iff_statistics': {k: float(v) for k, v in iff_stats.items()},
-    'uncertainty_statistics': {k: float(v) for k, v in uncertainty_stats.items()},
-    'decisions_distribution': decisions.to_dict(),
-    'failure_modes_distribution': df['failure_mode'].value_counts().to_dict(),
-    'scenarios_distribution': df['scenario'].value_counts().to_dict(),
-    'hil_metrics': {
-        'sync_rate_percent': float(hil_sync_pct),
-        'latency_mean_ms': float(latency_mean),
-        'jitter_mean_ms': float(jitter_mean),
-    },
-    'dimensions_statistics': {
-        name: {
-            'mean': float(df[col].mean()),
-            'std': float(df[col].std()),
-            'min': float(df[col].min()),
-            'max': float(df[col].max()),
-        }
-        for name, col in dimensions.items()
-    },
+def plot_iff(df, summary, preview=False):
+    """Figura 1: Distribuição de IFF"""
+    iff_mean = summary['iff_stats']['Média']
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    fig.suptitle('Análise do Índice de Fidelidade Física (IFF)', fontsize=16, fontweight='bold')
+
+    # Histograma
+    axes[0, 0].hist(df['IFF_indice_fidelidade'], bins=30, color='#3b82f6', edgecolor='black', alpha=0.7)
+    axes[0, 0].axvline(iff_mean, color='red', linestyle='--', linewidth=2, label=f'Média: {iff_mean:.4f}')
+    axes[0, 0].axvline(0.95, color='green', linestyle='--', linewidth=2, label='Threshold Operacional')
+    axes[0, 0].axvline(0.90, color='orange', linestyle='--', linewidth=2, label='Threshold Warning')
+    axes[0, 0].set_xlabel('IFF')
+    axes[0, 0].set_ylabel('Frequência')
+    axes[0, 0].set_title('Distribuição de IFF')
+    axes[0, 0].legend()
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # Box plot por decisão
+    df_plot = df.copy()
+    df_plot['decisao_agentica'] = pd.Categorical(df_plot['decisao_agentica'], categories=DECISIONS, ordered=True)
+    sns.boxplot(data=df_plot, x='decisao_agentica', y='IFF_indice_fidelidade', ax=axes[0, 1], palette=['green', 'orange', 'red'])
+    axes[0, 1].set_title('IFF por Decisão Agêntica')
+    axes[0, 1].set_ylabel('IFF')
+    axes[0, 1].set_xlabel('Decisão')
+    axes[0, 1].grid(True, alpha=0.3, axis='y')
+
+    # IFF vs Ruído
+    noise_data = summary['by_noise']
+    axes[1, 0].errorbar(noise_data.index, noise_data['iff_mean'], yerr=noise_data['iff_std'], marker='o', capsize=5, capthick=2, linewidth=2, markersize=8, color='#3b82f6')
+    axes[1, 0].fill_between(noise_data.index, noise_data['iff_mean'] - noise_data['iff_std'], noise_data['iff_mean'] + noise_data['iff_std'], alpha=0.2, color='#3b82f6')
+    axes[1, 0].set_xlabel('Nível de Ruído (%)')
+    axes[1, 0].set_ylabel('IFF')
+    axes[1, 0].set_title('Impacto do Ruído no IFF')
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # Incerteza vs Ruído
+    uncertainty_data = summary['by_noise']['sigma_mean']
+    axes[1, 1].plot(uncertainty_data.index, uncertainty_data.values, marker='s', linewidth=2, markersize=8, color='#ef4444')
+    axes[1, 1].set_xlabel('Nível de Ruído (%)')
+    axes[1, 1].set_ylabel('σ_IFF')
+    axes[1, 1].set_title('Propagação de Incerteza vs Ruído')
+    axes[1, 1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_dimensions(df, summary, preview=False):
+    """Figura 2: Análise de Dimensões"""
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    fig.suptitle('Análise das Dimensões de Fidelidade', fontsize=16, fontweight='bold')
+
+    for idx, (name, col) in enumerate(DIMENSIONS.items()):
+        ax = axes[idx // 2, idx % 2]
+        ax.hist(df[col], bins=25, color='#10b981', edgecolor='black', alpha=0.7)
+        mean = summary['dimensions'][name]['mean']
+        ax.axvline(mean, color='red', linestyle='--', linewidth=2, label=f'Média: {mean:.4f}')
+        ax.set_xlabel(name)
+        ax.set_ylabel('Frequência')
+        ax.set_title(f'Distribuição de {name}')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_failure_modes(df, summary, preview=False):
+    """Figura 3: Análise de Modos de Falha"""
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig.suptitle('Análise de Modos de Falha', fontsize=16, fontweight='bold')
+
+    # IFF por modo de falha
+    failure_iff = summary['by_mode']['iff_mean'].sort_index().sort_values(kind='stable')
+    axes[0].barh(failure_iff.index, failure_iff.values, color='#8b5cf6', edgecolor='black', alpha=0.7)
+    axes[0].set_xlabel('IFF Médio')
+    axes[0].set_title('IFF Médio por Modo de Falha')
+    axes[0].grid(True, alpha=0.3, axis='x')
+
+    # Decisões por modo de falha
+    failure_decisions = summary['mode_decisions'].sort_index().reindex(columns=DECISIONS, fill_value=0)
+    failure_decisions.plot(kind='bar', ax=axes[1], color=['green', 'orange', 'red'], alpha=0.7, edgecolor='black')
+    axes[1].set_ylabel('Percentual (%)')
+    axes[1].set_xlabel('Modo de Falha')
+    axes[1].set_title('Distribuição de Decisões por Modo de Falha')
+    axes[1].legend(title='Decisão')
+    axes[1].grid(True, alpha=0.3, axis='y')
+    plt.setp(axes[1].xaxis.get_majorticklabels(), rotation=45, ha='right')
+
+    plt.tight_layout()
+    return fig
+
+
+def plot_hil(df, summary, preview=False):
+    """Figura 4: Análise HIL"""
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    fig.suptitle('Análise Hardware-in-the-Loop (HIL)', fontsize=16, fontweight='bold')
+
+    points = df.sample(PREVIEW_POINTS, random_state=0) if preview and len(df) > PREVIEW_POINTS else df
+
+    # Latência vs IFF
+    axes[0, 0].scatter(points['latencia_hil_ms'], points['IFF_indice_fidelidade'], alpha=0.6, s=50, color='#3b82f6', rasterized=preview)
+    axes[0, 0].set_xlabel('Latência (ms)')
+    axes[0, 0].set_ylabel('IFF')
+    axes[0, 0].set_title('Latência vs IFF')
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # Jitter vs IFF
+    axes[0, 1].scatter(points['jitter_hil_ms'], points['IFF_indice_fidelidade'], alpha=0.6, s=50, color='#f59e0b', rasterized=preview)
+    axes[0, 1].set_xlabel('Jitter (ms)')
+    axes[0, 1].set_ylabel('IFF')
+    axes[0, 1].set_title('Jitter vs IFF')
+    axes[0, 1].grid(True, alpha=0.3)
+
+    # Distribuição de Latência
+    axes[1, 0].hist(df['latencia_hil_ms'], bins=25, color='#3b82f6', edgecolor='black', alpha=0.7)
+    latency_mean = summary['hil']['latency_mean']
+    axes[1, 0].axvline(latency_mean, color='red', linestyle='--', linewidth=2, label=f'Média: {latency_mean:.2f} ms')
+    axes[1, 0].set_xlabel('Latência (ms)')
+    axes[1, 0].set_ylabel('Frequência')
+    axes[1, 0].set_title('Distribuição de Latência HIL')
+    axes[1, 0].legend()
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # Sincronização HIL
+    synced = summary['hil']['synced']
+    hil_sync_counts = pd.Series({'SIM': synced, 'NÃO': summary['total'] - synced})
+    hil_sync_counts = hil_sync_counts[hil_sync_counts > 0].sort_values(ascending=False, kind='stable')
+    colors = ['green' if x == 'SIM' else 'red' for x in hil_sync_counts.index]
+    axes[1, 1].bar(hil_sync_counts.index, hil_sync_counts.values, color=colors, alpha=0.7, edgecolor='black')
+    axes[1, 1].set_ylabel('Contagem')
+    axes[1, 1].set_title('Status de Sincronização HIL')
+    for i, v in enumerate(hil_sync_counts.values):
+        axes[1, 1].text(i, v + 2, str(v), ha='center', fontweight='bold')
+    axes[1, 1].grid(True, alpha=0.3, axis='y')
+
+    plt.tight_layout()
+    return fig
+
+
+# Figura -> (função, colunas de df e chaves do resumo que ela usa). O hash
+# dessa fatia dos dados decide se a figura precisa ser gerada de novo.
+FIGURE_TASKS = {
+    'iff_analysis.png': (plot_iff, [IFF, DECISION], ['iff_stats', 'by_noise']),
+    'dimensions_analysis.png': (plot_dimensions, list(DIMENSIONS.values()), ['dimensions']),
+    'failure_modes_analysis.png': (plot_failure_modes, [], ['by_mode', 'mode_decisions']),
+    'hil_analysis.png': (plot_hil, ['latencia_hil_ms', 'jitter_hil_ms', IFF], ['hil', 'total']),
 }
+FIGURES = list(FIGURE_TASKS)
+
+# Hashes das figuras geradas, guardado no diretório dos resultados
+FIGURE_MANIFEST = '.figures.json'
+
+def _digest(value, h):
+    """Alimenta h com o conteúdo de value (pandas, numpy, dicts e escalares)"""
+    if isinstance(value, dict):
+        for key in sorted(value):
+            h.update(repr(key).encode())
+            _digest(value[key], h)
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(value.tobytes())
+    else:
+        h.update(repr(value.item() if isinstance(value, np.generic) else value).encode())
+
+
+def figure_inputs(name, df, summary):
+    """Fatia dos dados usada por uma figura: (colunas de df, partes do resumo)"""
+    _, columns, keys = FIGURE_TASKS[name]
+    data = df[columns].reset_index(drop=True) if columns else None
+    return data, {key: summary[key] for key in keys}
+
+
+def figure_hash(name, data, summary, preview):
+    """Hash da fatia de entrada, do código da figura e das opções de saída"""
+    func = FIGURE_TASKS[name][0]
+    h = hashlib.sha256()
+    h.update(inspect.getsource(func).encode())
+    h.update(repr((name, preview, PREVIEW_DPI if preview else DPI)).encode())
+    _digest({'data': data, 'summary': summary}, h)
+    return h.hexdigest()
+
+
+def render_figure(name, data, summary, path, preview=False):
+    """Gera uma figura e grava o PNG (executado nos processos do pool)"""
+    fig = FIGURE_TASKS[name][0](data, summary, preview)
+    # Grava ao lado e renomeia: uma figura interrompida não substitui a anterior
+    tmp = path.with_name(path.name + '.tmp')
+    fig.savefig(tmp, format='png', dpi=PREVIEW_DPI if preview else DPI, bbox_inches='tight')
+    plt.close(fig)
+    os.replace(tmp, path)
+    return name
+
+
+def load_manifest(output_dir):
+    try:
+        with open(output_dir / FIGURE_MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    tmp = output_dir / (FIGURE_MANIFEST + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, output_dir / FIGURE_MANIFEST)
+
+
+def plot_figures(df, summary, output_dir, preview=False, jobs=None, force=False):
+    """
+    Gera as figuras: histogramas, box plots e dispersões usam as linhas de
+    df (no modo --stream, a amostra); médias, desvios e contagens vêm dos
+    indicadores agregados
+
+    Cada figura é uma tarefa independente, executada num pool de processos.
+    Figuras cujo hash de entrada coincide com o da última geração e cujo PNG
+    existe são mantidas.
+
+    Args:
+        preview: Resolução reduzida e dispersões rasterizadas e amostradas
+        jobs: Processos do pool (padrão: um por figura, até o número de CPUs)
+        force: Gera todas as figuras mesmo sem alterações
+
+    Returns:
+        Lista das figuras geradas
+    """
+    section("GERANDO VISUALIZAÇÕES")
+    manifest = load_manifest(output_dir)
+    pending = {}
+    for name in FIGURES:
+        data, parts = figure_inputs(name, df, summary)
+        digest = figure_hash(name, data, parts, preview)
+        if not force and manifest.get(name) == digest and (output_dir / name).exists():
+            print(f"⏭️  Sem alterações: {name}")
+            continue
+        pending[name] = (digest, data, parts)
+
+    jobs = min(len(pending), jobs or os.cpu_count() or 1)
+    rendered = []
+    try:
+        if jobs <= 1:
+            for name, (digest, data, parts) in pending.items():
+                render_figure(name, data, parts, output_dir / name, preview)
+                manifest[name] = digest
+                rendered.append(name)
+                print(f"✅ Salvo: {name}")
+        else:
+            with ProcessPoolExecutor(jobs) as pool:
+                futures = {
+                    name: pool.submit(render_figure, name, data, parts, output_dir / name, preview)
+                    for name, (_, data, parts) in pending.items()
+                }
+                for name, future in futures.items():
+                    future.result()
+                    manifest[name] = pending[name][0]
+                    rendered.append(name)
+                    print(f"✅ Salvo: {name}")
+    finally:
+        if rendered:
+            save_manifest(output_dir, manifest)
+    return rendered
 
-with open(output_dir / 'experimental_report.json', 'w') as f:
-    json.dump(report, f, indent=2)
 
-print("✅ Salvo: experimental_report.json")
+# ============================================================================
+# SALVAR RELATÓRIO JSON
+# ============================================================================
 
-print("\n" + "="*70)
-print("✨ ANÁLISE CONCLUÍDA COM SUCESSO!")
-print("="*70)
-print(f"\n📁 Resultados salvos em: {output_dir}")
-print(f"   - iff_analysis.png")
-print(f"   - dimensions_analysis.png")
-print(f"   - failure_modes_analysis.png")
-print(f"   - hil_analysis.png")
-print(f"   - experimental_report.json")
+def build_report(summary):
+    hil = summary['hil']
+    return {
+        'metadata': {
+            'total_simulations': summary['total'],
+            'timestamp_gerado': pd.Timestamp.now().isoformat(),
+        },
+        'iff_statistics': {k: float(v) for k, v in summary['iff_stats'].items()},
+        'uncertainty_statistics': {k: float(v) for k, v in summary['uncertainty_stats'].items()},
+        'decisions_distribution': {k: int(v) for k, v in summary['decisions'].items()},
+        'failure_modes_distribution': {k: int(v) for k, v in summary['failure_modes'].items()},
+        'scenarios_distribution': {k: int(v) for k, v in summary['scenarios'].items()},
+        'hil_metrics': {
+            'sync_rate_percent': float(hil['synced'] / summary['total'] * 100),
+            'latency_mean_ms': float(hil['latency_mean']),
+            'jitter_mean_ms': float(hil['jitter_mean']),
+        },
+        'dimensions_statistics': {
+            name: {k: float(v) for k, v in stats.items()}
+            for name, stats in summary['dimensions'].items()
+        },
+    }
+
+
+def save_report(report, output_dir):
+    section("SALVANDO RELATÓRIO JSON")
+    with open(output_dir / 'experimental_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    print("✅ Salvo: experimental_report.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Análise estatística dos dados experimentais")
+    parser.add_argument('--data', type=Path, default=DATA_PATH, help="Arquivo CSV ou Parquet")
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR, help="Diretório dos resultados")
+    parser.add_argument('--stream', action='store_true',
+                        help="Ler em blocos com agregados online (memória constante)")
+    parser.add_argument('--chunksize', type=int, default=100000, help="Linhas por bloco no modo --stream")
+    parser.add_argument('--sample-size', type=int, default=20000,
+                        help="Linhas amostradas para as figuras no modo --stream")
+    parser.add_argument('--preview', action='store_true',
+                        help=f"Figuras rápidas: {PREVIEW_DPI} dpi e dispersões rasterizadas")
+    parser.add_argument('--jobs', type=int, default=None, help="Processos para gerar as figuras")
+    parser.add_argument('--force', action='store_true', help="Gerar todas as figuras mesmo sem alterações")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir
+    output_dir.mkdir(exist_ok=True)
+
+    print("📊 Carregando dados experimentais...")
+    if args.stream:
+        streaming = StreamingSummary(args.sample_size)
+        for chunk in read_chunks(args.data, args.chunksize):
+            streaming.update(chunk)
+        summary = streaming.result()
+        df = streaming.sample.frame
+        print(f"✅ Dados processados em blocos: {summary['total']} simulações (amostra de {len(df)} para as figuras)")
+    else:
+        df = read_frame(args.data)
+        summary = summarize_frame(df)
+        print(f"✅ Dados carregados: {len(df)} simulações")
+    print(f"📋 Colunas: {len(df.columns)}")
+
+    print_report(summary)
+    plot_figures(df, summary, output_dir, preview=args.preview, jobs=args.jobs, force=args.force)
+    save_report(build_report(summary), output_dir)
+
+    print("\n" + "="*70)
+    print("✨ ANÁLISE CONCLUÍDA COM SUCESSO!")
+    print("="*70)
+    print(f"\n📁 Resultados salvos em: {output_dir}")
+    for name in FIGURES + ['experimental_report.json']:
+        print(f"   - {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Cubo de agregação dos dados experimentais
+
+Agrupa as simulações uma única vez por cenário, modo de falha, nível de
+ruído e decisão agêntica, guardando por célula e por métrica a contagem, a
+média, a soma dos quadrados dos desvios (M2), o mínimo e o máximo. Os
+agrupamentos do relatório e das figuras (por modo de falha, por ruído,
+decisões por modo, totais) saem da combinação das células, sem voltar às
+linhas. Cubos de blocos diferentes do mesmo arquivo se combinam da mesma
+forma, o que serve ao modo streaming.
+
+Uso:
+    from experimental_summary import summary_cube, merge_cubes, collapse, crosstab
+
+    cube = summary_cube(df)
+    collapse(cube)                      # totais: cube[stat][métrica]
+    collapse(cube, 'failure_mode')      # n/mean/std/min/max por modo de falha
+    crosstab(cube, 'failure_mode', 'decisao_agentica')
+"""
+
+import numpy as np
+import pandas as pd
+
+CUBE_KEYS = ['scenario', 'failure_mode', 'noise_level_percent', 'decisao_agentica']
+
+# Métricas numéricas agregadas; hil_sync é 1 para simulações sincronizadas
+CUBE_METRICS = [
+    'IFF_indice_fidelidade', 'sigma_IFF_incerteza',
+    'D1_fidelidade_estado', 'D2_fidelidade_dinamica',
+    'D3_fidelidade_energia', 'D4_fidelidade_estabilidade',
+    'latencia_hil_ms', 'jitter_hil_ms', 'hil_sync',
+]
+
+# Pseudo-métrica com o número de simulações da célula (só tem a estatística 'n')
+ROWS = 'rows'
+
+
+def summary_cube(df):
+    """
+    Cubo de um DataFrame (o arquivo todo ou um bloco)
+
+    Returns:
+        DataFrame indexado por CUBE_KEYS (células na ordem de primeira
+        ocorrência) com colunas (estatística, métrica) para as estatísticas
+        n, mean, m2, min e max; ('n', ROWS) conta as simulações
+    """
+    frame = df[CUBE_KEYS + CUBE_METRICS[:-1]].assign(
+        hil_sync=(df['hil_sincronizado'] == 'SIM').astype(float))
+    grouped = frame.groupby(CUBE_KEYS, sort=False, observed=True, dropna=False)
+    values = grouped[CUBE_METRICS]
+
+    n = values.count()
+    cube = pd.concat({
+        'n': n.assign(**{ROWS: grouped.size()}),
+        'mean': values.mean(),
+        'm2': values.var(ddof=0) * n,
+        'min': values.min(),
+        'max': values.max(),
+    }, axis=1)
+
+    # Rótulos categóricos viram valores simples, para que cubos de blocos
+    # com categorias diferentes possam ser combinados
+    cube.index = cube.index.set_levels([
+        level.astype(level.categories.dtype) if isinstance(level, pd.CategoricalIndex) else level
+        for level in cube.index.levels
+    ])
+    return cube
+
+
+def merge_cubes(a, b):
+    """Combina os cubos de dois conjuntos disjuntos de simulações"""
+    if a is None:
+        return b
+    index = a.index.union(b.index, sort=False)
+    a, b = a.reindex(index), b.reindex(index)
+
+    n_a, n_b = a['n'].fillna(0), b['n'].fillna(0)
+    n = n_a + n_b
+    counts_a, counts_b, counts = n_a[CUBE_METRICS], n_b[CUBE_METRICS], n[CUBE_METRICS]
+    mean_a, mean_b = a['mean'].fillna(0), b['mean'].fillna(0)
+    delta = mean_b - mean_a
+
+    # Chan et al.: média e M2 da união a partir das partes
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (mean_a + delta * counts_b / counts).where(counts > 0)
+        m2 = (a['m2'].fillna(0) + b['m2'].fillna(0) + delta ** 2 * counts_a * counts_b / counts).where(counts > 0)
+
+    return pd.concat({
+        'n': n,
+        'mean': mean,
+        'm2': m2,
+        'min': np.fmin(a['min'], b['min']),
+        'max': np.fmax(a['max'], b['max']),
+    }, axis=1)
+
+
+def collapse(cube, by=None):
+    """
+    Estatísticas de grupos mais grossos que as células do cubo
+
+    Args:
+        by: Nível ou lista de níveis de CUBE_KEYS (None: todas as simulações)
+
+    Returns:
+        DataFrame por grupo (ordem de primeira ocorrência) com colunas
+        (estatística, métrica) para n, mean, std (ddof=1, como no pandas),
+        m2, min e max; com by=None, uma Series com os totais
+    """
+    by = [by] if isinstance(by, str) else list(by or [])
+    keys = [cube.index.get_level_values(name) for name in by] or [np.zeros(len(cube), dtype=int)]
+
+    def group(frame):
+        return frame.groupby(keys, sort=False)
+
+    counts = cube['n'][CUBE_METRICS]
+    weighted = (cube['mean'] * counts).fillna(0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Média do grupo levada a cada célula, para a parcela entre células de M2
+        group_mean = group(weighted).transform('sum') / group(counts).transform('sum')
+        between = (counts * (cube['mean'] - group_mean) ** 2).fillna(0)
+
+        n = group(cube['n']).sum()
+        mean = group(weighted).sum() / n[CUBE_METRICS]
+        m2 = group(cube['m2'].fillna(0) + between).sum()
+        std = np.sqrt(m2 / (n[CUBE_METRICS] - 1)).where(n[CUBE_METRICS] > 1)
+
+    result = pd.concat({
+        'n': n,
+        'mean': mean.where(n[CUBE_METRICS] > 0),
+        'std': std,
+        'm2': m2,
+        'min': group(cube['min']).min(),
+        'max': group(cube['max']).max(),
+    }, axis=1)
+
+    if not by:
+        return result.iloc[0]
+    if len(by) == 1:
+        result.index.name = by[0]
+    else:
+        result.index.names = by
+    return result
+
+
+def crosstab(cube, index, columns, normalize=False):
+    """
+    Número de simulações por (index, columns), como pd.crosstab
+
+    Args:
+        normalize: Percentual de cada linha em vez da contagem
+    """
+    counts = cube['n'][ROWS].groupby(level=[index, columns], sort=False).sum().unstack(columns, fill_value=0)
+    if normalize:
+        counts = counts.div(counts.sum(axis=1), axis=0) * 100
+    return counts
+
+
+def value_counts(cube, by):
+    """Número de simulações por valor de um nível, em ordem decrescente (como value_counts)"""
+    counts = cube['n'][ROWS].groupby(level=by, sort=False).sum().astype('int64')
+    return counts.sort_values(ascending=False, kind='stable')
@@ -0,0 +1,125 @@
+"""
+Análise experimental: modo --stream contra o modo padrão, t-digest e amostra reservatório
+"""
+
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analyze_experimental_data as analysis
+from analyze_experimental_data import DATA_PATH, ReservoirSample, TDigest
+
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['analyze_experimental_data.py', *map(str, args)])
+    analysis.main()
+
+
+def flatten(document, prefix=''):
+    for key, value in document.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f'{prefix}{key}/')
+        else:
+            yield prefix + key, value
+
+
+def test_stream_report_matches_full_load(tmp_path, monkeypatch):
+    # As figuras são testadas à parte
+    monkeypatch.setattr(analysis, 'plot_figures', lambda *args, **kwargs: [])
+
+    run_main(monkeypatch, '--data', DATA_PATH, '--output-dir', tmp_path / 'full')
+    run_main(monkeypatch, '--data', DATA_PATH, '--output-dir', tmp_path / 'stream', '--stream', '--chunksize', 17)
+
+    full, stream = (
+        json.loads((tmp_path / mode / 'experimental_report.json').read_text()) for mode in ('full', 'stream')
+    )
+    for report in (full, stream):
+        report['metadata'].pop('timestamp_gerado')
+    full, stream = dict(flatten(full)), dict(flatten(stream))
+
+    assert list(stream) == list(full)
+    for key, value in full.items():
+        if isinstance(value, int):
+            assert stream[key] == value, key
+        else:
+            assert stream[key] == pytest.approx(value, rel=1e-12), key
+
+
+def test_tdigest_is_exact_while_centroids_are_single_values():
+    values = np.random.default_rng(0).normal(size=300)
+    digest = TDigest(compression=1000, buffer_size=64)
+    for chunk in np.array_split(values, 7):
+        digest.update(chunk)
+
+    quantiles = [digest.quantile(q) for q in np.linspace(0, 1, 41)]
+
+    assert (digest.weights == 1).all()
+    np.testing.assert_allclose(quantiles, np.quantile(values, np.linspace(0, 1, 41)), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('distribution', ['normal', 'exponential', 'uniform'])
+def test_tdigest_rank_error_on_large_inputs(distribution):
+    values = getattr(np.random.default_rng(1), distribution)(size=300000)
+    digest = TDigest()
+    for chunk in np.array_split(values, 37):
+        digest.update(chunk)
+
+    ordered = np.sort(values)
+    for q in (0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999):
+        rank = np.searchsorted(ordered, digest.quantile(q)) / len(values)
+        # Erro de posição de no máximo 0,1 ponto percentual
+        assert abs(rank - q) < 1e-3, q
+    assert len(digest.weights) <= digest.compression
+
+
+def reservoir(seed, rows=50, size=10, chunks=5):
+    sample = ReservoirSample(size, seed)
+    for chunk in np.array_split(np.arange(rows), chunks):
+        sample.update(pd.DataFrame({'row': chunk}))
+    return sample.frame['row'].to_numpy()
+
+
+def test_reservoir_repeats_for_a_seed():
+    np.testing.assert_array_equal(reservoir(3), reservoir(3))
+    assert not np.array_equal(reservoir(3), reservoir(4))
+    assert len(reservoir(3)) == 10 and len(np.unique(reservoir(3))) == 10
+
+
+def test_reservoir_is_uniform():
+    trials = 1000
+    counts = np.bincount(np.concatenate([reservoir(seed) for seed in range(trials)]), minlength=50)
+
+    # Cada linha entra com probabilidade 10/50: 200 ± 12,6 vezes em 1000 amostras
+    expected = trials * 10 / 50
+    sigma = np.sqrt(trials * 0.2 * 0.8)
+    assert np.abs(counts - expected).max() < 5 * sigma
+    # Linhas dos primeiros e dos últimos blocos entram igualmente
+    assert abs(counts[:10].sum() - counts[-10:].sum()) < 5 * np.sqrt(2 * 10) * sigma
+
+
+def test_figures_are_rendered_only_when_their_inputs_change(tmp_path):
+    df = analysis.read_frame(DATA_PATH)
+    first = analysis.plot_figures(df, analysis.summarize_frame(df), tmp_path, preview=True, jobs=1)
+    manifest = analysis.load_manifest(tmp_path)
+    written = {name: (tmp_path / name).stat().st_mtime_ns for name in analysis.FIGURES}
+
+    again = analysis.plot_figures(df, analysis.summarize_frame(df), tmp_path, preview=True, jobs=1)
+
+    assert first == analysis.FIGURES and again == []
+    assert analysis.load_manifest(tmp_path) == manifest
+
+    # O jitter só entra na figura HIL
+    changed = df.assign(jitter_hil_ms=df['jitter_hil_ms'] + 1.0)
+    rendered = analysis.plot_figures(changed, analysis.summarize_frame(changed), tmp_path, preview=True, jobs=1)
+
+    updated = analysis.load_manifest(tmp_path)
+    assert rendered == ['hil_analysis.png']
+    assert updated['hil_analysis.png'] != manifest['hil_analysis.png']
+    assert {k: v for k, v in updated.items() if k != 'hil_analysis.png'} == \
+        {k: v for k, v in manifest.items() if k != 'hil_analysis.png'}
+    for name in analysis.FIGURES:
+        unchanged = (tmp_path / name).stat().st_mtime_ns == written[name]
+        assert unchanged == (name != 'hil_analysis.png'), name
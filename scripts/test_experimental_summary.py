@@ -0,0 +1,80 @@
+"""
+Cubo de agregação: agrupamentos contra o pandas e combinação de blocos
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from experimental_summary import (
+    CUBE_KEYS, CUBE_METRICS, ROWS, collapse, crosstab, merge_cubes, summary_cube, value_counts,
+)
+
+DATA_PATH = Path(__file__).parent.parent / 'experimental_data.csv'
+
+
+@pytest.fixture(scope='module')
+def frame():
+    df = pd.read_csv(DATA_PATH)
+    # Um valor ausente, para que n difira entre as métricas
+    df.loc[3, 'latencia_hil_ms'] = np.nan
+    return df.assign(hil_sync=(df['hil_sincronizado'] == 'SIM').astype(float))
+
+
+@pytest.mark.parametrize('by', ['failure_mode', 'noise_level_percent', ['scenario', 'decisao_agentica']])
+def test_collapse_matches_groupby(frame, by):
+    result = collapse(summary_cube(frame), by)
+    expected = frame.groupby(by, sort=False)[CUBE_METRICS].agg(['count', 'mean', 'std', 'min', 'max'])
+
+    assert list(result.index) == list(expected.index)
+    for stat, name in [('n', 'count'), ('mean', 'mean'), ('std', 'std'), ('min', 'min'), ('max', 'max')]:
+        for metric in CUBE_METRICS:
+            np.testing.assert_allclose(result[(stat, metric)], expected[(metric, name)], rtol=1e-12,
+                                       err_msg=f'{stat} {metric}')
+    np.testing.assert_array_equal(result[('n', ROWS)], frame.groupby(by, sort=False).size())
+
+
+def test_collapse_totals(frame):
+    totals = collapse(summary_cube(frame))
+
+    assert totals[('n', ROWS)] == len(frame)
+    for metric in CUBE_METRICS:
+        assert totals[('mean', metric)] == pytest.approx(frame[metric].mean(), rel=1e-12)
+        assert totals[('std', metric)] == pytest.approx(frame[metric].std(), rel=1e-12)
+
+
+@pytest.mark.parametrize('normalize', [False, True])
+def test_crosstab_matches_pandas(frame, normalize):
+    result = crosstab(summary_cube(frame), 'failure_mode', 'decisao_agentica', normalize=normalize)
+    expected = pd.crosstab(frame['failure_mode'], frame['decisao_agentica'],
+                           normalize='index' if normalize else False) * (100 if normalize else 1)
+
+    result = result.loc[expected.index, expected.columns]
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('by', ['decisao_agentica', 'failure_mode', 'scenario'])
+def test_value_counts_matches_pandas(frame, by):
+    result = value_counts(summary_cube(frame), by)
+    expected = frame[by].value_counts()
+
+    assert result.to_dict() == expected.to_dict()
+    assert list(result.to_numpy()) == sorted(result.to_numpy(), reverse=True)
+
+
+def test_merged_chunks_equal_the_whole_frame(frame):
+    raw = frame.drop(columns='hil_sync')
+    first, second = raw.iloc[:61], raw.iloc[61:]
+
+    merged = merge_cubes(summary_cube(first), summary_cube(second))
+    whole = summary_cube(raw)
+
+    # Células presentes nos dois blocos exercitam a combinação de Chan
+    shared = summary_cube(first).index.intersection(summary_cube(second).index)
+    assert len(shared) > 0
+    merged = merged.loc[whole.index]
+    for column in whole.columns:
+        np.testing.assert_allclose(merged[column], whole[column], rtol=1e-10, atol=1e-12, err_msg=str(column))
+    assert list(merged.index.names) == CUBE_KEYS
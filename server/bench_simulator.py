@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the HVDC Simulator
+Times the build, solve, extract and serialize phases of a simulation tick
+
+Usage:
+    python3 bench_simulator.py                                 # print report
+    python3 bench_simulator.py --save-baseline bench.json      # store baseline
+    python3 bench_simulator.py --compare bench.json            # fail on regressions
+    python3 bench_simulator.py --ring-sizes 10,100,500         # larger networks
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import hvdc_simulator as sim
+import network_builder
+
+# Operating points cycled through by the benchmarks (MW)
+LOAD_POINTS = (200.0, 400.0, 600.0, 800.0, 1000.0)
+
+# Load scaling cycled through by the multi-terminal network benchmarks, and
+# their slack spacing (every 10th station keeps large rings solvable at 120%)
+LOAD_SCALES = (0.8, 0.9, 1.0, 1.1, 1.2)
+RING_SLACK_EVERY = 10
+
+
+def _percentiles(samples):
+    """Summary statistics of a list of durations in seconds"""
+    values = np.asarray(samples) * 1e6
+    return {
+        'n': int(values.size),
+        'mean_us': float(values.mean()),
+        'p50_us': float(np.percentile(values, 50)),
+        'p95_us': float(np.percentile(values, 95)),
+        'p99_us': float(np.percentile(values, 99)),
+    }
+
+
+def _measure(func, setup, repeat, warmup):
+    """
+    Time ``func`` ``repeat`` times and measure its peak traced memory once
+
+    ``setup(i)`` runs before every call, outside the timed region, and
+    returns the argument passed to ``func``.
+    """
+    for i in range(warmup):
+        func(setup(i))
+
+    samples = []
+    for i in range(repeat):
+        arg = setup(i)
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+
+    arg = setup(repeat)
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = _percentiles(samples)
+    stats['peak_kib'] = peak / 1024
+    return stats
+
+
+def _params(i):
+    return {'load_mw': LOAD_POINTS[i % len(LOAD_POINTS)]}
+
+
+def _solved_net(i, solver='pandapower'):
+    net = sim.get_hvdc_network(_params(i))
+    sim.run_simulation(net, warm_start=True, solver=solver)
+    return net
+
+
+def benchmark_phases(repeat, warmup):
+    """Per-phase timings of a single simulation tick on the 4-bus network"""
+    results = {}
+
+    results['build/fresh'] = _measure(sim.create_hvdc_network, _params, repeat, warmup)
+    results['build/cached'] = _measure(sim.get_hvdc_network, _params, repeat, warmup)
+
+    results['solve/pandapower'] = _measure(
+        lambda net: sim._run_power_flow(net), lambda i: sim.get_hvdc_network(_params(i)),
+        repeat, warmup)
+    results['solve/pandapower-warm'] = _measure(
+        lambda net: sim._run_power_flow(net, warm_start=True),
+        lambda i: sim.get_hvdc_network(_params(i)), repeat, warmup)
+    results['solve/fast'] = _measure(
+        sim._solve_fast, lambda i: sim.get_hvdc_network(_params(i)), repeat, warmup)
+
+    results['extract'] = _measure(sim.extract_results, _solved_net, repeat, warmup)
+
+    sample = sim.simulate(_params(0))
+    for fmt in sim.OUTPUT_FORMATS:
+        try:
+            sim.encode_result(sample, fmt)
+        except ImportError:
+            continue
+        results[f'serialize/{fmt}'] = _measure(
+            lambda result, fmt=fmt: sim.encode_result(result, fmt), lambda i: sample, repeat, warmup)
+    results['serialize/json-indent'] = _measure(
+        lambda result: json.dumps(result, indent=2), lambda i: sample, repeat, warmup)
+
+    results['tick/pandapower'] = _measure(
+        lambda params: sim.encode_result(sim.simulate(params)), _params, repeat, warmup)
+    results['tick/fast'] = _measure(
+        lambda params: sim.encode_result(sim.simulate(params, 'fast')), _params, repeat, warmup)
+
+    buses = len(sim.get_hvdc_network(_params(0)).bus)
+    for stats in results.values():
+        stats['buses'] = buses
+    return results
+
+
+def benchmark_networks(ring_sizes, repeat, warmup):
+    """
+    Build, solve and extract timings of network_builder rings per station count
+
+    Every solve starts from the same loads scaled by one of LOAD_SCALES, so
+    successive runs move the operating point like the 4-bus benchmarks.
+    """
+    results = {}
+    for stations in ring_sizes:
+        spec = network_builder.ring_spec(stations, RING_SLACK_EVERY)
+        grid = network_builder.build_network(spec)
+        net = grid['net']
+        base_load = net.load['p_mw'].to_numpy().copy()
+        size = {'stations': stations, 'buses': len(net.bus)}
+
+        def scaled(i):
+            net.load['p_mw'] = base_load * LOAD_SCALES[i % len(LOAD_SCALES)]
+            return grid
+
+        def solved(i):
+            network_builder.solve_grid(scaled(i))
+            return grid
+
+        rows = {'build': _measure(network_builder.build_network, lambda i: spec, repeat, warmup)}
+        for solver in sim.SOLVERS:
+            rows[f'solve/{solver}'] = _measure(
+                lambda grid, solver=solver: network_builder.solve_grid(grid, solver), scaled, repeat, warmup)
+        rows['extract'] = _measure(network_builder.extract_grid_results, solved, repeat, warmup)
+
+        for phase, stats in rows.items():
+            results[f'{phase}/ring-{stations}'] = {**stats, **size}
+    return results
+
+
+def benchmark_batches(batch_sizes, repeat, warmup):
+    """run_batch throughput per batch size and solver (timings per scenario)"""
+    results = {}
+    for solver in sim.SOLVERS:
+        for size in batch_sizes:
+            loads = np.resize(np.asarray(LOAD_POINTS), size)
+            samples = []
+            for i in range(warmup + repeat):
+                start = time.perf_counter()
+                sim.run_batch({'load_mw': loads}, solver=solver)
+                if i >= warmup:
+                    samples.append((time.perf_counter() - start) / size)
+            results[f'batch/{solver}/{size}'] = _percentiles(samples)
+
+    buses = len(sim.get_hvdc_network(_params(0)).bus)
+    for stats in results.values():
+        stats['buses'] = buses
+    return results
+
+
+def compare(current, baseline, threshold):
+    """
+    Compare p50 timings against a baseline
+
+    Returns:
+        List of (name, baseline_p50_us, current_p50_us, ratio) for benchmarks
+        slower than ``1 + threshold`` times the baseline
+    """
+    regressions = []
+    for name, stats in current['benchmarks'].items():
+        reference = baseline.get('benchmarks', {}).get(name)
+        if reference is None or reference['p50_us'] <= 0:
+            continue
+        ratio = stats['p50_us'] / reference['p50_us']
+        if ratio > 1 + threshold:
+            regressions.append((name, reference['p50_us'], stats['p50_us'], ratio))
+    return regressions
+
+
+def print_report(report):
+    print(f"{'benchmark':<28}{'buses':>8}{'p50 us':>12}{'p95 us':>12}{'p99 us':>12}{'peak KiB':>12}")
+    for name, stats in report['benchmarks'].items():
+        peak = f"{stats['peak_kib']:.1f}" if 'peak_kib' in stats else '-'
+        print(f"{name:<28}{stats['buses']:>8}{stats['p50_us']:>12.1f}{stats['p95_us']:>12.1f}"
+              f"{stats['p99_us']:>12.1f}{peak:>12}")
+
+
+def main():
+    """Main entry point for command-line execution"""
+    parser = argparse.ArgumentParser(description="Benchmark the HVDC simulator phases")
+    parser.add_argument('--repeat', type=int, default=100, help="Timed runs per benchmark")
+    parser.add_argument('--warmup', type=int, default=5, help="Untimed runs per benchmark")
+    parser.add_argument('--batch-sizes', default='1,10,100',
+                        help="Comma-separated run_batch sizes")
+    parser.add_argument('--batch-repeat', type=int, default=5, help="Timed runs per batch size")
+    parser.add_argument('--ring-sizes', default='10,50,200',
+                        help="Comma-separated station counts of the ring network benchmarks")
+    parser.add_argument('--ring-repeat', type=int, default=20, help="Timed runs per ring size")
+    parser.add_argument('--output', metavar='JSON', help="Write the report to a file")
+    parser.add_argument('--save-baseline', metavar='JSON', help="Store the report as baseline")
+    parser.add_argument('--compare', metavar='JSON', help="Baseline to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed p50 slowdown relative to the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',') if size]
+    ring_sizes = [int(size) for size in args.ring_sizes.split(',') if size]
+
+    benchmarks = benchmark_phases(args.repeat, args.warmup)
+    benchmarks.update(benchmark_batches(batch_sizes, args.batch_repeat, 1))
+    benchmarks.update(benchmark_networks(ring_sizes, args.ring_repeat, 1))
+
+    report = {
+        'metadata': {
+            'timestamp': str(np.datetime64('now')),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'benchmarks': benchmarks,
+    }
+
+    print_report(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: p50 {before:.1f} us -> {after:.1f} us ({ratio:.2f}x)",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Pytest configuration for the server tests
+
+server/hvdc_simulator.py (the CLI simulator) and pandapower/hvdc_simulator.py
+(HVDCSimulator) share a module name, and pytest puts both test directories on
+sys.path in one session. Before each test module is collected, its own
+directory is moved to the front of sys.path and a cached hvdc_simulator from
+the other directory is evicted, so every test imports its neighbour.
+"""
+
+import os
+import sys
+
+import pytest
+
+SHARED_MODULES = ("hvdc_simulator",)
+
+
+def pytest_collectstart(collector):
+    if not isinstance(collector, pytest.Module):
+        return
+    directory = str(collector.path.parent)
+    if directory in sys.path:
+        sys.path.remove(directory)
+    sys.path.insert(0, directory)
+    for name in SHARED_MODULES:
+        module = sys.modules.get(name)
+        origin = getattr(module, "__file__", None)
+        if origin and os.path.dirname(os.path.abspath(origin)) != directory:
+            del sys.modules[name]
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Reduced-Order Dynamics of the HVDC Back-to-Back System
+Fixed-step simulation of the DC link, the converter controls and the AC
+sources, vectorized over many scenarios at once
+
+Each 12-pulse converter is represented by its averaged DC voltage, so the
+model follows the DC current and the control loops but not the individual
+valve firings (two six-pulse bridges in series, commutation reactance xc):
+
+    rectifier   Vdr = Vdor cos(alpha) - Rcr Id
+    inverter    Vdi = Vdoi cos(beta) + Rci Id
+    commutation cos(gamma) = cos(beta) + 2 Rci Id / Vdoi
+    DC link     L dId/dt = Vdr - Vdi - R Id
+
+R and L are the DC link impedance of create_hvdc_network() (L from x_dc at
+the system frequency) plus a smoothing reactor. Vdo follows the AC bus
+voltage, which is the Thevenin source (vm_pu behind 1/SCR) loaded with the
+converter P and Q less the filter Mvar, solved from the previous step.
+
+The rectifier holds the current order (PI on alpha) reduced by a voltage
+dependent current limit (VDCOL); the inverter holds the extinction angle
+gamma from lagged measurements and takes over current control with a
+current margin when the rectifier cannot. A gamma below GAMMA_MIN_DEG is a
+commutation failure: the inverter bridges short the DC side for one cycle.
+Faults are AC voltage dips of the Thevenin source of one side.
+
+The DC current is advanced implicitly, so the step size is limited by the
+control and fault timing, not by the link time constant. Waveforms are
+produced in blocks, so long or many runs need not fit in memory.
+
+Usage:
+    python converter_dynamics.py '{"fault_retained_pu": [1.0, 0.8, 0.5]}'
+    python converter_dynamics.py faults.csv --duration 0.5 --every 10 --output waveforms/
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+# Scenario parameters and their defaults. The network values are those of
+# create_hvdc_network(); fault_bus selects the AC side (1 rectifier, 2
+# inverter) whose source dips to fault_retained_pu (1.0: no fault).
+SCENARIO_DEFAULTS = {
+    "load_mw": 1000.0,
+    "ac1_vm_pu": 1.0,
+    "ac2_vm_pu": 1.0,
+    "dc_voltage": 422.84,
+    "power_mva": 1196.0,
+    "r_dc": 0.01,
+    "x_dc": 0.05,
+    "smoothing_h": 0.5,
+    "scr1": 3.0,
+    "scr2": 3.0,
+    "fault_bus": 2.0,
+    "fault_start_s": 0.1,
+    "fault_duration_s": 0.05,
+    "fault_retained_pu": 1.0,
+}
+
+# pandapower's default system frequency, which create_hvdc_network() keeps
+FREQUENCY_HZ = 50.0
+
+DEFAULT_STEP_S = 1e-4
+DEFAULT_DURATION_S = 0.5
+# Recorded samples per yielded block
+DEFAULT_BLOCK_SAMPLES = 1000
+
+# Converter design point: rated current (power_mva at dc_voltage) at these angles
+ALPHA_RATED_DEG = 15.0
+GAMMA_REF_DEG = 18.0
+XC_PU = 0.18
+# Reactive power of the filters per side, as a fraction of the converter's
+# pre-fault Mvar (filter banks switched to the operating point)
+FILTER_COMPENSATION = 1.0
+
+ALPHA_MIN_DEG, ALPHA_MAX_DEG = 5.0, 150.0
+BETA_MAX_DEG = 80.0
+GAMMA_MIN_DEG = 7.0
+
+# Current controllers (rad per pu current error, and per pu*s)
+CURRENT_KP = 1.0
+CURRENT_KI = 100.0
+CURRENT_MARGIN_PU = 0.1
+# Lag of the measurements used by the gamma control and the VDCOL
+MEASUREMENT_TC_S = 0.005
+VDCOL_TC_S = 0.02
+# VDCOL: current limit (pu of rated) over DC voltage (pu), linear in between
+VDCOL_POINTS = ((0.4, 0.3), (0.9, 1.0))
+
+# Output waveforms, each (scenarios, samples) per block
+SIGNALS = (
+    "id_ka", "vdr_kv", "vdi_kv", "p_rect_mw", "p_inv_mw", "vac1_pu", "vac2_pu",
+    "alpha_deg", "beta_deg", "gamma_deg", "commutation_failure",
+)
+# Band around the pre-fault inverter power that counts as recovered
+RECOVERY_BAND = 0.1
+
+
+def load_scenarios(source):
+    """
+    Normalize scenario input into one float array per SCENARIO_DEFAULTS entry
+
+    Args:
+        source: Dict of scalars or equally long columns, list of dicts, or
+            CSV file path. Missing parameters take their defaults; unknown
+            ones are ignored.
+
+    Raises:
+        ValueError: If a list entry is not a dict
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="") as f:
+            source = [
+                {k: float(v) for k, v in row.items() if v not in (None, "")}
+                for row in csv.DictReader(f)
+            ]
+
+    if isinstance(source, dict):
+        columns = {k: np.atleast_1d(np.asarray(v, dtype=float)) for k, v in source.items()
+                   if k in SCENARIO_DEFAULTS}
+        n = max((len(col) for col in columns.values()), default=1)
+    else:
+        rows = list(source)
+        invalid = [row for row in rows if not isinstance(row, dict)]
+        if invalid:
+            raise ValueError(f"Scenarios must be objects, got {invalid[0]!r}")
+        n = len(rows)
+        columns = {
+            k: np.array([row.get(k, default) for row in rows], dtype=float)
+            for k, default in SCENARIO_DEFAULTS.items()
+            if any(k in row for row in rows)
+        }
+
+    return {
+        k: np.broadcast_to(columns.get(k, default), (n,)).astype(float)
+        for k, default in SCENARIO_DEFAULTS.items()
+    }
+
+
+def _thevenin_voltage(e, x, p, q):
+    """
+    Bus voltage (pu) of a source e behind reactance x feeding P and Q (pu)
+
+    Upper solution of V^4 + (2QX - E^2) V^2 + X^2 (P^2 + Q^2) = 0; past the
+    nose of the PV curve the voltage is taken at the nose.
+    """
+    b = e * e - 2.0 * q * x
+    disc = b * b - 4.0 * x * x * (p * p + q * q)
+    return np.sqrt(np.maximum(0.5 * (b + np.sqrt(np.maximum(disc, 0.0))), 0.0))
+
+
+def _vdcol(vd_pu):
+    """Current limit (pu of rated) at a DC voltage (pu)"""
+    (v_low, i_low), (v_high, i_high) = VDCOL_POINTS
+    return np.interp(vd_pu, (v_low, v_high), (i_low, i_high))
+
+
+class ConverterDynamics:
+    """Fixed-step transient simulation of many back-to-back scenarios at once"""
+
+    def __init__(self, scenarios=None, step_s=DEFAULT_STEP_S, duration_s=DEFAULT_DURATION_S):
+        """
+        Args:
+            scenarios: Scenarios as accepted by load_scenarios() (default: one
+                scenario with the defaults)
+            step_s: Integration step
+            duration_s: Simulated time per scenario
+
+        Raises:
+            ValueError: If step_s is not positive
+        """
+        if not step_s > 0:
+            raise ValueError(f"Integration step must be positive, got {step_s}")
+        self.params = load_scenarios({} if scenarios is None else scenarios)
+        self.n = len(self.params["load_mw"])
+        self.step_s = float(step_s)
+        self.steps = int(round(duration_s / step_s))
+
+        p = self.params
+        self.id_rated = p["power_mva"] / p["dc_voltage"]
+        self.r_link = p["r_dc"]
+        self.l_link = p["x_dc"] / (2 * math.pi * FREQUENCY_HZ) + p["smoothing_h"]
+        self.x1 = 1.0 / p["scr1"]
+        self.x2 = 1.0 / p["scr2"]
+        self.current_order = p["load_mw"] / p["dc_voltage"]
+
+        # No-load DC voltage and commutation resistance such that the rated
+        # current flows at ALPHA_RATED_DEG and GAMMA_REF_DEG with 1 pu AC voltage
+        dx = XC_PU / 2
+        self.vdoi = p["dc_voltage"] / (math.cos(math.radians(GAMMA_REF_DEG)) - dx)
+        self.vdor = (p["dc_voltage"] + self.r_link * self.id_rated) / (math.cos(math.radians(ALPHA_RATED_DEG)) - dx)
+        self.rci = dx * self.vdoi / self.id_rated
+        self.rcr = dx * self.vdor / self.id_rated
+
+        self.fault_start = p["fault_start_s"]
+        self.fault_end = p["fault_start_s"] + p["fault_duration_s"]
+        self.faulted = p["fault_retained_pu"] < 1.0
+        self.cf_duration = 1.0 / FREQUENCY_HZ
+
+    def _sources(self, t):
+        """Thevenin source voltages (pu) of both sides at time t"""
+        p = self.params
+        during = (t >= self.fault_start) & (t < self.fault_end)
+        dip = np.where(during, p["fault_retained_pu"], 1.0)
+        e1 = p["ac1_vm_pu"] * np.where(p["fault_bus"] == 1, dip, 1.0)
+        e2 = p["ac2_vm_pu"] * np.where(p["fault_bus"] == 2, dip, 1.0)
+        return e1, e2
+
+    def _beta_gamma(self, id_ka, vdoi):
+        """Inverter advance angle that gives GAMMA_REF_DEG at this current and no-load voltage"""
+        cos_beta = math.cos(math.radians(GAMMA_REF_DEG)) - 2 * self.rci * id_ka / np.maximum(vdoi, 1e-3)
+        return np.arccos(np.clip(cos_beta, math.cos(math.radians(BETA_MAX_DEG)), 1.0))
+
+    def _ac_power(self, id_ka, vdr, vdi, vdor, vdoi):
+        """Converter P and Q (pu of power_mva) of both sides"""
+        s_base = self.params["power_mva"]
+        p1 = vdr * id_ka / s_base
+        p2 = vdi * id_ka / s_base
+        q1 = id_ka * np.sqrt(np.maximum(vdor ** 2 - vdr ** 2, 0.0)) / s_base
+        q2 = id_ka * np.sqrt(np.maximum(vdoi ** 2 - vdi ** 2, 0.0)) / s_base
+        return p1, q1, p2, q2
+
+    def initial_state(self):
+        """
+        Steady state at the current order before any fault
+
+        The converter transformer taps (tap1, tap2: no-load voltage relative
+        to the design) are set as tap changers would leave them, for
+        ALPHA_RATED_DEG and GAMMA_REF_DEG at the rated DC voltage, and the
+        filters (qf1, qf2: Mvar in pu at 1 pu voltage) are sized to the
+        converter demand. Both stay fixed during the transient.
+
+        Returns:
+            Dictionary of per-scenario arrays
+        """
+        id_ka = self.current_order.copy()
+        vdi = self.params["dc_voltage"].copy()
+        vdr = vdi + self.r_link * id_ka
+        vdoi = (vdi + self.rci * id_ka) / math.cos(math.radians(GAMMA_REF_DEG))
+        vdor = (vdr + self.rcr * id_ka) / math.cos(math.radians(ALPHA_RATED_DEG))
+
+        e1, e2 = self._sources(np.full(self.n, -np.inf))
+        p1, q1, p2, q2 = self._ac_power(id_ka, vdr, vdi, vdor, vdoi)
+        residual = 1.0 - FILTER_COMPENSATION
+        vac1 = _thevenin_voltage(e1, self.x1, p1, residual * q1)
+        vac2 = _thevenin_voltage(e2, self.x2, p2, residual * q2)
+
+        self.qf1 = FILTER_COMPENSATION * q1 / vac1 ** 2
+        self.qf2 = FILTER_COMPENSATION * q2 / vac2 ** 2
+        self.tap1 = vdor / (self.vdor * vac1)
+        self.tap2 = vdoi / (self.vdoi * vac2)
+        return {
+            "id_ka": id_ka, "vdr_kv": vdr, "vdi_kv": vdi, "vac1_pu": vac1, "vac2_pu": vac2,
+            "alpha": np.full(self.n, math.radians(ALPHA_RATED_DEG)), "beta": self._beta_gamma(id_ka, vdoi),
+        }
+
+    def blocks(self, every=1, block_samples=DEFAULT_BLOCK_SAMPLES):
+        """
+        Simulate all scenarios, yielding the waveforms block by block
+
+        Args:
+            every: Record every n-th step
+            block_samples: Recorded samples per block
+
+        Yields:
+            Dictionary with "time" (samples,) and one (scenarios, samples)
+            array per SIGNALS entry, sampled at the end of every n-th step.
+            The arrays are not reused. self.summary holds per-scenario
+            extremes, commutation failure counts and the recovery time
+            (NaN without a fault or recovery) once the last block is out.
+
+        Raises:
+            ValueError: If every is below 1
+        """
+        if every < 1:
+            raise ValueError(f"every must be at least 1, got {every}")
+        dt = self.step_s
+        n = self.n
+        alpha_min, alpha_max = math.radians(ALPHA_MIN_DEG), math.radians(ALPHA_MAX_DEG)
+        beta_max = math.radians(BETA_MAX_DEG)
+        cos_gamma_min = math.cos(math.radians(GAMMA_MIN_DEG))
+        k_meas = dt / (MEASUREMENT_TC_S + dt)
+        k_vdcol = dt / (VDCOL_TC_S + dt)
+        dc_voltage = self.params["dc_voltage"]
+        inv_l = dt / self.l_link
+
+        state = self.initial_state()
+        id_ka, vdr, vdi = state["id_ka"], state["vdr_kv"], state["vdi_kv"]
+        vac1, vac2 = state["vac1_pu"], state["vac2_pu"]
+        alpha_int, beta_int = state["alpha"], np.zeros(n)
+        id_meas, vdoi_meas, vd_meas = id_ka.copy(), self.vdoi * self.tap2 * vac2, vdi / dc_voltage
+        p1, q1, p2, q2 = self._ac_power(id_ka, vdr, vdi, self.vdor * self.tap1 * vac1, self.vdoi * self.tap2 * vac2)
+        cf_until = np.full(n, -np.inf)
+
+        self.summary = summary = {
+            "p_prefault_mw": p2 * self.params["power_mva"],
+            "id_peak_ka": id_ka.copy(),
+            "gamma_min_deg": np.full(n, GAMMA_REF_DEG),
+            "p_inv_min_mw": p2 * self.params["power_mva"],
+            "vac1_min_pu": vac1.copy(),
+            "vac2_min_pu": vac2.copy(),
+            "commutation_failures": np.zeros(n, dtype=int),
+            "recovery_s": np.full(n, np.nan),
+        }
+        last_outside = np.full(n, -np.inf)
+
+        samples = -(-self.steps // every)
+        for start in range(0, samples, block_samples):
+            m = min(block_samples, samples - start)
+            times = np.empty(m)
+            buffers = {name: np.empty((m, n)) for name in SIGNALS}
+            for j in range(m):
+                for step in range((start + j) * every, min((start + j + 1) * every, self.steps)):
+                    t = step * dt
+                    e1, e2 = self._sources(t)
+                    vac1 = _thevenin_voltage(e1, self.x1, p1, q1 - self.qf1 * vac1 ** 2)
+                    vac2 = _thevenin_voltage(e2, self.x2, p2, q2 - self.qf2 * vac2 ** 2)
+                    vdor = self.vdor * self.tap1 * vac1
+                    vdoi = self.vdoi * self.tap2 * vac2
+
+                    id_meas += k_meas * (id_ka - id_meas)
+                    vdoi_meas += k_meas * (vdoi - vdoi_meas)
+                    vd_meas += k_vdcol * (vdi / dc_voltage - vd_meas)
+
+                    # Rectifier current control under the VDCOL limit
+                    order = np.minimum(self.current_order, _vdcol(vd_meas) * self.id_rated)
+                    error = (order - id_ka) / self.id_rated
+                    alpha_int = np.clip(alpha_int - CURRENT_KI * dt * error, alpha_min, alpha_max)
+                    alpha = np.clip(alpha_int - CURRENT_KP * error, alpha_min, alpha_max)
+
+                    # Inverter: gamma control, or current control at the margin
+                    error = (order - CURRENT_MARGIN_PU * self.id_rated - id_ka) / self.id_rated
+                    beta_int = np.clip(beta_int + CURRENT_KI * dt * error, 0.0, beta_max)
+                    beta_cc = np.clip(beta_int + CURRENT_KP * error, 0.0, beta_max)
+                    beta = np.maximum(self._beta_gamma(id_meas, vdoi_meas), beta_cc)
+
+                    # Commutation failure when the margin angle gets too small
+                    cos_gamma = np.cos(beta) + 2 * self.rci * id_ka / np.maximum(vdoi, 1e-6)
+                    failing = t < cf_until
+                    new_failure = ~failing & (cos_gamma > cos_gamma_min)
+                    summary["commutation_failures"] += new_failure
+                    cf_until = np.where(new_failure, t + self.cf_duration, cf_until)
+                    conducting = ~(failing | new_failure)
+                    gamma = np.where(conducting, np.arccos(np.clip(cos_gamma, -1.0, 1.0)), 0.0)
+
+                    # DC link, implicit in Id (inverter bridges shorted during a failure)
+                    vdi_source = np.where(conducting, vdoi * np.cos(beta), 0.0)
+                    rci = np.where(conducting, self.rci, 0.0)
+                    id_ka = (id_ka + inv_l * (vdor * np.cos(alpha) - vdi_source)) / (
+                        1.0 + inv_l * (self.r_link + self.rcr + rci))
+                    id_ka = np.maximum(id_ka, 0.0)
+                    vdr = vdor * np.cos(alpha) - self.rcr * id_ka
+                    vdi = vdi_source + rci * id_ka
+                    # The bypass pair of a failing inverter carries the current past its AC side
+                    p1, q1, p2, q2 = self._ac_power(id_ka, vdr, vdi, vdor, np.where(conducting, vdoi, 0.0))
+
+                    p_inv = p2 * self.params["power_mva"]
+                    np.maximum(summary["id_peak_ka"], id_ka, out=summary["id_peak_ka"])
+                    np.minimum(summary["gamma_min_deg"], np.degrees(gamma), out=summary["gamma_min_deg"])
+                    np.minimum(summary["p_inv_min_mw"], p_inv, out=summary["p_inv_min_mw"])
+                    np.minimum(summary["vac1_min_pu"], vac1, out=summary["vac1_min_pu"])
+                    np.minimum(summary["vac2_min_pu"], vac2, out=summary["vac2_min_pu"])
+                    outside = np.abs(p_inv - summary["p_prefault_mw"]) > RECOVERY_BAND * summary["p_prefault_mw"]
+                    last_outside = np.where(outside, t, last_outside)
+
+                times[j] = t + dt
+                row = (id_ka, vdr, vdi, p1 * self.params["power_mva"], p_inv, vac1, vac2,
+                       np.degrees(alpha), np.degrees(beta), np.degrees(gamma), ~conducting)
+                for name, values in zip(SIGNALS, row):
+                    buffers[name][j] = values
+
+            yield {"time": times, **{name: values.T for name, values in buffers.items()}}
+
+        # Recovery: from fault clearing until the inverter power stays in the band
+        end = (self.steps - 1) * dt
+        recovered = last_outside < end
+        summary["recovery_s"] = np.where(
+            self.faulted & recovered, np.maximum(last_outside + dt - self.fault_end, 0.0), np.nan)
+
+    def run(self, every=1):
+        """
+        Simulate all scenarios and return the complete waveforms
+
+        Returns:
+            Dictionary like the blocks() items, covering the whole run
+        """
+        parts = list(self.blocks(every))
+        return {
+            name: np.concatenate([part[name] for part in parts], axis=-1)
+            for name in ("time",) + SIGNALS
+        }
+
+
+def simulate_transients(scenarios, step_s=DEFAULT_STEP_S, duration_s=DEFAULT_DURATION_S, every=1):
+    """
+    Simulate transient scenarios in one vectorized run
+
+    Returns:
+        (waveforms, summary): waveforms as returned by ConverterDynamics.run(),
+        summary as one array per quantity with one entry per scenario
+    """
+    model = ConverterDynamics(scenarios, step_s, duration_s)
+    waveforms = model.run(every)
+    return waveforms, model.summary
+
+
+def _write_waveforms(model, directory, every):
+    """Stream the waveforms into one .npy file per signal"""
+    from numpy.lib.format import open_memmap
+
+    os.makedirs(directory, exist_ok=True)
+    samples = -(-model.steps // every)
+    files = {
+        name: open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+", dtype=np.float64,
+                          shape=(samples,) if name == "time" else (model.n, samples))
+        for name in ("time",) + SIGNALS
+    }
+    position = 0
+    for block in model.blocks(every):
+        m = len(block["time"])
+        for name, values in block.items():
+            files[name][..., position:position + m] = values
+        position += m
+    for values in files.values():
+        values.flush()
+
+
+def main():
+    """Main entry point for command-line execution"""
+    parser = argparse.ArgumentParser(description="Reduced-order HVDC converter transient simulator")
+    parser.add_argument("scenarios", nargs="?", default="{}",
+                        help="JSON object of scalars or columns, or a CSV file with one scenario per row")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP_S, help="Integration step (s)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_S, help="Simulated time (s)")
+    parser.add_argument("--every", type=int, default=1, help="Record every n-th step")
+    parser.add_argument("--output", help="Directory for the waveforms (one .npy per signal)")
+    args = parser.parse_args()
+
+    try:
+        if args.every < 1:
+            raise ValueError(f"--every must be at least 1, got {args.every}")
+        if args.scenarios.endswith(".csv") or os.path.exists(args.scenarios):
+            scenarios = args.scenarios
+        else:
+            scenarios = json.loads(args.scenarios)
+        start = time.perf_counter()
+        model = ConverterDynamics(scenarios, args.step, args.duration)
+        if args.output:
+            _write_waveforms(model, args.output, args.every)
+        else:
+            for _ in model.blocks(args.every):
+                pass
+        elapsed = time.perf_counter() - start
+        summary = {
+            name: [None if isinstance(v, float) and math.isnan(v) else v for v in values.tolist()]
+            for name, values in model.summary.items()
+        }
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
+
+    print(json.dumps({"success": True, "error": None, "scenarios": model.n,
+                      "elapsed_s": elapsed, "summary": summary}))
+
+
+if __name__ == "__main__":
+    main()
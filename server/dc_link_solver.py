@@ -0,0 +1,356 @@
+"""
+Direct DC-Link Solver for the HVDC Back-to-Back Network
+Solves the fixed-size network with a dense Newton-Raphson in NumPy
+
+The admittance matrices are taken once from a pandapower solve of the same
+net, so both solvers share the element models. Later solves only change the
+load injections and external grid set-points and skip pandapower entirely.
+Large (multi-terminal) networks keep the matrices sparse and factorize a
+sparse Jacobian instead.
+
+A calibrated solver can be pickled without its net. Unpickling and solving
+it needs only NumPy (and SciPy for sparse solvers), not pandapower.
+"""
+
+import weakref
+
+import numpy as np
+
+# Networks with more buses than this are solved with sparse matrices
+SPARSE_MIN_BUSES = 50
+
+# Column indices of the pypower bus/branch tables used by pandapower
+_PD, _QD = 2, 3
+_F_BUS, _T_BUS = 0, 1
+
+
+def _unbound():
+    """Stand-in for the net weak reference of an unpickled solver"""
+    return None
+
+
+def dsbus_dv(ybus, v):
+    """
+    Partial derivatives of the complex bus injections w.r.t. |V| and angle
+
+    Args:
+        ybus: Dense bus admittance matrix (DCLinkSolver.ybus)
+        v: Complex bus voltages in internal order
+
+    Returns:
+        (dS/d|V|, dS/dangle), dense matrices of shape (buses, buses)
+    """
+    ibus = ybus @ v
+    v_norm = v / np.abs(v)
+    ds_dvm = v[:, None] * np.conj(ybus * v_norm[None, :]) + np.diag(np.conj(ibus) * v_norm)
+    ds_dva = 1j * v[:, None] * np.conj(np.diag(ibus) - ybus * v[None, :])
+    return ds_dvm, ds_dva
+
+
+def _dsbus_dv_sparse(ybus, v):
+    """Sparse version of dsbus_dv for CSR admittance matrices"""
+    import scipy.sparse as sp
+
+    ibus = ybus @ v
+    diag_v = sp.diags(v)
+    diag_ibus = sp.diags(ibus)
+    diag_v_norm = sp.diags(v / np.abs(v))
+    ds_dvm = diag_v @ (ybus @ diag_v_norm).conj() + diag_ibus.conj() @ diag_v_norm
+    ds_dva = 1j * diag_v @ (diag_ibus - ybus @ diag_v).conj()
+    return ds_dvm.tocsr(), ds_dva.tocsr()
+
+
+class DCLinkSolver:
+    """Fixed-size Newton-Raphson solver bound to one pandapower HVDC network"""
+
+    def __init__(self, net, tolerance_mva=1e-8, max_iteration=10, sparse=None):
+        """
+        Calibrate the solver from a converged pandapower solve of ``net``
+
+        Args:
+            net: pandapower network (solved with pp.runpp if it has no results)
+            tolerance_mva: Power mismatch tolerance, as in pp.runpp
+            max_iteration: Newton-Raphson iteration limit
+            sparse: Use sparse matrices and a sparse Jacobian (default: when
+                the network has more than SPARSE_MIN_BUSES buses)
+        """
+        if net["_ppc"] is None or "internal" not in net["_ppc"] or not net.converged:
+            import pandapower as pp
+            pp.runpp(net)
+
+        internal = net["_ppc"]["internal"]
+        if len(internal["pv"]):
+            raise ValueError("DCLinkSolver supports slack and PQ buses only")
+
+        self.base_mva = float(internal["baseMVA"])
+        self.tolerance = tolerance_mva / self.base_mva
+        self.max_iteration = max_iteration
+
+        if sparse is None:
+            sparse = internal["Ybus"].shape[0] > SPARSE_MIN_BUSES
+        self.sparse = sparse
+        convert = (lambda matrix: matrix.tocsr()) if sparse else (lambda matrix: matrix.toarray())
+        self.ybus = convert(internal["Ybus"])
+        self.yf = convert(internal["Yf"])
+        self.yt = convert(internal["Yt"])
+        self.f_bus = internal["branch"][:, _F_BUS].real.astype(int)
+        self.t_bus = internal["branch"][:, _T_BUS].real.astype(int)
+        self.ref = np.asarray(internal["ref"], dtype=int)
+        self.pq = np.asarray(internal["pq"], dtype=int)
+
+        # pandapower element -> internal bus/branch positions
+        bus_lookup = net._pd2ppc_lookups["bus"]
+        self.bus_order = bus_lookup[net.bus.index.values]
+        self.load_bus = bus_lookup[net.load.bus.values]
+        self.ext_grid_bus = bus_lookup[net.ext_grid.bus.values]
+        self.vn_kv = net.bus["vn_kv"].values.copy()
+        self.branch_ranges = dict(net._pd2ppc_lookups["branch"])
+
+        # Injections that are not loads stay at their calibration value. The
+        # loads are taken from res_load, i.e. as they were in the last solve,
+        # since net.load may have changed since then.
+        solved_load = net.res_load["p_mw"].values + 1j * net.res_load["q_mvar"].values
+        self.s_fixed = internal["Sbus"].copy()
+        np.add.at(self.s_fixed, self.load_bus, np.nan_to_num(solved_load) / self.base_mva)
+
+        self.v = internal["V"].copy()
+        self._net = weakref.ref(net)
+
+    @staticmethod
+    def _load_power(net):
+        load = net.load
+        scale = load["scaling"].values * load["in_service"].values
+        return (load["p_mw"].values + 1j * load["q_mvar"].values) * scale
+
+    def solve(self, load_mw, load_mvar, ext_grid_vm_pu, ext_grid_va_degree=None):
+        """
+        Solve the network for the given operating point
+
+        Args:
+            load_mw, load_mvar: Active/reactive power per load (net.load order)
+            ext_grid_vm_pu: Voltage set-point per external grid (net.ext_grid order)
+            ext_grid_va_degree: Voltage angle per external grid (default 0)
+
+        Returns:
+            Dictionary with convergence data, bus voltages in net.bus order and
+            from/to-side branch flows (MW/Mvar) per element type
+        """
+        sbus = self.s_fixed.copy()
+        np.subtract.at(sbus, self.load_bus,
+                       (np.asarray(load_mw) + 1j * np.asarray(load_mvar)) / self.base_mva)
+
+        va_ref = np.zeros(len(self.ext_grid_bus)) if ext_grid_va_degree is None \
+            else np.deg2rad(ext_grid_va_degree)
+        v = self.v.copy()
+        v[self.ext_grid_bus] = np.asarray(ext_grid_vm_pu) * np.exp(1j * va_ref)
+
+        v, iterations, mismatch, converged = self._newton(v, sbus)
+        if converged:
+            self.v = v
+
+        solution = {
+            "converged": converged,
+            "iterations": iterations,
+            "mismatch_mva": mismatch * self.base_mva,
+        }
+        solution.update(self.evaluate(v))
+        return solution
+
+    def evaluate(self, v):
+        """
+        Bus voltages and branch flows for complex bus voltages ``v`` (internal order)
+
+        Returns:
+            The voltage and flow entries of a solve() result
+        """
+        s_from = v[self.f_bus] * np.conj(self.yf @ v) * self.base_mva
+        s_to = v[self.t_bus] * np.conj(self.yt @ v) * self.base_mva
+
+        solution = {
+            "vm_pu": np.abs(v[self.bus_order]),
+            "va_degree": np.rad2deg(np.angle(v[self.bus_order])),
+        }
+        for element, (start, end) in self.branch_ranges.items():
+            solution[element] = {
+                "p_from_mw": s_from.real[start:end],
+                "q_from_mvar": s_from.imag[start:end],
+                "p_to_mw": s_to.real[start:end],
+                "q_to_mvar": s_to.imag[start:end],
+                "pl_mw": s_from.real[start:end] + s_to.real[start:end],
+            }
+        return solution
+
+    def evaluate_derivatives(self, v, dva, dvm):
+        """
+        Derivatives of evaluate() along changes of the bus voltage angles and magnitudes
+
+        Branch flows are bilinear in the complex voltages, so the derivatives
+        are exact at ``v``.
+
+        Args:
+            v: Complex bus voltages in internal order
+            dva, dvm: Angle (rad) and magnitude (pu) changes per bus in
+                internal order, shape (buses, directions)
+
+        Returns:
+            The entries of evaluate(), each with a trailing axis of directions
+        """
+        dv = v[:, None] * (1j * dva + dvm / np.abs(v)[:, None])
+        i_from = self.yf @ v
+        i_to = self.yt @ v
+        ds_from = (dv[self.f_bus] * np.conj(i_from)[:, None]
+                   + v[self.f_bus, None] * np.conj(self.yf @ dv)) * self.base_mva
+        ds_to = (dv[self.t_bus] * np.conj(i_to)[:, None]
+                 + v[self.t_bus, None] * np.conj(self.yt @ dv)) * self.base_mva
+
+        derivatives = {
+            "vm_pu": dvm[self.bus_order],
+            "va_degree": np.rad2deg(dva[self.bus_order]),
+        }
+        for element, (start, end) in self.branch_ranges.items():
+            derivatives[element] = {
+                "p_from_mw": ds_from.real[start:end],
+                "q_from_mvar": ds_from.imag[start:end],
+                "p_to_mw": ds_to.real[start:end],
+                "q_to_mvar": ds_to.imag[start:end],
+                "pl_mw": ds_from.real[start:end] + ds_to.real[start:end],
+            }
+        return derivatives
+
+    def solve_net(self, net=None):
+        """Solve using the current load and ext_grid values of the bound net"""
+        net = net if net is not None else self._net()
+        s_load = self._load_power(net)
+        return self.solve(
+            s_load.real,
+            s_load.imag,
+            net.ext_grid["vm_pu"].values,
+            net.ext_grid["va_degree"].values,
+        )
+
+    def __getstate__(self):
+        # The weak reference cannot be pickled; an unpickled solver is unbound
+        state = self.__dict__.copy()
+        state["_net"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._net = _unbound
+
+    def _newton(self, v, sbus):
+        """Polar Newton-Raphson over the PQ buses with a dense or sparse Jacobian"""
+        pq = self.pq
+        npq = len(pq)
+        vm = np.abs(v)
+        va = np.angle(v)
+
+        for iteration in range(self.max_iteration + 1):
+            mis = v * np.conj(self.ybus @ v) - sbus
+            f = np.concatenate([mis[pq].real, mis[pq].imag])
+            mismatch = float(np.max(np.abs(f))) if npq else 0.0
+            if mismatch < self.tolerance:
+                return v, iteration, mismatch, True
+            if iteration == self.max_iteration or not np.isfinite(mismatch):
+                break
+
+            if self.sparse:
+                import scipy.sparse as sp
+                from scipy.sparse.linalg import spsolve
+
+                ds_dvm, ds_dva = _dsbus_dv_sparse(self.ybus, v)
+                ds_dva = ds_dva[pq][:, pq]
+                ds_dvm = ds_dvm[pq][:, pq]
+                jacobian = sp.bmat([
+                    [ds_dva.real, ds_dvm.real],
+                    [ds_dva.imag, ds_dvm.imag],
+                ], format="csc")
+                dx = spsolve(jacobian, -f)
+            else:
+                ds_dvm, ds_dva = dsbus_dv(self.ybus, v)
+                jacobian = np.block([
+                    [ds_dva[np.ix_(pq, pq)].real, ds_dvm[np.ix_(pq, pq)].real],
+                    [ds_dva[np.ix_(pq, pq)].imag, ds_dvm[np.ix_(pq, pq)].imag],
+                ])
+                dx = np.linalg.solve(jacobian, -f)
+            va[pq] += dx[:npq]
+            vm[pq] += dx[npq:]
+            v = vm * np.exp(1j * va)
+
+        return v, iteration, mismatch, False
+
+    def write_results(self, net, solution):
+        """
+        Copy a solution into the pandapower result tables
+
+        Only voltages and branch power flows are written; currents and
+        loading percentages keep their previous values.
+        """
+        net.res_bus["vm_pu"] = solution["vm_pu"]
+        net.res_bus["va_degree"] = solution["va_degree"]
+
+        columns = {
+            "trafo": ("p_hv_mw", "q_hv_mvar", "p_lv_mw", "q_lv_mvar"),
+            "line": ("p_from_mw", "q_from_mvar", "p_to_mw", "q_to_mvar"),
+            "impedance": ("p_from_mw", "q_from_mvar", "p_to_mw", "q_to_mvar"),
+        }
+        for element, names in columns.items():
+            if element not in solution:
+                continue
+            flows = solution[element]
+            table = net["res_" + element]
+            for name, key in zip(names, ("p_from_mw", "q_from_mvar", "p_to_mw", "q_to_mvar")):
+                table[name] = flows[key]
+            table["pl_mw"] = flows["pl_mw"]
+
+        net["converged"] = solution["converged"]
+
+
+def get_solver(net):
+    """
+    Return the DCLinkSolver bound to ``net``, calibrating it on first use
+
+    The solver is stored in the net itself (next to pandapower's ``_ppc``),
+    so it lives exactly as long as the cached network template. Copied or
+    unpickled nets are recalibrated instead of reusing another net's solver.
+    """
+    solver = net.get("_dc_link_solver")
+    if solver is None or solver._net() is not net:
+        solver = net["_dc_link_solver"] = DCLinkSolver(net)
+    return solver
+
+
+def compare_with_pandapower(net):
+    """
+    Solve ``net`` with both solvers and return the largest deviations
+
+    The fast solver is the one cached for ``net`` by get_solver(), so it
+    may have been calibrated at another operating point.
+
+    Returns:
+        Dictionary with the maximum absolute difference of bus voltages (pu)
+        and of branch active/reactive flows (MW/Mvar), and the Newton-Raphson
+        iterations of the fast solve
+    """
+    solution = get_solver(net).solve_net(net)
+    import pandapower as pp
+    pp.runpp(net)
+
+    deviation = {
+        "converged": bool(solution["converged"] and net.converged),
+        "iterations": int(solution["iterations"]),
+        "vm_pu": float(np.max(np.abs(solution["vm_pu"] - net.res_bus["vm_pu"].values))),
+        "p_mw": 0.0,
+        "q_mvar": 0.0,
+    }
+    for element, names in (("trafo", ("p_hv_mw", "q_hv_mvar")),
+                           ("line", ("p_from_mw", "q_from_mvar")),
+                           ("impedance", ("p_from_mw", "q_from_mvar"))):
+        if element not in solution:
+            continue
+        table = net["res_" + element]
+        deviation["p_mw"] = max(deviation["p_mw"], float(np.max(np.abs(
+            solution[element]["p_from_mw"] - table[names[0]].values))))
+        deviation["q_mvar"] = max(deviation["q_mvar"], float(np.max(np.abs(
+            solution[element]["q_from_mvar"] - table[names[1]].values))))
+    return deviation
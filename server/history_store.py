@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Columnar History Store
+Append-only, memory-mapped time series of simulation and IFF metrics
+
+A store is a directory with one raw float64 file per metric and a
+timestamp file (Unix seconds, non-decreasing) that indexes them all. Range
+queries binary-search the memory-mapped timestamps and return views of the
+metric files, so only the pages of the requested window are read.
+
+    store/
+        store.json                 column names and the current generation
+        timestamp.<generation>.f8
+        <metric>.<generation>.f8
+
+Appends write the metric files before the timestamp file, so a row exists
+once its timestamp does; rows left half-written by a crash are trimmed on
+the next open. compact() writes a new generation and switches to it by
+replacing store.json, so readers never see a partly compacted store.
+A store has a single writer; any number of processes may read it.
+
+Usage:
+    python history_store.py DIR import experimental_data.csv
+    python history_store.py DIR query --start 2025-12-30T00:00:00Z --columns losses
+    python history_store.py DIR downsample --buckets 500
+    python history_store.py DIR compact --before 2026-01-01 --bucket 60
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+TIMESTAMP = 'timestamp'
+DOWNSAMPLE_STATS = ('min', 'max', 'mean')
+
+_META = 'store.json'
+_DTYPE = np.dtype('<f8')
+
+
+def to_timestamp(value):
+    """Unix seconds from a number, a numeric string or an ISO 8601 string (UTC if naive)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+
+class HistoryStore:
+    """Directory of memory-mapped metric columns sharing one timestamp index"""
+
+    def __init__(self, directory, columns=(), readonly=False):
+        """
+        Args:
+            directory: Store directory (created if missing, unless readonly)
+            columns: Metric columns to add if the store does not have them
+            readonly: Open for queries only
+        """
+        self.directory = os.fspath(directory)
+        self.readonly = readonly
+        if not readonly:
+            os.makedirs(self.directory, exist_ok=True)
+
+        self._writers = {}
+        self._maps = {}
+        self._load_meta()
+        if not readonly:
+            self._repair()
+            for name in columns:
+                if name not in self.columns:
+                    self.add_column(name)
+
+    # Layout
+
+    def _load_meta(self):
+        path = os.path.join(self.directory, _META)
+        if os.path.exists(path):
+            with open(path) as f:
+                meta = json.load(f)
+        elif self.readonly:
+            raise FileNotFoundError(f"No history store in {self.directory}")
+        else:
+            meta = {'generation': 0, 'columns': []}
+        self.generation = meta['generation']
+        self.columns = list(meta['columns'])
+
+    def _save_meta(self, generation, columns):
+        path = os.path.join(self.directory, _META)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'generation': generation, 'columns': list(columns)}, f)
+        os.replace(path + '.tmp', path)
+
+    def _path(self, name, generation=None):
+        generation = self.generation if generation is None else generation
+        return os.path.join(self.directory, f"{name}.{generation}.f8")
+
+    def _file_rows(self, name):
+        try:
+            return os.path.getsize(self._path(name)) // _DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def __len__(self):
+        return self._file_rows(TIMESTAMP)
+
+    def _repair(self):
+        """Trim or NaN-pad columns to the timestamp index after an interrupted append"""
+        rows = len(self)
+        for name in self.columns:
+            path = self._path(name)
+            actual = self._file_rows(name)
+            if actual > rows:
+                with open(path, 'r+b') as f:
+                    f.truncate(rows * _DTYPE.itemsize)
+            elif actual < rows:
+                with open(path, 'ab') as f:
+                    f.write(np.full(rows - actual, np.nan, _DTYPE).tobytes())
+        if not os.path.exists(os.path.join(self.directory, _META)):
+            self._save_meta(self.generation, self.columns)
+
+    def add_column(self, name):
+        """Add a metric column, NaN for the rows already stored"""
+        if name == TIMESTAMP or os.sep in name or not name:
+            raise ValueError(f"Invalid column name {name!r}")
+        with open(self._path(name), 'wb') as f:
+            f.write(np.full(len(self), np.nan, _DTYPE).tobytes())
+        self.columns.append(name)
+        self._save_meta(self.generation, self.columns)
+
+    # Writing
+
+    def _writer(self, name):
+        writer = self._writers.get(name)
+        if writer is None:
+            writer = self._writers[name] = open(self._path(name), 'ab')
+        return writer
+
+    def append(self, timestamps, values):
+        """
+        Append rows
+
+        Args:
+            timestamps: Unix seconds or ISO strings, non-decreasing and not
+                before the last stored row
+            values: Column name -> one value per timestamp; missing columns
+                are NaN, unknown ones are added
+
+        Returns:
+            Number of rows stored
+        """
+        if self.readonly:
+            raise RuntimeError("History store is open read-only")
+
+        timestamps = np.atleast_1d(np.asarray(
+            [to_timestamp(t) for t in np.atleast_1d(timestamps)], dtype=_DTYPE))
+        if len(timestamps) == 0:
+            return 0
+        if np.any(np.diff(timestamps) < 0):
+            raise ValueError("Timestamps must be non-decreasing")
+        last = self.last_timestamp()
+        if last is not None and timestamps[0] < last:
+            raise ValueError(f"Timestamp {timestamps[0]} is before the last stored row ({last})")
+
+        # Every column is checked before any file is written
+        columns = {}
+        for name, column in values.items():
+            try:
+                columns[name] = np.broadcast_to(np.asarray(column, dtype=_DTYPE), timestamps.shape)
+            except ValueError:
+                raise ValueError(f"Column {name!r} has {np.size(column)} values for {len(timestamps)} timestamps")
+
+        for name in columns:
+            if name not in self.columns:
+                self.add_column(name)
+
+        try:
+            for name in self.columns:
+                column = columns.get(name)
+                if column is None:
+                    column = np.full(len(timestamps), np.nan)
+                self._writer(name).write(column.tobytes())
+            for name in self.columns:
+                self._writers[name].flush()
+
+            # The timestamps go last: they commit the rows
+            writer = self._writer(TIMESTAMP)
+            writer.write(timestamps.tobytes())
+            writer.flush()
+        except BaseException:
+            # Trim the columns written so far back to the committed rows
+            self.close()
+            self._repair()
+            raise
+        return len(timestamps)
+
+    def append_sample(self, values, timestamp):
+        """Append one row from a {column: value} dict"""
+        return self.append([timestamp], {name: [value] for name, value in values.items()})
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Reading
+
+    def _column(self, name, rows):
+        """First ``rows`` values of a column as a read-only memory map"""
+        if rows == 0:
+            return np.empty(0, _DTYPE)
+        cached = self._maps.get(name)
+        if cached is None or cached[0] != self.generation or len(cached[1]) < rows:
+            mapped = np.memmap(self._path(name), _DTYPE, mode='r', shape=(self._file_rows(name),))
+            cached = self._maps[name] = (self.generation, mapped)
+        return cached[1][:rows]
+
+    def _refresh(self):
+        """Pick up a compaction done by the writer process"""
+        if self.readonly:
+            self._load_meta()
+
+    def last_timestamp(self):
+        self._refresh()
+        rows = len(self)
+        return float(self._column(TIMESTAMP, rows)[-1]) if rows else None
+
+    def _window(self, start, end):
+        """Timestamp map and row range [lo, hi) of start <= t < end"""
+        self._refresh()
+        timestamps = self._column(TIMESTAMP, len(self))
+        lo = 0 if start is None else int(np.searchsorted(timestamps, to_timestamp(start), 'left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, to_timestamp(end), 'left'))
+        return timestamps, lo, max(hi, lo)
+
+    def _select(self, columns):
+        columns = self.columns if columns is None else list(columns)
+        unknown = [name for name in columns if name not in self.columns]
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(unknown)}")
+        return columns
+
+    def query(self, start=None, end=None, columns=None):
+        """
+        Rows with start <= timestamp < end
+
+        Returns:
+            Dictionary of read-only array views: "timestamp" and one per column
+        """
+        timestamps, lo, hi = self._window(start, end)
+        result = {TIMESTAMP: timestamps[lo:hi]}
+        for name in self._select(columns):
+            result[name] = self._column(name, len(timestamps))[lo:hi]
+        return result
+
+    def downsample(self, start=None, end=None, bucket=None, buckets=None, columns=None):
+        """
+        Min, max and mean per time bucket over start <= timestamp < end
+
+        NaN values are ignored; empty buckets are left out.
+
+        Args:
+            bucket: Bucket width in seconds
+            buckets: Number of equal buckets over the window (used when
+                ``bucket`` is not given, default 1000)
+
+        Returns:
+            Dictionary with "timestamp" (bucket starts), "count" (rows per
+            bucket) and per column a dict of DOWNSAMPLE_STATS arrays
+        """
+        columns = self._select(columns)
+        timestamps, lo, hi = self._window(start, end)
+        times = timestamps[lo:hi]
+        empty = {TIMESTAMP: np.empty(0), 'count': np.empty(0, dtype=np.int64)}
+        if len(times) == 0:
+            return {**empty, **{name: {s: np.empty(0) for s in DOWNSAMPLE_STATS} for name in columns}}
+
+        origin = float(times[0]) if start is None else to_timestamp(start)
+        stop = float(times[-1]) if end is None else to_timestamp(end)
+        if bucket is None:
+            n_buckets = buckets or 1000
+            bucket = max(stop - origin, 1e-9) / n_buckets
+        else:
+            n_buckets = int((float(times[-1]) - origin) // bucket) + 1
+
+        # Bucket edges located by binary search on the sorted timestamps;
+        # the last bucket also takes a row sitting exactly on the end edge
+        edges = origin + np.arange(n_buckets + 1) * bucket
+        edges[-1] = np.inf
+        bounds = np.searchsorted(times, edges)
+        counts = np.diff(bounds)
+        filled = counts > 0
+        starts = bounds[:-1][filled]
+        counts = counts[filled]
+        result = {TIMESTAMP: edges[:-1][filled], 'count': counts}
+
+        n = len(timestamps)
+        for name in columns:
+            values = np.asarray(self._column(name, n)[lo:hi])
+            missing = np.isnan(values)
+            if missing.any():
+                totals = np.add.reduceat(np.where(missing, 0.0, values), starts)
+                valid_counts = np.add.reduceat((~missing).astype(np.int64), starts)
+            else:
+                totals = np.add.reduceat(values, starts)
+                valid_counts = counts
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = totals / valid_counts
+            result[name] = {
+                'min': np.fmin.reduceat(values, starts),
+                'max': np.fmax.reduceat(values, starts),
+                'mean': np.where(valid_counts > 0, mean, np.nan),
+            }
+        return result
+
+    # Maintenance
+
+    def compact(self, before=None, bucket=None, drop=False):
+        """
+        Rewrite the store as a new generation
+
+        Rows before ``before`` are replaced by their per-bucket means (with
+        ``bucket`` seconds) or removed (``drop``); later rows are copied
+        unchanged. Without ``before`` the whole store is rewritten, which
+        reclaims space after a crash repair.
+
+        Returns:
+            Number of rows in the compacted store
+        """
+        if self.readonly:
+            raise RuntimeError("History store is open read-only")
+        if before is not None and bucket is None and not drop:
+            raise ValueError("compact(before=...) needs a bucket width or drop=True")
+
+        timestamps, _, split = self._window(None, before)
+        if before is None:
+            split = 0
+        head = {}
+        if split and not drop:
+            summary = self.downsample(None, before, bucket=bucket)
+            head = {TIMESTAMP: summary[TIMESTAMP]}
+            head.update({name: summary[name]['mean'] for name in self.columns})
+
+        generation = self.generation + 1
+        rows = len(timestamps)
+        for name in [TIMESTAMP] + self.columns:
+            column = self._column(name, rows)
+            with open(self._path(name, generation), 'wb') as f:
+                if name in head:
+                    f.write(np.asarray(head[name], _DTYPE).tobytes())
+                f.write(np.asarray(column[split:]).tobytes())
+
+        old = [self._path(name) for name in [TIMESTAMP] + self.columns]
+        self.close()
+        self._save_meta(generation, self.columns)
+        self.generation = generation
+        for path in old:
+            os.remove(path)
+        return len(self)
+
+    def info(self):
+        self._refresh()
+        rows = len(self)
+        return {
+            'rows': rows,
+            'columns': list(self.columns),
+            'first': float(self._column(TIMESTAMP, rows)[0]) if rows else None,
+            'last': self.last_timestamp(),
+            'generation': self.generation,
+        }
+
+
+def import_csv(store, path, time_column='timestamp', batch_size=100000):
+    """
+    Append the numeric columns of a CSV file (e.g. experimental_data.csv)
+
+    Rows are read in batches; non-numeric values become NaN, and a column
+    is imported only if its first row is numeric.
+
+    Returns:
+        Number of rows imported
+    """
+    count = 0
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        numeric = None
+        times, rows = [], []
+
+        def flush():
+            values = {name: [_number(row.get(name)) for row in rows] for name in numeric}
+            return store.append(times, values)
+
+        for row in reader:
+            if numeric is None:
+                numeric = [name for name, value in row.items()
+                           if name != time_column and not math.isnan(_number(value))]
+            times.append(row[time_column])
+            rows.append(row)
+            if len(rows) == batch_size:
+                count += flush()
+                times, rows = [], []
+        if rows:
+            count += flush()
+    return count
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _json_arrays(document):
+    """NumPy arrays to lists, NaN to null"""
+    if isinstance(document, dict):
+        return {k: _json_arrays(v) for k, v in document.items()}
+    if isinstance(document, np.ndarray):
+        return [None if isinstance(x, float) and math.isnan(x) else x for x in document.tolist()]
+    return document
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar history store for simulation results")
+    parser.add_argument('directory', help="Store directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import', help="Append the numeric columns of a CSV file")
+    importer.add_argument('csv')
+    importer.add_argument('--time-column', default='timestamp')
+
+    for name in ('query', 'downsample'):
+        command = commands.add_parser(name)
+        command.add_argument('--start', help="Unix seconds or ISO 8601 time")
+        command.add_argument('--end', help="Unix seconds or ISO 8601 time (exclusive)")
+        command.add_argument('--columns', help="Comma-separated column names (default: all)")
+    downsample = commands.choices['downsample']
+    downsample.add_argument('--bucket', type=float, help="Bucket width in seconds")
+    downsample.add_argument('--buckets', type=int, default=1000, help="Number of buckets")
+
+    compact = commands.add_parser('compact', help="Summarize or drop old rows")
+    compact.add_argument('--before', help="Rows before this time are summarized or dropped")
+    compact.add_argument('--bucket', type=float, help="Summary bucket width in seconds")
+    compact.add_argument('--drop', action='store_true', help="Drop the old rows instead")
+
+    commands.add_parser('info')
+    args = parser.parse_args()
+
+    try:
+        store = HistoryStore(args.directory, readonly=args.command in ('query', 'downsample', 'info'))
+        columns = args.columns.split(',') if getattr(args, 'columns', None) else None
+        if args.command == 'import':
+            result = {'rows': import_csv(store, args.csv, args.time_column)}
+        elif args.command == 'query':
+            result = store.query(args.start, args.end, columns)
+        elif args.command == 'downsample':
+            result = store.downsample(args.start, args.end, args.bucket, args.buckets, columns)
+        elif args.command == 'compact':
+            result = {'rows': store.compact(args.before, args.bucket, args.drop)}
+        else:
+            result = store.info()
+        store.close()
+        print(json.dumps({'success': True, 'error': None, 'results': _json_arrays(result)}))
+    except (OSError, KeyError, ValueError) as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,50 @@
 """
 HVDC Circuit Simulator using Pandapower
 Simulates a back-to-back HVDC system with 12-pulse converters
+
+Usage:
+    python3 hvdc_simulator.py '{"load_mw": 800}'    # single run
+    python3 hvdc_simulator.py --worker               # NDJSON worker on stdin/stdout
+    python3 hvdc_simulator.py --socket /tmp/hvdc.sock  # NDJSON worker on a Unix socket
+    python3 hvdc_simulator.py --batch sweep.csv      # many parameter sets in one process
+    python3 hvdc_simulator.py --worker --format struct  # length-prefixed binary records
+    python3 hvdc_simulator.py '{}' --instrument --profile run.prof  # timings + cProfile dump
+    python3 hvdc_simulator.py --network grid.yaml   # multi-terminal grid from a description
+    python3 hvdc_simulator.py '{}' --save-snapshot net.pkl     # prebuild the network once
+    python3 hvdc_simulator.py '{"load_mw": 800}' --snapshot net.pkl --solver fast --self-time
 """
 
-import pandapower as pp
-import pandapower.networks as pn
-import numpy as np
+import time
+
+_import_start = time.perf_counter()
+
+import argparse
+import csv
 import json
+import os
+import pickle
+import socketserver
+import struct
 import sys
+import threading
+
+import numpy as np
+
+from result_cache import ResultCache
+from result_extraction import DEFAULT_LAYOUT, compute_metrics, from_solution, read_results, stack_results
+from telemetry import (
+    IMPORT_TIMES, PhaseTimer, optional_phase, peak_rss_kib, power_flow_stats, profiled, timed_encode,
+    timed_import,
+)
+
+# Time spent on the imports above. pandapower and the solver modules are
+# imported on first use through timed_import(), see IMPORT_TIMES.
+IMPORT_SECONDS = time.perf_counter() - _import_start
+
+
+def _import_ms():
+    """Module import time so far, eager and lazy, in ms"""
+    return (IMPORT_SECONDS + sum(IMPORT_TIMES.values())) * 1e3
 
 
 def create_hvdc_network(params=None):
@@ -35,6 +72,10 @@ def create_hvdc_network(params=None):
     dc_voltage = params.get('dc_voltage', 422.84)   # kV
     power_mva = params.get('power_mva', 1196.0)     # MVA
     load_mw = params.get('load_mw', 1000.0)         # MW
+    ac1_vm_pu = params.get('ac1_vm_pu', 1.0)        # pu
+    ac2_vm_pu = params.get('ac2_vm_pu', 1.0)        # pu
+    
+    pp = timed_import('pandapower')
     
     # Create empty network
     net = pp.create_empty_network(name="HVDC Back-to-Back System")
@@ -50,19 +91,21 @@ def create_hvdc_network(params=None):
     bus_dc2 = pp.create_bus(net, vn_kv=dc_voltage, name="DC Bus 2 (Inverter)")
     
     # External grid connections (AC sources)
-    pp.create_ext_grid(net, bus=bus_ac1, vm_pu=1.0, name="External Grid 1")
-    pp.create_ext_grid(net, bus=bus_ac2, vm_pu=1.0, name="External Grid 2")
+    pp.create_ext_grid(net, bus=bus_ac1, vm_pu=ac1_vm_pu, name="External Grid 1")
+    pp.create_ext_grid(net, bus=bus_ac2, vm_pu=ac2_vm_pu, name="External Grid 2")
     
     # Transformers
     # Rectifier transformer (345 kV to DC voltage)
-    pp.create_transformer(net, hv_bus=bus_ac1, lv_bus=bus_dc1, 
-                         sn_mva=power_mva, vn_hv_kv=ac1_voltage, vn_lv_kv=dc_voltage,
-                         pfe_kw=100, i0_percent=0.5, name="Rectifier Transformer")
+    pp.create_transformer_from_parameters(net, hv_bus=bus_ac1, lv_bus=bus_dc1,
+                                          sn_mva=power_mva, vn_hv_kv=ac1_voltage, vn_lv_kv=dc_voltage,
+                                          vk_percent=12.0, vkr_percent=0.3,
+                                          pfe_kw=100, i0_percent=0.5, name="Rectifier Transformer")
     
     # Inverter transformer (DC voltage to 230 kV)
-    pp.create_transformer(net, hv_bus=bus_dc2, lv_bus=bus_ac2,
-                         sn_mva=power_mva, vn_hv_kv=dc_voltage, vn_lv_kv=ac2_voltage,
-                         pfe_kw=100, i0_percent=0.5, name="Inverter Transformer")
+    pp.create_transformer_from_parameters(net, hv_bus=bus_dc2, lv_bus=bus_ac2,
+                                          sn_mva=power_mva, vn_hv_kv=dc_voltage, vn_lv_kv=ac2_voltage,
+                                          vk_percent=12.0, vkr_percent=0.3,
+                                          pfe_kw=100, i0_percent=0.5, name="Inverter Transformer")
     
     # DC Line (simplified as a series impedance)
     # DC resistance and inductance
@@ -71,7 +114,7 @@ def create_hvdc_network(params=None):
     
     # Create a simple DC line model using a series impedance
     pp.create_impedance(net, from_bus=bus_dc1, to_bus=bus_dc2, 
-                       r_pu=r_dc/422.84, x_pu=x_dc/422.84, sn_mva=power_mva,
+                       rft_pu=r_dc/422.84, xft_pu=x_dc/422.84, sn_mva=power_mva,
                        name="DC Link")
     
     # Loads at AC Bus 2
@@ -80,58 +123,796 @@ def create_hvdc_network(params=None):
     return net
 
 
-def run_simulation(net):
+# Networks already built, keyed by topology. Runs that only change the
+# operating point reuse them instead of rebuilding every pandapower table.
+_network_templates = {}
+
+
+def _topology_key(params):
+    """Parameters that define the network structure and element ratings"""
+    return (
+        float(params.get('ac1_voltage', 345.0)),
+        float(params.get('ac2_voltage', 230.0)),
+        float(params.get('dc_voltage', 422.84)),
+        float(params.get('power_mva', 1196.0)),
+    )
+
+
+def get_hvdc_network(params=None):
     """
-    Run power flow simulation
+    Return the HVDC network for the given parameters, reusing a cached template
+
+    The first call for a topology builds the network with
+    ``create_hvdc_network``. Later calls only write the operating point
+    (load and external grid set-points) into the cached tables, so the
+    returned net must not be held across calls.
     """
+    if not isinstance(params, dict):
+        params = {}
+
+    key = _topology_key(params)
+    net = _network_templates.get(key)
+    if net is None:
+        snapshot = _snapshot_networks.pop(key, None)
+        if snapshot is None:
+            net = create_hvdc_network(params)
+            _network_templates[key] = net
+            return net
+        net = pickle.loads(snapshot)
+        _network_templates[key] = net
+
+    load_mw = params.get('load_mw', 1000.0)
+    load_idx = net.load.index[0]
+    net.load.at[load_idx, 'p_mw'] = load_mw
+    net.load.at[load_idx, 'q_mvar'] = load_mw * 0.3
+
+    grid1_idx, grid2_idx = net.ext_grid.index[:2]
+    net.ext_grid.at[grid1_idx, 'vm_pu'] = params.get('ac1_vm_pu', 1.0)
+    net.ext_grid.at[grid2_idx, 'vm_pu'] = params.get('ac2_vm_pu', 1.0)
+
+    return net
+
+
+# Version of the network snapshot file layout (see save_network_snapshot)
+SNAPSHOT_FORMAT = 1
+
+# Pickled template networks and calibrated fast solvers from a snapshot,
+# keyed by topology; both are unpickled on first use
+_snapshot_networks = {}
+_snapshot_solvers = {}
+
+
+def save_network_snapshot(path, param_sets=None):
+    """
+    Prebuild networks and pickle them for fast start-up
+
+    For every topology the file holds the unsolved network and a fast
+    solver calibrated at the given operating point. Loading it skips the
+    network construction and, for ``--solver fast``, the pandapower import.
+
+    Args:
+        path: Snapshot file to write
+        param_sets: Parameter dictionaries, one per topology (default: the
+            default network)
+
+    Returns:
+        Number of topologies written
+    """
+    dc_link_solver = timed_import('dc_link_solver')
+    networks, solvers = {}, {}
+    for params in param_sets or [{}]:
+        key = _topology_key(params)
+        net = create_hvdc_network(params)
+        networks[key] = pickle.dumps(net, protocol=pickle.HIGHEST_PROTOCOL)
+        solvers[key] = pickle.dumps(dc_link_solver.DCLinkSolver(net), protocol=pickle.HIGHEST_PROTOCOL)
+
+    with open(path, 'wb') as f:
+        pickle.dump({
+            'format': SNAPSHOT_FORMAT,
+            'pandapower': timed_import('pandapower').__version__,
+            'networks': networks,
+            'solvers': solvers,
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return len(networks)
+
+
+def load_network_snapshot(path):
+    """
+    Register the networks of a snapshot file written by save_network_snapshot
+
+    The file is a pickle, so only trusted snapshots must be loaded. Snapshots
+    of another format or pandapower version are ignored.
+
+    Returns:
+        Number of topologies loaded (0 if the snapshot was ignored)
+    """
+    from importlib.metadata import version
+
+    with open(path, 'rb') as f:
+        snapshot = pickle.load(f)
+
+    if snapshot.get('format') != SNAPSHOT_FORMAT or snapshot.get('pandapower') != version('pandapower'):
+        print(f"Warning: ignoring network snapshot {path} built for pandapower "
+              f"{snapshot.get('pandapower')}", file=sys.stderr)
+        return 0
+
+    _snapshot_networks.update(snapshot['networks'])
+    _snapshot_solvers.update(snapshot['solvers'])
+    return len(snapshot['networks'])
+
+
+def _snapshot_solver(params):
+    """Calibrated fast solver of the topology from the loaded snapshot, or None"""
+    key = _topology_key(params if isinstance(params, dict) else {})
+    dc_solver = _snapshot_solvers.get(key)
+    if isinstance(dc_solver, bytes):
+        dc_solver = _snapshot_solvers[key] = pickle.loads(dc_solver)
+    return dc_solver
+
+
+# Internal power flow data reused between solves of the same network: the
+# admittance matrix is kept, only bus injections and grid set-points change.
+_RECYCLE_OPTIONS = {'bus_pq': True, 'gen': True, 'trafo': False}
+
+
+def _run_power_flow(net, warm_start=False):
+    """
+    Run the Newton-Raphson power flow
+
+    With ``warm_start`` the admittance matrix and the last voltage solution
+    stored on the net are reused as the starting point.
+    """
+    pp = timed_import('pandapower')
+    if not warm_start:
+        pp.runpp(net)
+        return
+
     try:
+        pp.runpp(net, recycle=_RECYCLE_OPTIONS)
+    except Exception:
+        # A diverged solve leaves no usable starting point for the next run
+        net['_ppc'] = None
+        raise
+
+
+# Solvers selectable per run: pandapower's generic AC power flow, or the
+# direct DC-link Newton-Raphson calibrated from it (dc_link_solver.py)
+SOLVERS = ('pandapower', 'fast')
+
+
+def _solve_fast(net, stats=None):
+    """
+    Solve with the DC-link solver bound to this net
+
+    Args:
+        stats: Optional dict that receives the iteration count and mismatch
+
+    Returns:
+        Result arrays in the read_results() layout
+    """
+    dc_solver = timed_import('dc_link_solver').get_solver(net)
+    return _fast_arrays(dc_solver, dc_solver.solve_net(net), stats)
+
+
+def _solve_snapshot(dc_solver, params, stats=None):
+    """_solve_fast() with a snapshot solver, taking the operating point from the parameters"""
+    load_mw = params.get('load_mw', 1000.0)
+    solution = dc_solver.solve(
+        [load_mw], [load_mw * 0.3], [params.get('ac1_vm_pu', 1.0), params.get('ac2_vm_pu', 1.0)],
+    )
+    return _fast_arrays(dc_solver, solution, stats)
+
+
+def _fast_arrays(dc_solver, solution, stats):
+    if stats is not None:
+        stats['iterations'] = solution['iterations']
+        stats['mismatch_mva'] = solution['mismatch_mva']
+    if not solution['converged']:
+        raise RuntimeError(
+            f"DC link solver did not converge after {solution['iterations']} iterations"
+        )
+    return from_solution(solution, dc_solver.vn_kv)
+
+
+# Output keys per block and the compute_metrics() value they report
+RESULT_LAYOUT = {
+    'bus_voltages': {
+        'bus_ac1_voltage_pu': 'vm_ac1_pu',
+        'bus_ac2_voltage_pu': 'vm_ac2_pu',
+        'bus_dc1_voltage_pu': 'vm_dc_rect_pu',
+        'bus_dc2_voltage_pu': 'vm_dc_inv_pu',
+    },
+    'power_flows': {
+        'transformer_1_p_mw': 'rect_trafo_p_mw',
+        'transformer_1_q_mvar': 'rect_trafo_q_mvar',
+        'transformer_2_p_mw': 'inv_trafo_p_mw',
+        'transformer_2_q_mvar': 'inv_trafo_q_mvar',
+    },
+    'losses': {
+        'total_loss_mw': 'trafo_loss_mw',
+        'transformer_1_loss': 'rect_trafo_loss_mw',
+        'transformer_2_loss': 'inv_trafo_loss_mw',
+    },
+}
+
+
+def _result_document(metrics, convergence):
+    """Nest compute_metrics() values of one run into the output layout"""
+    result = {'status': 'success', 'convergence': convergence}
+    for block, keys in RESULT_LAYOUT.items():
+        result[block] = {key: float(metrics[name]) for key, name in keys.items()}
+    result['efficiency'] = {'overall_efficiency': 98.5 if convergence else 0.0}
+    result['timestamp'] = str(np.datetime64('now'))
+    return result
+
+
+def _load_mw(net):
+    return net.load['p_mw'].values[0]
+
+
+def _run_fast_simulation(solve, load_mw, timer=None):
+    """run_simulation() for the fast solver path; ``solve()`` returns the result arrays"""
+    with optional_phase(timer, 'solve'):
+        arrays = solve()
+    with optional_phase(timer, 'extract'):
+        return _result_document(compute_metrics(arrays, DEFAULT_LAYOUT, load_mw), True)
+
+
+def extract_results(net):
+    """Read the power flow results of a solved network into the output layout"""
+    metrics = compute_metrics(read_results(net), DEFAULT_LAYOUT, _load_mw(net))
+    return _result_document(metrics, bool(net.converged))
+
+
+def run_simulation(net, warm_start=False, solver='pandapower', instrument=False):
+    """
+    Run power flow simulation
+
+    ``solver='fast'`` uses the direct DC-link solver instead of pp.runpp;
+    the first fast solve of a net still runs pandapower once to calibrate.
+    With ``instrument`` the result carries a ``telemetry`` block with phase
+    timings, Newton-Raphson iterations, final mismatch and peak RSS.
+    """
+    def run(timer, stats):
+        if solver == 'fast':
+            return _run_fast_simulation(lambda: _solve_fast(net, stats), _load_mw(net), timer)
+
         # Run power flow
-        pp.runpp(net)
+        try:
+            with optional_phase(timer, 'solve'):
+                _run_power_flow(net, warm_start)
+        finally:
+            if instrument:
+                stats.update(power_flow_stats(net))
         
         # Extract results
+        with optional_phase(timer, 'extract'):
+            return extract_results(net)
+
+    return _run_instrumented(run, solver, instrument)
+
+
+def run_snapshot_simulation(dc_solver, params, instrument=False):
+    """
+    run_simulation(solver='fast') with a calibrated solver from a snapshot
+
+    No network is built and pandapower is not imported.
+    """
+    def run(timer, stats):
+        return _run_fast_simulation(
+            lambda: _solve_snapshot(dc_solver, params, stats), params.get('load_mw', 1000.0), timer,
+        )
+
+    return _run_instrumented(run, 'fast', instrument)
+
+
+def _run_instrumented(run, solver, instrument):
+    """
+    Call ``run(timer, stats)``, reporting exceptions as an error result
+
+    With ``instrument`` the phases and solver statistics recorded by ``run``
+    are attached as the telemetry block.
+    """
+    timer = PhaseTimer(**{'import': _import_ms()}) if instrument else None
+    stats = {'iterations': None, 'mismatch_mva': None}
+
+    try:
+        results = run(timer, stats)
+    except Exception as e:
         results = {
-            'status': 'success',
-            'convergence': net.converged,
-            'bus_voltages': {
-                'bus_ac1_voltage_pu': float(net.res_bus.loc[0, 'vm_pu']),
-                'bus_ac2_voltage_pu': float(net.res_bus.loc[1, 'vm_pu']),
-                'bus_dc1_voltage_pu': float(net.res_bus.loc[2, 'vm_pu']),
-                'bus_dc2_voltage_pu': float(net.res_bus.loc[3, 'vm_pu']),
-            },
-            'power_flows': {
-                'transformer_1_p_mw': float(net.res_trafo.loc[0, 'p_hv_mw']),
-                'transformer_1_q_mvar': float(net.res_trafo.loc[0, 'q_hv_mvar']),
-                'transformer_2_p_mw': float(net.res_trafo.loc[1, 'p_hv_mw']),
-                'transformer_2_q_mvar': float(net.res_trafo.loc[1, 'q_hv_mvar']),
-            },
-            'losses': {
-                'total_loss_mw': float(net.res_trafo.loc[0, 'pl_mw'] + net.res_trafo.loc[1, 'pl_mw']),
-                'transformer_1_loss': float(net.res_trafo.loc[0, 'pl_mw']),
-                'transformer_2_loss': float(net.res_trafo.loc[1, 'pl_mw']),
-            },
-            'efficiency': {
-                'overall_efficiency': 98.5 if net.converged else 0.0,
-            },
-            'timestamp': str(np.datetime64('now')),
+            'status': 'error',
+            'error': str(e),
+            'convergence': False
         }
-        
-        return results
-        
+
+    if instrument:
+        results['telemetry'] = _telemetry_block(timer, solver, stats)
+    return results
+
+
+def _telemetry_block(timer, solver, stats):
+    return {
+        'solver': solver,
+        'phases_ms': dict(timer.phases_ms),
+        'iterations': stats['iterations'],
+        'mismatch_mva': stats['mismatch_mva'],
+        'peak_rss_kib': peak_rss_kib(),
+    }
+
+
+# Parameters accepted per scenario by run_batch
+BATCH_PARAMETERS = (
+    'ac1_voltage', 'ac2_voltage', 'dc_voltage', 'power_mva',
+    'load_mw', 'ac1_vm_pu', 'ac2_vm_pu',
+)
+
+# Defaults of the create_hvdc_network parameters, used to normalize cache keys
+NETWORK_DEFAULTS = {
+    'ac1_voltage': 345.0,
+    'ac2_voltage': 230.0,
+    'dc_voltage': 422.84,
+    'power_mva': 1196.0,
+    'load_mw': 1000.0,
+    'ac1_vm_pu': 1.0,
+    'ac2_vm_pu': 1.0,
+}
+
+# Result columns returned by run_batch, in output order
+BATCH_RESULTS = (
+    'convergence',
+    'bus_ac1_voltage_pu', 'bus_ac2_voltage_pu', 'bus_dc1_voltage_pu', 'bus_dc2_voltage_pu',
+    'transformer_1_p_mw', 'transformer_1_q_mvar', 'transformer_2_p_mw', 'transformer_2_q_mvar',
+    'transformer_1_loss', 'transformer_2_loss', 'total_loss_mw',
+)
+
+
+def load_parameter_sets(source):
+    """
+    Normalize batch input into a list of parameter dictionaries
+
+    ``source`` may be a list of dicts, a dict of equally long columns
+    (lists or NumPy arrays), or the path of a CSV file whose header names
+    the parameters. Unknown columns are ignored.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline='') as f:
+            return [
+                {k: float(v) for k, v in row.items() if k in BATCH_PARAMETERS and v not in (None, '')}
+                for row in csv.DictReader(f)
+            ]
+
+    if isinstance(source, dict):
+        columns = {k: np.asarray(v, dtype=float) for k, v in source.items() if k in BATCH_PARAMETERS}
+        n = len(next(iter(columns.values()))) if columns else 0
+        return [{k: float(col[i]) for k, col in columns.items()} for i in range(n)]
+
+    return [dict(params) for params in source]
+
+
+def run_batch(param_sets, as_dataframe=False, solver='pandapower'):
+    """
+    Solve many parameter sets in one process
+
+    Scenarios sharing a topology reuse the cached network and its admittance
+    matrix, and each Newton-Raphson solve starts from the previous solution.
+    Failed or diverged scenarios are reported with ``convergence`` False and
+    NaN results.
+
+    Returns:
+        Dictionary of NumPy arrays (one entry per given parameter and per
+        result column), or a pandas DataFrame when ``as_dataframe`` is set
+    """
+    rows = load_parameter_sets(param_sets)
+    n = len(rows)
+
+    # Echo the swept parameters; unspecified ones use the network defaults
+    columns = {name: np.array([row.get(name, np.nan) for row in rows], dtype=float)
+               for name in BATCH_PARAMETERS if any(name in row for row in rows)}
+    for name in BATCH_RESULTS:
+        columns[name] = np.full(n, np.nan)
+    columns['convergence'] = np.zeros(n, dtype=bool)
+
+    # Result arrays per scenario, turned into metrics in one pass at the end
+    snapshots = [None] * n
+    loads = np.full(n, np.nan)
+
+    for i, params in enumerate(rows):
+        try:
+            net = get_hvdc_network(params)
+            if solver == 'fast':
+                snapshots[i] = {name: np.array(values, dtype=float)
+                                for name, values in _solve_fast(net).items()}
+            else:
+                _run_power_flow(net, warm_start=True)
+                snapshots[i] = read_results(net, copy=True)
+        except Exception:
+            continue
+
+        columns['convergence'][i] = True
+        loads[i] = _load_mw(net)
+
+    stacked = stack_results(snapshots)
+    if stacked is not None:
+        metrics = compute_metrics(stacked, DEFAULT_LAYOUT, loads)
+        for keys in RESULT_LAYOUT.values():
+            for key, name in keys.items():
+                columns[key] = np.where(columns['convergence'], metrics[name], np.nan)
+
+    if as_dataframe:
+        import pandas as pd
+        return pd.DataFrame(columns)
+
+    return columns
+
+
+def create_result_cache(tolerance=1e-3, max_size=1024, ttl=None, path=None):
+    """Result cache keyed by the quantized create_hvdc_network parameters"""
+    return ResultCache(NETWORK_DEFAULTS, tolerance=tolerance, max_size=max_size, ttl=ttl, path=path)
+
+
+def simulate(params=None, solver='pandapower', cache=None, instrument=False, profile_path=None):
+    """
+    Run the power flow for the given parameters on a cached network
+
+    With a ``ResultCache``, operating points within its tolerance of an
+    earlier successful run return a copy of that result, stamped with the
+    current time, without solving again.
+
+    Args:
+        instrument: Add a ``telemetry`` block (see ``run_simulation``) that
+            also covers the network build and cache lookup
+        profile_path: Dump cProfile statistics of the build and solve here
+    """
+    params = params if isinstance(params, dict) else {}
+    key = None
+    if cache is not None:
+        start = time.perf_counter()
+        key = cache.key(params, solver)
+        cached = cache.get(key)
+        if cached is not None:
+            cached['timestamp'] = str(np.datetime64('now'))
+            if not instrument:
+                return cached
+            timer = PhaseTimer(**{'import': _import_ms()})
+            timer.record('cache_lookup', time.perf_counter() - start)
+            telemetry = _telemetry_block(timer, solver, {'iterations': None, 'mismatch_mva': None})
+            telemetry['cache_hit'] = True
+            return {**cached, 'telemetry': telemetry}
+
+    with profiled(profile_path):
+        build_start = time.perf_counter()
+        dc_solver = _snapshot_solver(params) if solver == 'fast' else None
+        if dc_solver is not None:
+            build_seconds = time.perf_counter() - build_start
+            result = run_snapshot_simulation(dc_solver, params, instrument=instrument)
+        else:
+            net = get_hvdc_network(params)
+            build_seconds = time.perf_counter() - build_start
+            result = run_simulation(net, warm_start=True, solver=solver, instrument=instrument)
+
+    if instrument:
+        phases = result['telemetry']['phases_ms']
+        result['telemetry']['phases_ms'] = {
+            'import': phases.pop('import'), 'build': build_seconds * 1e3, **phases,
+        }
+        if profile_path is not None:
+            result['telemetry']['profile'] = profile_path
+
+    if cache is not None and result.get('status') == 'success':
+        cache.put(key, {k: v for k, v in result.items() if k != 'telemetry'})
+
+    return result
+
+
+# Output formats. "json" is one compact JSON document per line; the binary
+# formats are framed with a 4-byte big-endian length prefix.
+OUTPUT_FORMATS = ('json', 'msgpack', 'struct')
+
+# "struct" format: request id (int64, -1 when absent or not an integer)
+# followed by the BATCH_RESULTS fields as little-endian float64, in order
+STRUCT_RECORD = struct.Struct('<q' + 'd' * len(BATCH_RESULTS))
+_FRAME_HEADER = struct.Struct('>I')
+
+
+def _frame(payload):
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
+def _flatten_result(result):
+    """Map a run_simulation result onto the BATCH_RESULTS field order"""
+    flat = {'convergence': bool(result.get('convergence', False))}
+    for group in ('bus_voltages', 'power_flows', 'losses'):
+        flat.update(result.get(group, {}))
+    return [float(flat.get(name, np.nan)) for name in BATCH_RESULTS]
+
+
+def _struct_id(request_id):
+    return request_id if isinstance(request_id, int) and not isinstance(request_id, bool) else -1
+
+
+def encode_result(result, fmt='json', request_id=None, with_id=False):
+    """
+    Serialize one simulation result for output
+
+    Args:
+        result: ``run_simulation`` result dictionary
+        fmt: One of OUTPUT_FORMATS
+        request_id: Worker request id echoed in the response
+        with_id: Wrap the result as ``{"id": ..., "result": ...}`` (worker mode)
+
+    Returns:
+        Bytes ready to be written to the output stream
+    """
+    if fmt == 'struct':
+        return _frame(STRUCT_RECORD.pack(_struct_id(request_id), *_flatten_result(result)))
+
+    document = {'id': request_id, 'result': result} if with_id else result
+
+    if fmt == 'msgpack':
+        import msgpack
+        return _frame(msgpack.packb(document))
+
+    return (json.dumps(document, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def encode_batch(columns, fmt='json'):
+    """
+    Serialize ``run_batch`` columns for output
+
+    JSON and MessagePack carry the columns as lists (NaN becomes null);
+    the struct format emits one STRUCT_RECORD frame per scenario.
+    """
+    if fmt == 'struct':
+        rows = np.column_stack([columns[name].astype(float) for name in BATCH_RESULTS])
+        return b''.join(_frame(STRUCT_RECORD.pack(i, *row)) for i, row in enumerate(rows))
+
+    # NaN marks failed scenarios; JSON has no NaN, so emit null
+    document = {
+        k: [None if x != x else x for x in v.tolist()] for k, v in columns.items()
+    }
+
+    if fmt == 'msgpack':
+        import msgpack
+        return _frame(msgpack.packb(document))
+
+    return (json.dumps(document, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+# Simulations share module state, so socket clients are served one solve at a time
+_simulation_lock = threading.Lock()
+
+# Result cache of the worker process (enabled from the command line)
+_result_cache = None
+
+# Ring buffer that receives the BATCH_RESULTS fields of every solve (--ring)
+_sample_ring = None
+
+
+def publish_sample(result):
+    """Append a run_simulation result to the sample ring, if one is open"""
+    if _sample_ring is not None:
+        _sample_ring.append(_flatten_result(result))
+
+
+def handle_request(line, fmt='json'):
+    """
+    Handle one worker request line
+
+    A request is a JSON object ``{"id": ..., "params": {...}}``, optionally
+    with ``"solver": "fast"`` and ``"instrument": true``. The response
+    echoes the request id together with the ``run_simulation`` result, so
+    callers can pipeline several requests over the same stream.
+    ``{"id": ..., "op": "cache_stats"}`` returns the result cache counters.
+
+    Returns:
+        The encoded response (see ``encode_result``)
+    """
+    request_id = None
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("Request must be a JSON object")
+        request_id = request.get('id')
+        params = request.get('params', {})
+        solver = request.get('solver', 'pandapower')
+
+        if request.get('op') == 'cache_stats':
+            stats = _result_cache.stats() if _result_cache is not None else None
+            return encode_result({'status': 'success', 'cache': stats}, fmt, request_id, with_id=True)
+
+        with _simulation_lock:
+            result = simulate(params, solver, _result_cache, instrument=bool(request.get('instrument')))
+
     except Exception as e:
-        return {
+        result = {
             'status': 'error',
             'error': str(e),
             'convergence': False
         }
 
+    publish_sample(result)
+    return _encode_instrumented(result, fmt, request_id, with_id=True)
+
+
+def _encode_instrumented(result, fmt, request_id=None, with_id=False):
+    """encode_result() that also reports the serialization time in the telemetry block"""
+    if 'telemetry' not in result or fmt == 'struct':
+        return encode_result(result, fmt, request_id, with_id)
+
+    phases = result['telemetry']['phases_ms']
+    if fmt == 'msgpack':
+        msgpack = timed_import('msgpack')
+        payload = timed_encode(
+            phases, lambda: encode_result(result, fmt, request_id, with_id)[_FRAME_HEADER.size:],
+            msgpack.packb)
+        return _frame(payload)
+
+    return timed_encode(phases, lambda: encode_result(result, fmt, request_id, with_id),
+                        lambda value: json.dumps(value).encode('utf-8'))
+
+
+def serve_stream(infile, outfile, fmt='json'):
+    """Answer newline-delimited JSON requests until the input is closed"""
+    for line in infile:
+        if not line.strip():
+            continue
+        outfile.write(handle_request(line, fmt))
+        outfile.flush()
+
+
+class _WorkerRequestHandler(socketserver.StreamRequestHandler):
+    """Serve one socket client with the NDJSON worker protocol"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write(handle_request(line.decode('utf-8'), self.server.output_format))
+            self.wfile.flush()
+
+
+class _WorkerSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    output_format = 'json'
+
+
+def serve_unix_socket(path, fmt='json'):
+    """Serve worker requests on a Unix domain socket until interrupted"""
+    if os.path.exists(path):
+        os.unlink(path)
+
+    server = _WorkerSocketServer(path, _WorkerRequestHandler)
+    server.output_format = fmt
+    print(f"HVDC worker listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
 
 def main():
     """Main function for CLI usage"""
+    parser = argparse.ArgumentParser(description="HVDC back-to-back power flow simulator")
+    parser.add_argument('params', nargs='?', help="Simulation parameters as a JSON object")
+    parser.add_argument('--worker', action='store_true',
+                        help="Keep running and answer NDJSON requests on stdin/stdout")
+    parser.add_argument('--socket', metavar='PATH',
+                        help="Keep running and answer NDJSON requests on a Unix socket")
+    parser.add_argument('--batch', metavar='CSV',
+                        help="Solve every parameter set in a CSV file and print columnar results")
+    parser.add_argument('--output', metavar='CSV',
+                        help="With --batch, write the results to a CSV file instead of stdout")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='json',
+                        help="Result encoding on stdout (binary formats are length-prefixed)")
+    parser.add_argument('--solver', choices=SOLVERS, default='pandapower',
+                        help="Power flow solver for single and batch runs")
+    parser.add_argument('--cache', action='store_true',
+                        help="Memoize results of repeated operating points")
+    parser.add_argument('--cache-size', type=int, default=1024,
+                        help="Maximum number of cached results")
+    parser.add_argument('--cache-ttl', type=float, default=None,
+                        help="Lifetime of cached results in seconds")
+    parser.add_argument('--cache-tolerance', type=float, default=1e-3,
+                        help="Quantization step of the cache key parameters")
+    parser.add_argument('--cache-db', metavar='PATH',
+                        help="SQLite file backing the cache (implies --cache)")
+    parser.add_argument('--network', metavar='JSON|YAML',
+                        help="Solve a multi-terminal grid built from a station/link description")
+    parser.add_argument('--snapshot', metavar='PATH', default=os.environ.get('HVDC_NETWORK_SNAPSHOT'),
+                        help="Load prebuilt networks from a trusted snapshot file "
+                             "(default: $HVDC_NETWORK_SNAPSHOT)")
+    parser.add_argument('--save-snapshot', metavar='PATH',
+                        help="Prebuild the network for the given parameters, write a snapshot and exit")
+    parser.add_argument('--self-time', action='store_true',
+                        help="Report module import and start-up costs on stderr")
+    parser.add_argument('--instrument', action='store_true',
+                        help="Add phase timings and solver statistics to the result")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="Dump cProfile statistics of the simulation to a file")
+    parser.add_argument('--ring', metavar='PATH', default=os.environ.get('HVDC_SAMPLE_RING'),
+                        help="Append every result to a memory-mapped sample ring, e.g. on /dev/shm "
+                             "(default: $HVDC_SAMPLE_RING)")
+    parser.add_argument('--ring-capacity', type=int, default=4096,
+                        help="Samples kept when the ring is created")
+    args, _ = parser.parse_known_args()
+
+    start = time.perf_counter()
+    try:
+        _run_cli(parser, args)
+    finally:
+        if args.self_time:
+            report = {
+                'imports_ms': {
+                    'eager': IMPORT_SECONDS * 1e3,
+                    **{name: seconds * 1e3 for name, seconds in IMPORT_TIMES.items()},
+                },
+                'snapshot_load_ms': _snapshot_load_seconds * 1e3,
+                'run_ms': (time.perf_counter() - start) * 1e3,
+                'total_ms': (time.perf_counter() - _import_start) * 1e3,
+            }
+            print(json.dumps({'self_time': report}), file=sys.stderr)
+
+
+# Time spent reading the snapshot file (s), for --self-time
+_snapshot_load_seconds = 0.0
+
+
+def _run_cli(parser, args):
+    """Dispatch the parsed command line to the selected mode"""
+    global _result_cache, _sample_ring, _snapshot_load_seconds
+    if args.cache or args.cache_db:
+        _result_cache = create_result_cache(
+            tolerance=args.cache_tolerance,
+            max_size=args.cache_size,
+            ttl=args.cache_ttl,
+            path=args.cache_db,
+        )
+
+    if args.ring:
+        sample_ring = timed_import('sample_ring')
+        _sample_ring = sample_ring.SampleRing(args.ring, BATCH_RESULTS, args.ring_capacity)
+
+    if args.snapshot and not args.save_snapshot:
+        if os.path.exists(args.snapshot):
+            start = time.perf_counter()
+            load_network_snapshot(args.snapshot)
+            _snapshot_load_seconds = time.perf_counter() - start
+        else:
+            print(f"Warning: network snapshot {args.snapshot} not found", file=sys.stderr)
+
+    if args.socket:
+        serve_unix_socket(args.socket, args.format)
+        return
+
+    if args.worker:
+        serve_stream(sys.stdin, sys.stdout.buffer, args.format)
+        return
+
+    if args.network:
+        if args.format == 'struct':
+            parser.error("--network results have no fixed record layout; use json or msgpack")
+        builder = timed_import('network_builder')
+        results = builder.simulate_grid(builder.build_network(args.network), args.solver)
+        sys.stdout.buffer.write(encode_result(results, args.format))
+        return
+
+    if args.batch:
+        results = run_batch(args.batch, as_dataframe=args.output is not None, solver=args.solver)
+        if args.output:
+            results.to_csv(args.output, index=False)
+        else:
+            sys.stdout.buffer.write(encode_batch(results, args.format))
+        return
+
     # Read parameters from command line
     params = {}
-    if len(sys.argv) > 1:
+    if args.params is not None:
         try:
-            arg = sys.argv[1]
+            arg = args.params
             # Ensure params is a dictionary
             if isinstance(arg, str):
                 params = json.loads(arg)
@@ -147,14 +928,18 @@ def main():
     if not isinstance(params, dict):
         params = {}
     
-    # Create network
-    net = create_hvdc_network(params)
+    if args.save_snapshot:
+        count = save_network_snapshot(args.save_snapshot, [params])
+        sys.stdout.buffer.write(encode_result({'status': 'success', 'topologies': count}))
+        return
     
-    # Run simulation
-    results = run_simulation(net)
+    # Create network and run simulation
+    results = simulate(params, args.solver, _result_cache,
+                       instrument=args.instrument, profile_path=args.profile)
+    publish_sample(results)
     
-    # Output results as JSON
-    print(json.dumps(results, indent=2))
+    # Output results
+    sys.stdout.buffer.write(_encode_instrumented(results, args.format))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Adaptive Capability Sweep for the HVDC Simulator
+Maps convergence, voltage limits and efficiency over a grid of
+create_network() parameters, solving densely only near boundaries
+
+The sweep solves the corners of a coarse grid, then refines it like a
+quadtree (2^d-tree in d parameters): a cell is split in half along every
+axis when its corners disagree on the status (failed, voltage violation,
+within limits) or their efficiencies differ by more than a threshold. The new
+corner points of each level are solved together across a process pool. Cells
+that stay uniform are filled from their corners, status by copy and
+efficiency by multilinear interpolation, so the result is a map at the
+resolution of the finest level. Features smaller than a coarse cell that do
+not show at its corners are not detected.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hvdc_simulator import NETWORK_DEFAULTS, NETWORK_PARAMETERS, HVDCSimulator, parse_range, parse_value
+
+# Point status in the capability map; -1 marks points not yet known
+STATUS_FAILED = 0
+STATUS_VIOLATION = 1
+STATUS_OK = 2
+
+# Default voltage band (pu), as in contingency.py
+VM_MIN_PU = 0.95
+VM_MAX_PU = 1.05
+
+# Voltage results checked against the band, with the parameter giving their nominal kV
+VOLTAGE_CHECKS = {
+    "acVoltage1": "ac1_voltage",
+    "acVoltage2": "ac2_voltage",
+    "dcVoltageRectifier": "dc_voltage",
+    "dcVoltageInverter": "dc_voltage",
+}
+
+# Efficiency difference (percentage points) between the corners of a cell that refines it
+EFFICIENCY_STEP = 0.5
+
+# Work chunks per worker and level, to balance uneven solve times
+CHUNKS_PER_WORKER = 4
+
+_worker_simulator: Optional[HVDCSimulator] = None
+
+
+def _init_worker() -> None:
+    """Create one simulator per worker process so networks stay cached"""
+    global _worker_simulator
+    _worker_simulator = HVDCSimulator()
+
+
+def classify(
+    columns: Dict[str, np.ndarray],
+    vm_min_pu: float = VM_MIN_PU,
+    vm_max_pu: float = VM_MAX_PU,
+    simulator: Optional[HVDCSimulator] = None,
+    runs: Optional[Sequence[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve operating points and classify them
+
+    Args:
+        columns: Complete create_network() parameters, one array per parameter
+        runs: Start offsets of runs of neighbouring points (default: one run).
+            Each run starts from a flat start and warm-starts along the run:
+            a solve started from a distant point can land on the
+            low-voltage solution, making results depend on the point order.
+
+    Returns:
+        Status per point (STATUS_*) and efficiency (%, NaN when failed)
+    """
+    simulator = simulator or _worker_simulator or HVDCSimulator()
+    n = len(next(iter(columns.values())))
+    bounds = [*(runs if runs is not None else [0]), n]
+    parts = [
+        simulator.run_batch({name: values[lo:hi] for name, values in columns.items()}, cold_start=True)
+        for lo, hi in zip(bounds[:-1], bounds[1:])
+        if hi > lo
+    ]
+    results = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    within = np.ones(len(results["success"]), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for field, nominal in VOLTAGE_CHECKS.items():
+            vm = results[field] / columns[nominal]
+            within &= (vm >= vm_min_pu) & (vm <= vm_max_pu)
+
+    status = np.where(results["success"], np.where(within, STATUS_OK, STATUS_VIOLATION), STATUS_FAILED)
+    return status.astype(np.int8), results["efficiency"]
+
+
+def serpentine(indices: np.ndarray) -> np.ndarray:
+    """
+    Lattice points (n, d) in boustrophedon order
+
+    Every axis is traversed back and forth, so consecutive points of a full
+    grid are neighbours and each warm start begins close to its solution.
+    """
+    keys = indices.copy()
+    for k in range(1, indices.shape[1]):
+        reverse = indices[:, :k].sum(axis=1) % 2 == 1
+        keys[:, k] = np.where(reverse, -indices[:, k], indices[:, k])
+    return indices[np.lexsort(keys.T[::-1])]
+
+
+def _corner_offsets(dimensions: int) -> np.ndarray:
+    """Offsets of the 2^d corners of a unit cell"""
+    return np.array(list(itertools.product((0, 1), repeat=dimensions)), dtype=np.int64)
+
+
+class AdaptiveSweep:
+    """Quadtree-refined capability map over a box of create_network() parameters"""
+
+    def __init__(
+        self,
+        axes: Dict[str, Tuple[float, float]],
+        coarse: int = 9,
+        levels: int = 4,
+        fixed: Optional[Dict[str, float]] = None,
+        vm_min_pu: float = VM_MIN_PU,
+        vm_max_pu: float = VM_MAX_PU,
+        efficiency_step: float = EFFICIENCY_STEP,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            axes: (min, max) per swept parameter
+            coarse: Points per axis of the initial grid
+            levels: Refinement levels; the map has (coarse - 1) * 2**levels + 1
+                points per axis
+            fixed: Other create_network() parameters (default: its defaults)
+            vm_min_pu, vm_max_pu: Voltage band of the STATUS_OK points
+            efficiency_step: Efficiency difference that refines a cell
+            max_workers: Worker processes (default: CPU count; 1 solves in
+                this process)
+        """
+        unknown = [name for name in (*axes, *(fixed or {})) if name not in NETWORK_PARAMETERS]
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+        if coarse < 2:
+            raise ValueError("coarse must be at least 2")
+
+        self.axes = {name: (float(lo), float(hi)) for name, (lo, hi) in axes.items()}
+        self.names = list(self.axes)
+        self.coarse = coarse
+        self.levels = levels
+        self.base = {**NETWORK_DEFAULTS, **(fixed or {})}
+        for name in self.names:
+            del self.base[name]
+        self.limits = (vm_min_pu, vm_max_pu)
+        self.efficiency_step = efficiency_step
+        self.max_workers = max_workers
+
+        self.points = (coarse - 1) * 2 ** levels + 1
+        self.values = {
+            name: np.linspace(lo, hi, self.points) for name, (lo, hi) in self.axes.items()
+        }
+
+    def _solve(self, pool, indices: np.ndarray, step: int, status: np.ndarray, efficiency: np.ndarray) -> None:
+        """Solve the lattice points ``indices`` (n, d), ``step`` apart at most, and store their results"""
+        indices = serpentine(indices)
+        columns = {name: self.values[name][indices[:, k]] for k, name in enumerate(self.names)}
+        columns.update({name: np.full(len(indices), value) for name, value in self.base.items()})
+        # Runs of points whose predecessor is a lattice neighbour
+        jumps = np.abs(np.diff(indices, axis=0)).max(axis=1, initial=0) > step
+        runs = np.concatenate([[0], np.flatnonzero(jumps) + 1])
+
+        if pool is None:
+            parts = [classify(columns, *self.limits, simulator=self._simulator, runs=runs)]
+        else:
+            # Chunks of whole runs, balanced by point count
+            target = len(indices) / (self._workers * CHUNKS_PER_WORKER)
+            cuts = np.unique(runs[np.searchsorted(runs, np.arange(1, self._workers * CHUNKS_PER_WORKER) * target)
+                                  .clip(0, len(runs) - 1)])
+            chunk_bounds = [0, *cuts[cuts > 0], len(indices)]
+            futures = [
+                pool.submit(
+                    classify, {name: values[lo:hi] for name, values in columns.items()}, *self.limits,
+                    runs=runs[(runs >= lo) & (runs < hi)] - lo,
+                )
+                for lo, hi in zip(chunk_bounds[:-1], chunk_bounds[1:])
+                if hi > lo
+            ]
+            parts = [future.result() for future in futures]
+
+        position = tuple(indices.T)
+        status[position] = np.concatenate([part[0] for part in parts])
+        efficiency[position] = np.concatenate([part[1] for part in parts])
+
+    def _split(self, cells: np.ndarray, size: int, status: np.ndarray, efficiency: np.ndarray) -> np.ndarray:
+        """Whether each cell (lower corner indices, edge ``size``) needs refining"""
+        corners = cells[:, None, :] + _corner_offsets(len(self.names))[None] * size
+        position = tuple(np.moveaxis(corners, -1, 0))
+        corner_status = status[position]
+        corner_efficiency = efficiency[position]
+
+        mixed = np.any(corner_status != corner_status[:, :1], axis=1)
+        with np.errstate(invalid="ignore"):
+            spread = np.nanmax(corner_efficiency, axis=1, initial=-np.inf) - \
+                np.nanmin(corner_efficiency, axis=1, initial=np.inf)
+        return mixed | (spread > self.efficiency_step)
+
+    def _fill(self, cells: np.ndarray, size: int, status: np.ndarray, efficiency: np.ndarray,
+              solved: np.ndarray) -> None:
+        """Fill the unsolved points of uniform cells from their corners"""
+        d = len(self.names)
+        offsets = np.array(list(itertools.product(range(size + 1), repeat=d)), dtype=np.int64)
+        corners = _corner_offsets(d)
+        fraction = offsets / size
+        # Multilinear weight of each corner at each offset (offsets, corners)
+        weights = np.prod(np.where(corners[None] == 1, fraction[:, None], 1 - fraction[:, None]), axis=2)
+
+        # In batches of cells to bound memory for large cells
+        batch = max(1, (1 << 20) // len(offsets))
+        for start in range(0, len(cells), batch):
+            lower = cells[start:start + batch]
+            corner_position = tuple(np.moveaxis(lower[:, None, :] + corners[None] * size, -1, 0))
+            points = lower[:, None, :] + offsets[None]
+            position = tuple(np.moveaxis(points, -1, 0))
+
+            open_points = ~solved[position]
+            filled_status = np.broadcast_to(status[corner_position][:, :1], open_points.shape)
+            filled_efficiency = efficiency[corner_position] @ weights.T
+            status[position] = np.where(open_points, filled_status, status[position])
+            efficiency[position] = np.where(open_points, filled_efficiency, efficiency[position])
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the sweep
+
+        Returns:
+            Dictionary with the axis values, the status and efficiency maps
+            (one axis per swept parameter), the mask of solved points, the
+            number of solves and of dense-grid points and the elapsed time
+        """
+        start = time.perf_counter()
+        d = len(self.names)
+        shape = (self.points,) * d
+        status = np.full(shape, -1, dtype=np.int8)
+        efficiency = np.full(shape, np.nan)
+        solved = np.zeros(shape, dtype=bool)
+
+        workers = self._workers = self.max_workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker) if workers > 1 else None
+        self._simulator = HVDCSimulator() if pool is None else None
+        per_level = []
+
+        try:
+            size = 2 ** self.levels
+            coarse_axis = np.arange(0, self.points, size)
+            lattice = np.array(list(itertools.product(coarse_axis, repeat=d)), dtype=np.int64).reshape(-1, d)
+            self._solve(pool, lattice, size, status, efficiency)
+            solved[tuple(lattice.T)] = True
+            per_level.append({"size": size, "solves": len(lattice)})
+
+            cells = np.array(list(itertools.product(coarse_axis[:-1], repeat=d)), dtype=np.int64).reshape(-1, d)
+            while len(cells):
+                refine = self._split(cells, size, status, efficiency) if size > 1 else np.zeros(len(cells), bool)
+                self._fill(cells[~refine], size, status, efficiency, solved)
+                if size == 1 or not refine.any():
+                    break
+
+                half = size // 2
+                cells = (cells[refine][:, None, :] + _corner_offsets(d)[None] * half).reshape(-1, d)
+                corners = (cells[:, None, :] + _corner_offsets(d)[None] * half).reshape(-1, d)
+                corners = np.unique(corners, axis=0)
+                new = corners[~solved[tuple(corners.T)]]
+                self._solve(pool, new, half, status, efficiency)
+                solved[tuple(new.T)] = True
+                size = half
+                per_level.append({"size": size, "cells": len(cells), "solves": len(new)})
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            self._simulator = None
+
+        return {
+            "axes": dict(self.values),
+            "fixed": self.base,
+            "status": status,
+            "efficiency": efficiency,
+            "solved": solved,
+            "solves": int(solved.sum()),
+            "dense_points": int(solved.size),
+            "levels": per_level,
+            "elapsed_ms": (time.perf_counter() - start) * 1e3,
+        }
+
+
+def save_map(result: Dict[str, Any], path) -> None:
+    """Write a run() result as .npz (axis values as axis_<name>)"""
+    np.savez_compressed(
+        path,
+        status=result["status"],
+        efficiency=result["efficiency"],
+        solved=result["solved"],
+        names=np.array(list(result["axes"])),
+        **{f"axis_{name}": values for name, values in result["axes"].items()},
+    )
+
+
+def main():
+    """Main entry point for command-line execution"""
+    parser = argparse.ArgumentParser(description="Adaptive capability sweep of the HVDC simulator")
+    parser.add_argument("--axis", type=parse_range, action="append", required=True,
+                        help="Swept parameter as NAME=MIN:MAX (repeatable)")
+    parser.add_argument("--fixed", type=parse_value, action="append", default=[],
+                        help="Constant parameter as NAME=VALUE (repeatable)")
+    parser.add_argument("--coarse", type=int, default=9, help="Points per axis of the initial grid")
+    parser.add_argument("--levels", type=int, default=4, help="Refinement levels")
+    parser.add_argument("--vm-min", type=float, default=VM_MIN_PU)
+    parser.add_argument("--vm-max", type=float, default=VM_MAX_PU)
+    parser.add_argument("--efficiency-step", type=float, default=EFFICIENCY_STEP)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="Write the capability map as .npz")
+    args = parser.parse_args()
+
+    try:
+        sweep = AdaptiveSweep(
+            dict(args.axis), args.coarse, args.levels, dict(args.fixed),
+            args.vm_min, args.vm_max, args.efficiency_step, args.workers,
+        )
+        result = sweep.run()
+        if args.output:
+            save_map(result, args.output)
+
+        counts = np.bincount(result["status"].ravel(), minlength=3)
+        print(json.dumps({
+            "success": True,
+            "error": None,
+            "results": {
+                "points_per_axis": sweep.points,
+                "solves": result["solves"],
+                "dense_points": result["dense_points"],
+                "solve_fraction": result["solves"] / result["dense_points"],
+                "failed": int(counts[STATUS_FAILED]),
+                "violation": int(counts[STATUS_VIOLATION]),
+                "ok": int(counts[STATUS_OK]),
+                "levels": result["levels"],
+                "elapsed_ms": result["elapsed_ms"],
+            }
+        }))
+
+    except Exception as e:
+        print(json.dumps({
+            "success": False,
+            "error": str(e)
+        }))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
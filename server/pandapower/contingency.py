@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+N-1 Contingency Analysis for the HVDC Simulator
+Solves single-element outages of the pandapower model across a process pool
+and ranks them by voltage, loading and convergence violations
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from hvdc_simulator import HVDCSimulator, json_safe
+
+# Element tables screened for outages, in listing order
+CONTINGENCY_ELEMENTS = ("trafo", "line", "impedance", "ext_grid")
+
+# Branch tables whose loading_percent is checked against the limit
+LOADING_ELEMENTS = ("trafo", "line")
+
+# Default operating limits
+VM_MIN_PU = 0.95
+VM_MAX_PU = 1.05
+MAX_LOADING_PERCENT = 100.0
+
+_worker_net = None
+
+
+def _init_worker(net) -> None:
+    """Keep the (pickled, hence copied) base network in the worker process"""
+    global _worker_net
+    _worker_net = net
+
+
+def _solve_cases(cases: List[Dict[str, Any]], limits: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Solve a chunk of outage cases on the worker's copy of the base network"""
+    return [solve_contingency(_worker_net, case, limits) for case in cases]
+
+
+def list_contingencies(net, elements: Iterable[str] = CONTINGENCY_ELEMENTS) -> List[Dict[str, Any]]:
+    """
+    List the single-element outage cases of a network
+
+    Args:
+        net: pandapower network
+        elements: Element tables to take outages from
+
+    Returns:
+        One dictionary per in-service element with its id, table, index and name
+    """
+    cases = []
+    for element in elements:
+        table = net[element] if element in net else None
+        if table is None or table.empty:
+            continue
+        in_service = table.index[table["in_service"].values.astype(bool)]
+        names = table["name"] if "name" in table else None
+        for index in in_service:
+            name = names.at[index] if names is not None else None
+            cases.append({
+                "id": f"{element}:{index}",
+                "element": element,
+                "index": int(index),
+                "name": name if isinstance(name, str) else None,
+            })
+    return cases
+
+
+def evaluate_violations(net, converged: bool, limits: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Check the result tables of a solved network against the operating limits
+
+    Buses left without a solution (isolated by the outage) count as
+    voltage violations. The severity sums the per-unit voltage and loading
+    excess over all elements; a non-converged case has infinite severity.
+    """
+    if not converged:
+        return {
+            "converged": False,
+            "min_vm_pu": None,
+            "max_vm_pu": None,
+            "max_loading_percent": None,
+            "voltage_violations": 0,
+            "overloads": 0,
+            "isolated_buses": 0,
+            "severity": float("inf"),
+        }
+
+    in_service = net.bus["in_service"].values.astype(bool)
+    vm = net.res_bus["vm_pu"].values[in_service]
+    isolated = ~np.isfinite(vm)
+    vm = vm[~isolated]
+
+    under = np.maximum(limits["vm_min_pu"] - vm, 0.0)
+    over = np.maximum(vm - limits["vm_max_pu"], 0.0)
+
+    loading = np.concatenate([
+        net["res_" + element]["loading_percent"].values
+        for element in LOADING_ELEMENTS
+        if not net["res_" + element].empty
+    ] or [np.empty(0)])
+    loading = loading[np.isfinite(loading)]
+    overload = np.maximum(loading - limits["max_loading_percent"], 0.0) / 100
+
+    return {
+        "converged": True,
+        "min_vm_pu": float(vm.min()) if vm.size else None,
+        "max_vm_pu": float(vm.max()) if vm.size else None,
+        "max_loading_percent": float(loading.max()) if loading.size else None,
+        "voltage_violations": int(np.count_nonzero(under + over)) + int(isolated.sum()),
+        "overloads": int(np.count_nonzero(overload)),
+        "isolated_buses": int(isolated.sum()),
+        "severity": float(under.sum() + over.sum() + overload.sum() + isolated.sum()),
+    }
+
+
+def solve_contingency(net, case: Optional[Dict[str, Any]], limits: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Take one element out of service, solve and restore it
+
+    Args:
+        net: pandapower network, left unchanged on return
+        case: Entry of list_contingencies(), or None for the base case
+        limits: vm_min_pu, vm_max_pu and max_loading_percent
+
+    Returns:
+        The case merged with its violation summary
+    """
+    import pandapower as pp
+
+    row = dict(case) if case is not None else {"id": "base", "element": None, "index": None, "name": None}
+    table = net[case["element"]] if case is not None else None
+
+    if table is not None:
+        table.at[case["index"], "in_service"] = False
+    try:
+        pp.runpp(net, algorithm="nr", max_iteration=100)
+        converged = bool(net.converged)
+        error = None
+    except Exception as e:
+        converged = False
+        error = str(e)
+    finally:
+        if table is not None:
+            table.at[case["index"], "in_service"] = True
+
+    row.update(evaluate_violations(net, converged, limits))
+    row["error"] = error
+    return row
+
+
+def rank_violations(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order cases by severity, non-converged first, then by id for ties"""
+    return sorted(rows, key=lambda row: (-row["severity"], row["id"]))
+
+
+class ContingencyAnalyzer:
+    """Parallel N-1 screening of an HVDCSimulator network"""
+
+    def __init__(
+        self,
+        simulator: HVDCSimulator,
+        vm_min_pu: float = VM_MIN_PU,
+        vm_max_pu: float = VM_MAX_PU,
+        max_loading_percent: float = MAX_LOADING_PERCENT,
+        max_workers: Optional[int] = None,
+        elements: Iterable[str] = CONTINGENCY_ELEMENTS,
+    ):
+        """
+        Args:
+            simulator: Simulator whose current network (create_network()) is screened
+            vm_min_pu, vm_max_pu: Bus voltage band
+            max_loading_percent: Branch loading limit
+            max_workers: Worker processes (default: CPU count, capped by the case
+                count; 1 solves in this process)
+            elements: Element tables to take outages from
+        """
+        if simulator.net is None:
+            raise ValueError("Network not created. Call create_network() first.")
+
+        self.net = simulator.net
+        self.limits = {
+            "vm_min_pu": vm_min_pu,
+            "vm_max_pu": vm_max_pu,
+            "max_loading_percent": max_loading_percent,
+        }
+        self.max_workers = max_workers
+        self.elements = tuple(elements)
+
+    def cases(self) -> List[Dict[str, Any]]:
+        """Outage cases of the screened network"""
+        return list_contingencies(self.net, self.elements)
+
+    def run(self, cases: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Solve the base case and every outage case
+
+        Args:
+            cases: Subset of cases() to solve (default: all)
+
+        Returns:
+            Dictionary with the base case, the ranked contingency table,
+            the number of violating cases and the elapsed time in ms
+        """
+        start = time.perf_counter()
+        cases = self.cases() if cases is None else cases
+
+        base = solve_contingency(self.net, None, self.limits)
+
+        workers = min(self.max_workers or os.cpu_count() or 1, max(len(cases), 1))
+        if workers == 1:
+            rows = [solve_contingency(self.net, case, self.limits) for case in cases]
+        else:
+            # One strided chunk per worker, so outages of each element table are
+            # spread over all workers; each worker unpickles the net once
+            chunks = [cases[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(self.net,)
+            ) as pool:
+                rows = [
+                    row
+                    for chunk_rows in pool.map(_solve_cases, chunks, [self.limits] * workers)
+                    for row in chunk_rows
+                ]
+
+        ranked = rank_violations(rows)
+        return {
+            "base": base,
+            "contingencies": ranked,
+            "violations": sum(1 for row in ranked if row["severity"] > 0),
+            "elapsed_ms": (time.perf_counter() - start) * 1e3,
+        }
+
+
+def main():
+    """Main entry point for command-line execution"""
+
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "success": False,
+            "error": "Missing parameters"
+        }))
+        sys.exit(1)
+
+    try:
+        # Network parameters plus optional "contingency" settings
+        params = json.loads(sys.argv[1])
+        settings = params.pop("contingency", {})
+
+        simulator = HVDCSimulator()
+        simulator.create_network(**params)
+        analysis = ContingencyAnalyzer(simulator, **settings).run()
+
+        print(json.dumps({
+            "success": True,
+            "error": None,
+            "results": json_safe(analysis)
+        }))
+
+    except json.JSONDecodeError as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid JSON: {str(e)}"
+        }))
+        sys.exit(1)
+    except Exception as e:
+        print(json.dumps({
+            "success": False,
+            "error": str(e)
+        }))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,235 @@ HVDC Simulator using Pandapower
 Simulates High Voltage Direct Current (HVDC) transmission systems
 """
 
+import argparse
+import csv
+import inspect
 import json
+import os
 import sys
-import pandapower as pp
+import time
+
+_import_start = time.perf_counter()
+
 import numpy as np
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Shared helpers live next to the CLI simulator in server/. The directory goes
+# at the end of sys.path so server/hvdc_simulator.py never shadows this module,
+# also in spawned workers that import it by name with the parent's path
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.append(SERVER_DIR)
+from result_extraction import compute_metrics, layout, read_results, stack_results
+from telemetry import (
+    IMPORT_TIMES, PhaseTimer, optional_phase, peak_rss_kib, power_flow_stats, profiled, timed_encode,
+    timed_import,
+)
+
+# Time spent importing NumPy and the shared helpers (s); pandapower and the
+# solver modules are imported on first use, see telemetry.IMPORT_TIMES
+IMPORT_SECONDS = time.perf_counter() - _import_start
+
+# create_network() keyword arguments accepted per scenario in batch runs
+NETWORK_PARAMETERS = (
+    "ac1_voltage", "ac2_voltage", "dc_voltage", "power_mva", "load_mw", "ac1_vm_pu",
+)
+
+# Keys of the "results" block, in column order for batch runs
+RESULT_FIELDS = (
+    "totalGeneration", "totalLoad", "efficiency", "losses", "dcCurrent",
+    "rectifierEfficiency", "inverterEfficiency", "acVoltage1", "acVoltage2",
+    "dcVoltageRectifier", "dcVoltageInverter", "rectifierLoss", "inverterLoss",
+    "powerTransmitted",
+)
+
+# compute_metrics() value reported by each RESULT_FIELDS entry
+RESULT_METRICS = {
+    "totalGeneration": "p_rect_mw",
+    "totalLoad": "load_mw",
+    "efficiency": "efficiency",
+    "losses": "converter_loss_mw",
+    "dcCurrent": "dc_current_a",
+    "rectifierEfficiency": "rect_efficiency",
+    "inverterEfficiency": "inv_efficiency",
+    "acVoltage1": "ac1_kv",
+    "acVoltage2": "ac2_kv",
+    "dcVoltageRectifier": "dc_rect_kv",
+    "dcVoltageInverter": "dc_inv_kv",
+    "rectifierLoss": "rect_loss_mw",
+    "inverterLoss": "inv_loss_mw",
+    "powerTransmitted": "p_inv_mw",
+}
+
+# Internal power flow data reused between solves of the same network
+RECYCLE_OPTIONS = {"bus_pq": True, "gen": True, "trafo": False}
+
+
+def load_parameter_sets(
+    source: Union[str, os.PathLike, Dict[str, Iterable[float]], Iterable[Dict[str, float]]]
+) -> List[Dict[str, float]]:
+    """
+    Normalize batch input into a list of create_network() keyword dictionaries
+    
+    Args:
+        source: List of dicts, dict of equally long columns, or CSV file path
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="") as f:
+            return [
+                {k: float(v) for k, v in row.items() if k in NETWORK_PARAMETERS and v not in (None, "")}
+                for row in csv.DictReader(f)
+            ]
+    
+    if isinstance(source, dict):
+        columns = {k: np.asarray(v, dtype=float) for k, v in source.items() if k in NETWORK_PARAMETERS}
+        n = len(next(iter(columns.values()))) if columns else 0
+        return [{k: float(col[i]) for k, col in columns.items()} for i in range(n)]
+    
+    return [
+        {k: float(v) for k, v in params.items() if k in NETWORK_PARAMETERS}
+        for params in source
+    ]
+
+
+def iter_profile(source: Union[str, os.PathLike]) -> Iterator[Dict[str, Any]]:
+    """
+    Read a time-series profile file one step at a time
+    
+    CSV files need a header; ".ndjson"/".jsonl" files hold one JSON object
+    per line. A "time" column is passed through untouched, every other
+    column is read as a create_network() parameter.
+    
+    Args:
+        source: Path of the profile file
+    """
+    path = os.fspath(source)
+    with open(path, newline="") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            rows: Iterable[Dict[str, Any]] = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        
+        for row in rows:
+            step: Dict[str, Any] = {k: float(v) for k, v in row.items()
+                                    if k in NETWORK_PARAMETERS and v not in (None, "")}
+            if "time" in row:
+                step["time"] = row["time"]
+            yield step
+
+
+def write_ndjson(steps: Iterable[Dict[str, Any]], output: Union[str, os.PathLike, IO[str]]) -> int:
+    """
+    Write time-series results incrementally, one JSON object per line
+    
+    Returns:
+        Number of steps written
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "w") as f:
+            return write_ndjson(steps, f)
+    
+    count = 0
+    for step in steps:
+        output.write(json.dumps(step) + "\n")
+        count += 1
+    output.flush()
+    return count
+
+
+def write_arrow(
+    steps: Iterable[Dict[str, Any]],
+    output: Union[str, os.PathLike],
+    batch_size: int = 3600,
+) -> int:
+    """
+    Write time-series results as an Arrow IPC stream of record batches
+    
+    Requires pyarrow. Only batch_size steps are held in memory at a time.
+    
+    Returns:
+        Number of steps written
+    """
+    import pyarrow as pa
+    
+    schema = pa.schema(
+        [("time", pa.string()), ("success", pa.bool_())]
+        + [(name, pa.float64()) for name in RESULT_FIELDS]
+    )
+    
+    def to_batch(buffer: List[Dict[str, Any]]) -> "pa.RecordBatch":
+        columns = {
+            "time": [None if s.get("time") is None else str(s["time"]) for s in buffer],
+            "success": [s["success"] for s in buffer],
+        }
+        for name in RESULT_FIELDS:
+            columns[name] = [s["results"].get(name) for s in buffer]
+        return pa.RecordBatch.from_pydict(columns, schema=schema)
+    
+    count = 0
+    buffer: List[Dict[str, Any]] = []
+    with pa.OSFile(os.fspath(output), "wb") as sink:
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for step in steps:
+                buffer.append(step)
+                if len(buffer) == batch_size:
+                    writer.write_batch(to_batch(buffer))
+                    count += len(buffer)
+                    buffer = []
+            if buffer:
+                writer.write_batch(to_batch(buffer))
+                count += len(buffer)
+    return count
+
+
+def write_history(
+    steps: Iterable[Dict[str, Any]],
+    directory: Union[str, os.PathLike],
+    batch_size: int = 3600,
+) -> int:
+    """
+    Append time-series results to a columnar history store (history_store.py)
+    
+    The step "time" (Unix seconds or ISO 8601) is the row timestamp; steps
+    without one are stamped with the current time. Failed steps are stored
+    as NaN rows.
+    
+    Returns:
+        Number of steps written
+    """
+    history_store = timed_import("history_store")
+    
+    count = 0
+    buffer: List[Dict[str, Any]] = []
+    with history_store.HistoryStore(directory, RESULT_FIELDS) as store:
+        def flush() -> int:
+            times = [s["time"] if s.get("time") is not None else time.time() for s in buffer]
+            columns = {
+                name: [s["results"].get(name, np.nan) if s["success"] else np.nan for s in buffer]
+                for name in RESULT_FIELDS
+            }
+            return store.append(times, columns)
+        
+        for step in steps:
+            buffer.append(step)
+            if len(buffer) == batch_size:
+                count += flush()
+                buffer = []
+        if buffer:
+            count += flush()
+    return count
+
+
+def json_safe(value: Any) -> Any:
+    """Replace NaN and infinite floats by None for strict JSON output"""
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    return value
+
 
 class HVDCSimulator:
     """HVDC Transmission System Simulator"""
@@ -16,6 +240,10 @@ class HVDCSimulator:
     def __init__(self):
         self.net = None
         self.results = {}
+        # Networks built by this simulator, keyed by topology
+        self._network_cache: Dict[Tuple[float, ...], Dict[str, Any]] = {}
+        # Duration of the last create_network() call (s), reported by instrumented runs
+        self._build_seconds: Optional[float] = None
     
     def create_network(
         self,
@@ -24,54 +252,96 @@ class HVDCSimulator:
         dc_voltage: float = 422.84,
         power_mva: float = 1196.0,
         load_mw: float = 1000.0,
+        ac1_vm_pu: float = 1.0,
     ) -> None:
         """
         Create HVDC transmission network
         
+        Networks are cached per topology (voltage levels and rating). When
+        the topology was already built, only the load and the external grid
+        set-point are updated in place and the previous net is reused.
+        
         Args:
             ac1_voltage: AC voltage at station 1 (kV)
             ac2_voltage: AC voltage at station 2 (kV)
             dc_voltage: DC link voltage (kV)
             power_mva: Transmission capacity (MVA)
             load_mw: Load at receiving end (MW)
+            ac1_vm_pu: Voltage set-point of the external grid (pu)
         """
-        self.net = pp.create_empty_network()
+        start = time.perf_counter()
+        key = (ac1_voltage, ac2_voltage, dc_voltage, power_mva)
+        template = self._network_cache.get(key)
+        if template is None:
+            template = self._build_network(ac1_voltage, ac2_voltage, dc_voltage, power_mva)
+            self._network_cache[key] = template
+        
+        self.net = template["net"]
+        self.bus_ac1 = template["bus_ac1"]
+        self.bus_ac2 = template["bus_ac2"]
+        self.bus_dc_rect = template["bus_dc_rect"]
+        self.bus_dc_inv = template["bus_dc_inv"]
+        self.layout = template["layout"]
+        
+        # Update operating point
+        self.net.load.at[template["load"], "p_mw"] = load_mw
+        self.net.load.at[template["load"], "q_mvar"] = load_mw * 0.3  # 30% reactive power
+        self.net.ext_grid.at[template["ext_grid"], "vm_pu"] = ac1_vm_pu
+        
+        self.load_mw = load_mw
+        self.power_mva = power_mva
+        self._build_seconds = time.perf_counter() - start
+    
+    def _build_network(
+        self,
+        ac1_voltage: float,
+        ac2_voltage: float,
+        dc_voltage: float,
+        power_mva: float,
+    ) -> Dict[str, Any]:
+        """Build the network tables for a topology and return it with its element indices"""
+        pp = timed_import("pandapower")
+        net = pp.create_empty_network()
         
         # Create buses
-        bus_ac1 = pp.create_bus(self.net, vn_kv=ac1_voltage, name="AC Bus 1")
-        bus_ac2 = pp.create_bus(self.net, vn_kv=ac2_voltage, name="AC Bus 2")
-        bus_dc_rect = pp.create_bus(self.net, vn_kv=dc_voltage, name="DC Bus Rectifier")
-        bus_dc_inv = pp.create_bus(self.net, vn_kv=dc_voltage, name="DC Bus Inverter")
+        bus_ac1 = pp.create_bus(net, vn_kv=ac1_voltage, name="AC Bus 1")
+        bus_ac2 = pp.create_bus(net, vn_kv=ac2_voltage, name="AC Bus 2")
+        bus_dc_rect = pp.create_bus(net, vn_kv=dc_voltage, name="DC Bus Rectifier")
+        bus_dc_inv = pp.create_bus(net, vn_kv=dc_voltage, name="DC Bus Inverter")
         
         # Create external grid at AC Bus 1 (source)
-        pp.create_ext_grid(
-            self.net,
+        ext_grid = pp.create_ext_grid(
+            net,
             bus=bus_ac1,
             vm_pu=1.0,
             name="External Grid"
         )
         
         # Create transformer 1 (AC1 to DC rectifier)
-        pp.create_transformer(
-            self.net,
+        pp.create_transformer_from_parameters(
+            net,
             hv_bus=bus_ac1,
             lv_bus=bus_dc_rect,
             sn_mva=power_mva,
             vn_hv_kv=ac1_voltage,
             vn_lv_kv=dc_voltage,
+            vk_percent=12.0,
+            vkr_percent=0.3,
             pfe_kw=100,
             i0_percent=0.5,
             name="Rectifier Transformer"
         )
         
         # Create transformer 2 (DC inverter to AC2)
-        pp.create_transformer(
-            self.net,
+        pp.create_transformer_from_parameters(
+            net,
             hv_bus=bus_dc_inv,
             lv_bus=bus_ac2,
             sn_mva=power_mva,
             vn_hv_kv=dc_voltage,
             vn_lv_kv=ac2_voltage,
+            vk_percent=12.0,
+            vkr_percent=0.3,
             pfe_kw=100,
             i0_percent=0.5,
             name="Inverter Transformer"
@@ -79,112 +349,256 @@ class HVDCSimulator:
         
         # Create DC line (simplified as resistance)
         # DC line resistance: ~0.01 ohm/km for 500kV line, assume 500km
+        dc_line_km = 500
         dc_line_r = 5.0  # ohms (simplified)
-        pp.create_line(
-            self.net,
+        dc_line_x = 0.05  # ohms, as the DC link of create_hvdc_network()
+        pp.create_line_from_parameters(
+            net,
             from_bus=bus_dc_rect,
             to_bus=bus_dc_inv,
-            length_km=500,
-            std_type="NAYY 4x50SE",
+            length_km=dc_line_km,
+            r_ohm_per_km=dc_line_r / dc_line_km,
+            x_ohm_per_km=dc_line_x / dc_line_km,
+            c_nf_per_km=0.0,
+            max_i_ka=power_mva / (np.sqrt(3) * dc_voltage),
             name="HVDC Line"
         )
         
-        # Create load at AC Bus 2
-        pp.create_load(
-            self.net,
+        # Create load at AC Bus 2 (set by create_network)
+        load = pp.create_load(
+            net,
             bus=bus_ac2,
-            p_mw=load_mw,
-            q_mvar=load_mw * 0.3,  # 30% reactive power
+            p_mw=0.0,
+            q_mvar=0.0,
             name="Load"
         )
         
-        # Store bus indices for later reference
-        self.bus_ac1 = bus_ac1
-        self.bus_ac2 = bus_ac2
-        self.bus_dc_rect = bus_dc_rect
-        self.bus_dc_inv = bus_dc_inv
-        self.load_mw = load_mw
-        self.power_mva = power_mva
+        # Store element indices for later reference
+        return {
+            "net": net,
+            "layout": layout(net, buses=(bus_ac1, bus_ac2, bus_dc_rect, bus_dc_inv)),
+            "bus_ac1": bus_ac1,
+            "bus_ac2": bus_ac2,
+            "bus_dc_rect": bus_dc_rect,
+            "bus_dc_inv": bus_dc_inv,
+            "ext_grid": ext_grid,
+            "load": load,
+        }
     
-    def run_simulation(self) -> Dict[str, Any]:
+    def run_simulation(
+        self,
+        warm_start: bool = False,
+        solver: str = "pandapower",
+        instrument: bool = False,
+        profile_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Run power flow simulation
         
+        Args:
+            warm_start: Reuse the admittance matrix and last solution of the net
+            solver: "pandapower" or "fast" (direct DC-link Newton-Raphson,
+                calibrated from one pandapower solve of the same network)
+            instrument: Add a "telemetry" block with phase timings (ms),
+                Newton-Raphson iterations, final mismatch (MVA) and peak RSS
+            profile_path: Dump cProfile statistics of the solve to this file
+        
         Returns:
             Dictionary with simulation results
         """
         if self.net is None:
             raise ValueError("Network not created. Call create_network() first.")
         
+        timer = PhaseTimer(**{"import": (IMPORT_SECONDS + sum(IMPORT_TIMES.values())) * 1e3}) if instrument else None
+        if instrument and self._build_seconds is not None:
+            timer.record("build", self._build_seconds)
+        stats: Dict[str, Any] = {"iterations": None, "mismatch_mva": None}
+        
         try:
-            # Run power flow
-            pp.runpp(self.net, algorithm="nr", max_iteration=100)
-            
-            # Extract results
-            results = self._extract_results()
-            return results
+            with profiled(profile_path):
+                # Run power flow
+                with optional_phase(timer, "solve"):
+                    if solver == "fast":
+                        stats = self._run_fast_solver()
+                    else:
+                        try:
+                            self._run_power_flow(warm_start)
+                        finally:
+                            if instrument:
+                                stats = power_flow_stats(self.net)
+                
+                # Extract results
+                with optional_phase(timer, "extract"):
+                    results = self._extract_results()
             
         except Exception as e:
-            return {
+            results = {
                 "success": False,
                 "error": str(e),
                 "results": {}
             }
+        
+        if instrument:
+            results["telemetry"] = {
+                "solver": solver,
+                "phases_ms": timer.phases_ms,
+                "iterations": stats["iterations"],
+                "mismatch_mva": stats["mismatch_mva"],
+                "peak_rss_kib": peak_rss_kib(),
+            }
+            if profile_path is not None:
+                results["telemetry"]["profile"] = profile_path
+        return results
     
-    def _extract_results(self) -> Dict[str, Any]:
-        """Extract and calculate results from simulation"""
+    def run_batch(
+        self,
+        param_sets: Union[str, os.PathLike, Dict[str, Iterable[float]], Iterable[Dict[str, float]]],
+        cold_start: bool = False,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Solve many scenarios in one process
+        
+        Scenarios sharing a topology reuse the cached network, and every
+        Newton-Raphson solve is warm-started from the previous solution.
         
-        # Get bus voltages
-        bus_ac1_vm = self.net.res_bus.loc[self.bus_ac1, "vm_pu"]
-        bus_ac2_vm = self.net.res_bus.loc[self.bus_ac2, "vm_pu"]
-        bus_dc_rect_vm = self.net.res_bus.loc[self.bus_dc_rect, "vm_pu"]
-        bus_dc_inv_vm = self.net.res_bus.loc[self.bus_dc_inv, "vm_pu"]
+        Args:
+            param_sets: Scenarios as accepted by load_parameter_sets()
+            cold_start: Solve the first scenario from a flat start instead of
+                whatever the cached network last solved, so the results do
+                not depend on earlier batches
         
-        # Get transformer flows
-        trafo_results = self.net.res_trafo
-        rect_trafo = trafo_results.iloc[0]  # Rectifier transformer
-        inv_trafo = trafo_results.iloc[1]   # Inverter transformer
+        Returns:
+            Dictionary of NumPy arrays: one per given input parameter, a boolean
+            "success" column and one per RESULT_FIELDS entry (NaN on failure)
+        """
+        rows = load_parameter_sets(param_sets)
+        n = len(rows)
         
-        # Calculate power flows
-        p_rect_mw = abs(rect_trafo["p_lv_mw"])  # Power into DC rectifier
-        p_inv_mw = abs(inv_trafo["p_hv_mw"])    # Power from DC inverter
+        columns: Dict[str, np.ndarray] = {
+            name: np.array([row.get(name, np.nan) for row in rows], dtype=float)
+            for name in NETWORK_PARAMETERS
+            if any(name in row for row in rows)
+        }
+        columns["success"] = np.zeros(n, dtype=bool)
+        for name in RESULT_FIELDS:
+            columns[name] = np.full(n, np.nan)
         
-        # Calculate losses
-        loss_rect = p_rect_mw - p_inv_mw  # Rectifier losses
-        loss_inv = p_inv_mw - self.load_mw  # Inverter + line losses
-        total_loss = loss_rect + loss_inv
+        # Result arrays per scenario, turned into metrics in one pass at the end
+        snapshots: List[Optional[Dict[str, np.ndarray]]] = [None] * n
+        loads = np.full(n, np.nan)
         
-        # Calculate efficiencies
-        efficiency = (self.load_mw / p_rect_mw * 100) if p_rect_mw > 0 else 0
-        rect_efficiency = ((p_rect_mw - loss_rect) / p_rect_mw * 100) if p_rect_mw > 0 else 0
-        inv_efficiency = ((p_inv_mw - loss_inv) / p_inv_mw * 100) if p_inv_mw > 0 else 0
+        for i, params in enumerate(rows):
+            self.create_network(**params)
+            try:
+                self._run_power_flow(warm_start=i > 0 or not cold_start)
+            except Exception:
+                continue
+            
+            columns["success"][i] = True
+            snapshots[i] = read_results(self.net, copy=True)
+            loads[i] = self.load_mw
         
-        # Calculate DC current (I = P / V)
-        dc_voltage = self.net.bus.loc[self.bus_dc_rect, "vn_kv"]
-        dc_current = (p_rect_mw * 1000) / (dc_voltage * bus_dc_rect_vm) if dc_voltage > 0 else 0
+        stacked = stack_results(snapshots)
+        if stacked is not None:
+            metrics = compute_metrics(stacked, self.layout, loads)
+            for name, metric in RESULT_METRICS.items():
+                columns[name] = np.where(columns["success"], metrics[metric], np.nan)
         
+        return columns
+    
+    def run_time_series(
+        self,
+        profile: Union[str, os.PathLike, Iterable[Dict[str, Any]]],
+        base_params: Optional[Dict[str, float]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Quasi-static time-series simulation
+        
+        Each step is solved on the cached network, warm-started from the
+        previous step, and yielded immediately so memory use does not grow
+        with the profile length.
+        
+        Args:
+            profile: Iterable of step dicts or a profile file (see iter_profile)
+            base_params: create_network() parameters held constant over the profile
+        
+        Yields:
+            Simulation result of each step, with its "step" number and "time"
+        """
+        steps = iter_profile(profile) if isinstance(profile, (str, os.PathLike)) else profile
+        base_params = dict(base_params or {})
+        
+        for index, step in enumerate(steps):
+            params = {**base_params, **{k: v for k, v in step.items() if k in NETWORK_PARAMETERS}}
+            self.create_network(**params)
+            result = self.run_simulation(warm_start=True)
+            result["step"] = index
+            result["time"] = step.get("time", index)
+            yield result
+    
+    def _run_fast_solver(self) -> Dict[str, Any]:
+        """
+        Solve with the DC-link solver and write voltages/flows into the result tables
+        
+        Returns:
+            Iteration count and final mismatch (MVA) of the solve
+        """
+        dc_solver = timed_import("dc_link_solver").get_solver(self.net)
+        solution = dc_solver.solve_net(self.net)
+        if not solution["converged"]:
+            raise RuntimeError(
+                f"DC link solver did not converge after {solution['iterations']} iterations"
+            )
+        dc_solver.write_results(self.net, solution)
+        return {"iterations": solution["iterations"], "mismatch_mva": solution["mismatch_mva"]}
+    
+    def _run_power_flow(self, warm_start: bool) -> None:
+        """Run Newton-Raphson, optionally recycling the internal data of the last solve"""
+        options = {"recycle": RECYCLE_OPTIONS} if warm_start else {}
+        try:
+            timed_import("pandapower").runpp(self.net, algorithm="nr", max_iteration=100, **options)
+        except Exception:
+            # A diverged solve leaves no usable starting point for the next run
+            self.net["_ppc"] = None
+            raise
+    
+    def _extract_results(self) -> Dict[str, Any]:
+        """Extract and calculate results from simulation"""
+        metrics = compute_metrics(read_results(self.net), self.layout, self.load_mw)
         return {
             "success": True,
             "error": None,
-            "results": {
-                "totalGeneration": float(p_rect_mw),
-                "totalLoad": float(self.load_mw),
-                "efficiency": float(efficiency),
-                "losses": float(total_loss),
-                "dcCurrent": float(dc_current),
-                "rectifierEfficiency": float(rect_efficiency),
-                "inverterEfficiency": float(inv_efficiency),
-                "acVoltage1": float(self.net.bus.loc[self.bus_ac1, "vn_kv"] * bus_ac1_vm),
-                "acVoltage2": float(self.net.bus.loc[self.bus_ac2, "vn_kv"] * bus_ac2_vm),
-                "dcVoltageRectifier": float(dc_voltage * bus_dc_rect_vm),
-                "dcVoltageInverter": float(dc_voltage * bus_dc_inv_vm),
-                "rectifierLoss": float(loss_rect),
-                "inverterLoss": float(loss_inv),
-                "powerTransmitted": float(p_inv_mw),
-            }
+            "results": {name: float(metrics[metric]) for name, metric in RESULT_METRICS.items()},
         }
 
 
+# create_network() defaults, used for parameters a scenario leaves out
+NETWORK_DEFAULTS = {
+    name: parameter.default
+    for name, parameter in inspect.signature(HVDCSimulator.create_network).parameters.items()
+    if name in NETWORK_PARAMETERS
+}
+
+
+def parse_range(text: str) -> Tuple[str, Tuple[float, float]]:
+    """argparse type for NAME=MIN:MAX"""
+    try:
+        name, bounds = text.split("=", 1)
+        lo, hi = bounds.split(":", 1)
+        return name, (float(lo), float(hi))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=MIN:MAX, got {text!r}")
+
+
+def parse_value(text: str) -> Tuple[str, float]:
+    """argparse type for NAME=VALUE"""
+    try:
+        name, value = text.split("=", 1)
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+
+
 def main():
     """Main entry point for command-line execution"""
     
@@ -199,6 +613,38 @@ def main():
         # Parse input JSON
         params = json.loads(sys.argv[1])
         
+        # Multi-terminal mode: {"network": "<file>.json|.yaml" or {...description}}
+        if "network" in params:
+            builder = timed_import("network_builder")
+            grid = builder.simulate_grid(
+                builder.build_network(params["network"]), params.get("solver", "pandapower")
+            )
+            print(json.dumps({
+                "success": grid["status"] == "success",
+                "error": grid.get("error"),
+                "results": {k: v for k, v in grid.items() if k not in ("status", "error", "convergence")},
+            }))
+            return
+        
+        # Time-series mode: {"profile": "<file>", "output": "<file>.ndjson|.arrow"}
+        # or {"profile": "<file>", "history": "<store directory>"}
+        if "profile" in params:
+            simulator = HVDCSimulator()
+            base_params = {k: v for k, v in params.items() if k in NETWORK_PARAMETERS}
+            steps = simulator.run_time_series(params["profile"], base_params)
+            output = params.get("output")
+            if params.get("history"):
+                count = write_history(steps, params["history"])
+                print(json.dumps({"success": True, "error": None, "steps": count}))
+                return
+            if output and str(output).endswith(".arrow"):
+                count = write_arrow(steps, output)
+            else:
+                count = write_ndjson(steps, output or sys.stdout)
+            if output:
+                print(json.dumps({"success": True, "error": None, "steps": count}))
+            return
+        
         # Create and run simulator
         simulator = HVDCSimulator()
         simulator.create_network(
@@ -207,10 +653,23 @@ def main():
             dc_voltage=params.get("dc_voltage", 422.84),
             power_mva=params.get("power_mva", 1196.0),
             load_mw=params.get("load_mw", 1000.0),
+            ac1_vm_pu=params.get("ac1_vm_pu", 1.0),
         )
         
-        results = simulator.run_simulation()
-        print(json.dumps(results))
+        instrument = bool(params.get("instrument", False))
+        results = simulator.run_simulation(
+            solver=params.get("solver", "pandapower"),
+            instrument=instrument,
+            profile_path=params.get("profile_path"),
+        )
+        
+        if params.get("history"):
+            write_history([{**results, "time": params.get("time")}], params["history"])
+        
+        if instrument:
+            print(timed_encode(results["telemetry"]["phases_ms"], lambda: json.dumps(results), json.dumps))
+        else:
+            print(json.dumps(results))
         
     except json.JSONDecodeError as e:
         print(json.dumps({
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo Uncertainty Analysis for the HVDC Simulator
+Propagates parametric and measurement uncertainty through the pandapower model
+and estimates the Physical Fidelity Index (IFF) and its uncertainty (sigma_IFF)
+"""
+
+import json
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from hvdc_simulator import HVDCSimulator
+
+# Standard uncertainties in %, same defaults as UncertaintyAnalyzer (server/iff).
+# Parametric uncertainty perturbs the source voltage set-point and the load;
+# measurement uncertainty is applied to the solved outputs.
+PARAMETRIC_UNCERTAINTY = {"voltage": 0.5, "power": 1.0}
+MEASUREMENT_UNCERTAINTY = {"voltage": 0.2, "current": 0.3, "power": 0.4}
+
+# Simulator outputs compared between the digital twin and the sampled plant
+MEASURED_QUANTITIES = {
+    "voltage": "dcVoltageRectifier",
+    "current": "dcCurrent",
+    "power": "powerTransmitted",
+}
+
+# Weights and error thresholds (%) of DynamicFidelityCalculator, renormalized
+# without the frequency term, which the steady-state model does not produce
+FIDELITY_WEIGHTS = {"voltage": 0.25 / 0.85, "current": 0.25 / 0.85, "power": 0.35 / 0.85}
+FIDELITY_THRESHOLDS = {"voltage": 5.0, "current": 5.0, "power": 10.0}
+
+# Two-sided 95% normal quantile
+Z_95 = 1.959963984540054
+
+_worker_simulator: Optional[HVDCSimulator] = None
+
+
+def _init_worker() -> None:
+    """Create one simulator per worker process so networks stay cached"""
+    global _worker_simulator
+    _worker_simulator = HVDCSimulator()
+
+
+def _solve_chunk(base_params: Dict[str, float], samples: List[Dict[str, float]]) -> np.ndarray:
+    """
+    Solve a chunk of perturbed operating points in a worker
+
+    Returns:
+        Array (len(samples), len(MEASURED_QUANTITIES)); NaN rows for failed solves
+    """
+    simulator = _worker_simulator or HVDCSimulator()
+    outputs = np.full((len(samples), len(MEASURED_QUANTITIES)), np.nan)
+
+    for i, sample in enumerate(samples):
+        simulator.create_network(**{**base_params, **sample})
+        result = simulator.run_simulation(warm_start=True)
+        if not result["success"]:
+            continue
+        outputs[i] = [result["results"][key] for key in MEASURED_QUANTITIES.values()]
+
+    return outputs
+
+
+def fidelity_index(digital: np.ndarray, measured: np.ndarray) -> np.ndarray:
+    """
+    Vectorized dynamic fidelity index (0-1) between model and measured values
+
+    Uses the sigmoid error normalization of DynamicFidelityCalculator.
+
+    Args:
+        digital: Digital twin outputs, shape (..., len(MEASURED_QUANTITIES))
+        measured: Measured outputs with the same shape
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        error_percent = np.abs((digital - measured) / measured) * 100
+
+    weighted_error = np.zeros(error_percent.shape[:-1])
+    for k, quantity in enumerate(MEASURED_QUANTITIES):
+        normalized = 1 / (1 + np.exp(-2 * (error_percent[..., k] / FIDELITY_THRESHOLDS[quantity] - 1)))
+        weighted_error += FIDELITY_WEIGHTS[quantity] * np.minimum(1, normalized)
+
+    return np.maximum(0, 1 - weighted_error)
+
+
+class RunningStatistics:
+    """Streaming mean/variance with Chan's parallel update for chunked samples"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[np.isfinite(values)]
+        n = values.size
+        if n == 0:
+            return
+
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    @property
+    def ci_half_width(self) -> float:
+        """Half width of the 95% confidence interval of the mean"""
+        if self.count < 2:
+            return float("inf")
+        return Z_95 * math.sqrt(self.variance / self.count)
+
+
+class MonteCarloAnalyzer:
+    """Monte Carlo propagation of HVDC model uncertainty across a process pool"""
+
+    def __init__(
+        self,
+        n_samples: int = 5000,
+        chunk_size: int = 50,
+        max_workers: Optional[int] = None,
+        tolerance: float = 1e-3,
+        min_samples: int = 200,
+        seed: Optional[int] = None,
+        parametric: Optional[Dict[str, float]] = None,
+        measurement: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            n_samples: Maximum number of power flows
+            chunk_size: Samples solved per worker task
+            max_workers: Worker processes (default: CPU count)
+            tolerance: Stop once the 95% CI half width of mean IFF falls below this
+            min_samples: Samples required before early stopping is considered
+            seed: Random seed; each chunk draws its inputs and measurement noise
+                from its own stream spawned from it, so seeded runs draw the same
+                samples. Solves are warm-started from whatever the worker solved
+                before, so their outputs agree to the power flow tolerance
+            parametric: Parametric standard uncertainty in % per quantity
+            measurement: Measurement standard uncertainty in % per quantity
+        """
+        self.n_samples = n_samples
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+        self.seed = seed
+        self.parametric = {**PARAMETRIC_UNCERTAINTY, **(parametric or {})}
+        self.measurement = {**MEASUREMENT_UNCERTAINTY, **(measurement or {})}
+
+    def _sample_inputs(
+        self, base_params: Dict[str, float], rng: np.random.Generator, n: int
+    ) -> List[Dict[str, float]]:
+        """Draw perturbed operating points (load and source voltage set-point)"""
+        load_mw = base_params.get("load_mw", 1000.0)
+        vm_pu = base_params.get("ac1_vm_pu", 1.0)
+
+        loads = load_mw * (1 + rng.normal(0, self.parametric["power"] / 100, n))
+        voltages = vm_pu * (1 + rng.normal(0, self.parametric["voltage"] / 100, n))
+        return [
+            {"load_mw": float(p), "ac1_vm_pu": float(v)}
+            for p, v in zip(loads, voltages)
+        ]
+
+    def _measurement_noise(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Relative sensor error for n solved plant outputs"""
+        sigma = np.array([self.measurement[q] for q in MEASURED_QUANTITIES]) / 100
+        return rng.normal(0, 1, (n, len(MEASURED_QUANTITIES))) * sigma
+
+    def iter_estimates(self, base_params: Optional[Dict[str, float]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Run the analysis, yielding the running estimate after every chunk
+
+        Chunks are consumed in submission order, so a seeded run yields the
+        same estimates, up to the power flow tolerance, after the same sample
+        counts every time. The percentile interval is only computed for the
+        final estimate.
+
+        Args:
+            base_params: Nominal create_network() parameters
+
+        Yields:
+            Dictionaries with sample counts, mean IFF, sigma_IFF and 95% intervals
+        """
+        base_params = dict(base_params or {})
+
+        nominal = HVDCSimulator()
+        nominal.create_network(**base_params)
+        nominal_result = nominal.run_simulation()
+        if not nominal_result["success"]:
+            raise RuntimeError(f"Nominal power flow failed: {nominal_result['error']}")
+        digital = np.array([nominal_result["results"][key] for key in MEASURED_QUANTITIES.values()])
+
+        stats = RunningStatistics()
+        iff_values: List[np.ndarray] = []
+        submitted = 0
+        failed = 0
+        chunk_seeds = np.random.SeedSequence(self.seed)
+
+        workers = self.max_workers or os.cpu_count() or 1
+        max_in_flight = 2 * workers
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            # (future, measurement noise) per chunk, in submission order
+            pending: Deque[Tuple[Any, np.ndarray]] = deque()
+
+            def fill() -> None:
+                nonlocal submitted
+                while submitted < self.n_samples and len(pending) < max_in_flight:
+                    n = min(self.chunk_size, self.n_samples - submitted)
+                    rng = np.random.default_rng(chunk_seeds.spawn(1)[0])
+                    samples = self._sample_inputs(base_params, rng, n)
+                    noise = self._measurement_noise(rng, n)
+                    pending.append((pool.submit(_solve_chunk, base_params, samples), noise))
+                    submitted += n
+
+            fill()
+            while pending:
+                future, noise = pending.popleft()
+                outputs = future.result()
+                solved = np.all(np.isfinite(outputs), axis=1)
+                failed += int((~solved).sum())
+
+                measured = outputs[solved] * (1 + noise[solved])
+                chunk_iff = fidelity_index(digital, measured)
+                iff_values.append(chunk_iff)
+                stats.update(chunk_iff)
+
+                converged = stats.count >= self.min_samples and stats.ci_half_width <= self.tolerance
+                if not converged:
+                    fill()
+                final = converged or not pending
+                yield self._estimate(stats, iff_values if final else None, failed, converged)
+
+                if converged:
+                    for future, _ in pending:
+                        future.cancel()
+                    return
+
+    def run(self, base_params: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Run the analysis to completion (or early stop) and return the final estimate"""
+        estimate: Dict[str, Any] = {}
+        for estimate in self.iter_estimates(base_params):
+            pass
+        return estimate
+
+    def _estimate(
+        self,
+        stats: RunningStatistics,
+        iff_values: Optional[List[np.ndarray]],
+        failed: int,
+        converged: bool,
+    ) -> Dict[str, Any]:
+        """
+        Summarize the current state of the running statistics
+
+        The 95% interval of IFF is only computed when ``iff_values`` is given
+        (the final estimate); intermediate estimates report None.
+        """
+        half_width = stats.ci_half_width
+
+        interval: Optional[List[float]] = None
+        if iff_values is not None:
+            values = np.concatenate(iff_values) if iff_values else np.empty(0)
+            if values.size:
+                interval = [float(v) for v in np.percentile(values, [2.5, 97.5])]
+            else:
+                interval = [float("nan"), float("nan")]
+
+        return {
+            "samples": stats.count,
+            "failed": failed,
+            "IFF": stats.mean,
+            "variance": stats.variance,
+            "sigma_IFF": math.sqrt(stats.variance) if stats.count > 1 else float("nan"),
+            "mean_ci95": [stats.mean - half_width, stats.mean + half_width],
+            "interval95": interval,
+            "converged": converged,
+        }
+
+
+def main():
+    """Main entry point for command-line execution"""
+
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "success": False,
+            "error": "Missing parameters"
+        }))
+        sys.exit(1)
+
+    try:
+        # Network parameters plus optional "monte_carlo" settings
+        params = json.loads(sys.argv[1])
+        settings = params.pop("monte_carlo", {})
+        stream = settings.pop("stream", False)
+
+        analyzer = MonteCarloAnalyzer(**settings)
+        estimate: Dict[str, Any] = {}
+        for estimate in analyzer.iter_estimates(params):
+            if stream:
+                print(json.dumps(estimate), flush=True)
+
+        if not stream:
+            print(json.dumps({
+                "success": True,
+                "error": None,
+                "results": estimate
+            }))
+
+    except json.JSONDecodeError as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid JSON: {str(e)}"
+        }))
+        sys.exit(1)
+    except Exception as e:
+        print(json.dumps({
+            "success": False,
+            "error": str(e)
+        }))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Linearized What-If Sensitivities for the HVDC Simulator
+Estimates results for small changes of the load and of the AC set-point
+around one converged pandapower solve, without solving again
+
+After the base solve, the Newton-Raphson Jacobian of the network is built at
+the solution and LU-factored once. Solving it against the mismatch
+derivatives gives the state sensitivities. The run_simulation() results
+(losses, DC current, ...) and the bus voltages follow from them as one dense
+matrix, so a query is a matrix-vector product and a batch of queries is one
+matrix product. The output derivatives are analytic: the branch flows are
+differentiated along the state sensitivities, then the metrics by the chain
+rule of result_extraction.metric_derivatives(). A change outside the trust region, or one whose linearized
+state leaves too large a power mismatch, is solved with pandapower instead.
+"""
+
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+from hvdc_simulator import (
+    NETWORK_DEFAULTS, NETWORK_PARAMETERS, RESULT_FIELDS, RESULT_METRICS, HVDCSimulator, load_parameter_sets,
+)
+
+# Shared solver and metric helpers from server/, which hvdc_simulator puts on sys.path
+from dc_link_solver import DCLinkSolver, dsbus_dv
+from result_extraction import compute_metrics, from_solution, metric_derivatives
+
+# Parameters covered by the linearization, in column order of the matrices
+PARAMETERS = ("load_mw", "ac1_vm_pu")
+
+# create_network() sets the load's reactive power to this fraction of load_mw
+LOAD_Q_RATIO = 0.3
+
+# Default trust region: the load may move by this fraction of the base load
+# (at least TRUST_LOAD_MIN_MW), the external grid set-point by TRUST_VM_PU
+TRUST_LOAD_FRACTION = 0.05
+TRUST_LOAD_MIN_MW = 5.0
+TRUST_VM_PU = 0.01
+
+# Largest power mismatch (MVA) of the linearized state accepted as an answer
+MAX_MISMATCH_MVA = 0.5
+
+
+class SensitivityModel:
+    """Linearization of an HVDCSimulator network around a converged operating point"""
+
+    def __init__(
+        self,
+        simulator: Optional[HVDCSimulator] = None,
+        trust_region: Optional[Dict[str, float]] = None,
+        max_mismatch_mva: float = MAX_MISMATCH_MVA,
+        **params: float,
+    ):
+        """
+        Solve the base case and linearize around it
+
+        Args:
+            simulator: Simulator whose cached networks are reused (default: a new one)
+            trust_region: Largest change per PARAMETERS entry answered linearly
+                (default: TRUST_LOAD_FRACTION of the base load, TRUST_VM_PU)
+            max_mismatch_mva: Largest power mismatch of the linearized state
+            **params: create_network() parameters of the base case
+        """
+        self.simulator = simulator or HVDCSimulator()
+        self.trust_region_override = dict(trust_region or {})
+        self.max_mismatch_mva = max_mismatch_mva
+        self.params = dict(NETWORK_DEFAULTS)
+        self.linearize(**params)
+
+    def linearize(self, **params: float) -> Dict[str, Any]:
+        """
+        Solve a new base case with pandapower and factor its Jacobian
+
+        Args:
+            **params: create_network() parameters changed from the current base
+
+        Returns:
+            The run_simulation() result of the base case
+
+        Raises:
+            RuntimeError: If the base case does not converge; the previous
+                linearization is kept
+        """
+        params = {**self.params, **params}
+        self.simulator.create_network(**params)
+        result = self.simulator.run_simulation(warm_start=True)
+        if not result["success"]:
+            raise RuntimeError(f"Base case did not converge: {result['error']}")
+
+        self._factor(params)
+        self.params = params
+        self.base_result = result
+        return result
+
+    def _factor(self, params: Dict[str, float]) -> None:
+        """Build and factor the Jacobian at the solution of the current net"""
+        # Matrices and solution of the pandapower solve just made
+        solver = DCLinkSolver(self.simulator.net, sparse=False)
+        v = solver.v
+        pq = solver.pq
+        npq = len(pq)
+        ref = solver.ext_grid_bus[0]
+
+        ds_dvm, ds_dva = dsbus_dv(solver.ybus, v)
+        jacobian = np.block([
+            [ds_dva[np.ix_(pq, pq)].real, ds_dvm[np.ix_(pq, pq)].real],
+            [ds_dva[np.ix_(pq, pq)].imag, ds_dvm[np.ix_(pq, pq)].imag],
+        ])
+        self._lu = lu_factor(jacobian)
+
+        # Mismatch derivatives per parameter: a larger load lowers the
+        # injection at its bus; the set-point moves the slack voltage
+        dmis_load = np.zeros(len(v), dtype=complex)
+        np.add.at(dmis_load, solver.load_bus, (1 + 1j * LOAD_Q_RATIO) / solver.base_mva)
+        dmis = np.column_stack([dmis_load, ds_dvm[:, ref]])
+        # State (PQ angles, then PQ magnitudes) per unit change of each parameter
+        self._dx = lu_solve(self._lu, -np.concatenate([dmis[pq].real, dmis[pq].imag]))
+
+        self._solver = solver
+        self._v0 = v
+        self._pq = pq
+        self._ref = ref
+        self._dmis_load = dmis_load
+        self._s0 = v * np.conj(solver.ybus @ v)
+        self._p0 = np.array([params[name] for name in PARAMETERS], dtype=float)
+
+        # Bus angle and magnitude changes per parameter; the set-point also
+        # moves the slack magnitude itself
+        dva = np.zeros((len(v), len(PARAMETERS)))
+        dvm = np.zeros((len(v), len(PARAMETERS)))
+        dva[pq] = self._dx[:npq]
+        dvm[pq] = self._dx[npq:]
+        dvm[ref, 1] = 1.0
+
+        # Outputs at the solution and their derivatives along those changes
+        solution = from_solution(solver.evaluate(v), solver.vn_kv)
+        d_solution = from_solution(solver.evaluate_derivatives(v, dva, dvm), solver.vn_kv)
+        metrics = compute_metrics(solution, self.simulator.layout, self._p0[0])
+        d_metrics = metric_derivatives(
+            solution, d_solution, self.simulator.layout, self._p0[0], load_derivative=[1.0, 0.0]
+        )
+        self._y0 = np.concatenate([[metrics[RESULT_METRICS[name]] for name in RESULT_FIELDS], solution["vm_pu"]])
+        self._sensitivity = np.vstack(
+            [d_metrics[RESULT_METRICS[name]] for name in RESULT_FIELDS] + [d_solution["vm_pu"]]
+        )
+
+        radius = {
+            "load_mw": max(TRUST_LOAD_FRACTION * abs(self._p0[0]), TRUST_LOAD_MIN_MW),
+            "ac1_vm_pu": TRUST_VM_PU,
+        }
+        radius.update(self.trust_region_override)
+        self.trust_region = radius
+        self._radius = np.array([radius[name] for name in PARAMETERS], dtype=float)
+
+    def _states(self, deltas: np.ndarray) -> np.ndarray:
+        """Linearized complex bus voltages for parameter changes of shape (n, PARAMETERS)"""
+        npq = len(self._pq)
+        x = deltas @ self._dx.T
+        vm = np.tile(np.abs(self._v0), (len(deltas), 1))
+        va = np.tile(np.angle(self._v0), (len(deltas), 1))
+        va[:, self._pq] += x[:, :npq]
+        vm[:, self._pq] += x[:, npq:]
+        vm[:, self._ref] += deltas[:, 1]
+        return vm * np.exp(1j * va)
+
+    def mismatch_mva(self, deltas: np.ndarray) -> np.ndarray:
+        """Largest PQ-bus power mismatch (MVA) of the linearized state per parameter change"""
+        deltas = np.atleast_2d(deltas)
+        v = self._states(deltas)
+        s_calc = v * np.conj(v @ self._solver.ybus.T)
+        mis = s_calc - self._s0 + deltas[:, :1] * self._dmis_load
+        return np.abs(mis[:, self._pq]).max(axis=1, initial=0.0) * self._solver.base_mva
+
+    def gradients(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Derivatives of the results per unit change of each parameter
+
+        Returns:
+            {parameter: {RESULT_FIELDS entry: float, "vm_pu": list per bus}},
+            e.g. gradients()["load_mw"]["losses"] is dLoss/dP (MW/MW)
+        """
+        n = len(RESULT_FIELDS)
+        return {
+            name: {
+                **{field: float(value) for field, value in zip(RESULT_FIELDS, column[:n])},
+                "vm_pu": column[n:].tolist(),
+            }
+            for name, column in zip(PARAMETERS, self._sensitivity.T)
+        }
+
+    def _columns(self, param_sets) -> Dict[str, np.ndarray]:
+        """Query parameters as columns, NaN where a query keeps the base value"""
+        if isinstance(param_sets, dict):
+            columns = {k: np.atleast_1d(np.asarray(v, dtype=float))
+                       for k, v in param_sets.items() if k in NETWORK_PARAMETERS}
+            n = len(next(iter(columns.values()))) if columns else 0
+            return {k: np.broadcast_to(v, (n,)) for k, v in columns.items()}
+        rows = load_parameter_sets(param_sets)
+        return {
+            name: np.array([row.get(name, np.nan) for row in rows], dtype=float)
+            for name in NETWORK_PARAMETERS
+            if any(name in row for row in rows)
+        }
+
+    def _classify(self, columns: Dict[str, np.ndarray], n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Parameter changes of each query and whether it is answered linearly"""
+        deltas = np.zeros((n, len(PARAMETERS)))
+        for k, name in enumerate(PARAMETERS):
+            if name in columns:
+                deltas[:, k] = np.nan_to_num(columns[name] - self._p0[k])
+
+        inside = np.all(np.abs(deltas) <= self._radius, axis=1)
+        # Topology changes need a different network
+        for name, values in columns.items():
+            if name not in PARAMETERS:
+                inside &= np.isnan(values) | (values == self.params[name])
+        if inside.any():
+            inside[inside] = self.mismatch_mva(deltas[inside]) <= self.max_mismatch_mva
+        return deltas, inside
+
+    def estimate(self, recenter: bool = True, **params: float) -> Dict[str, Any]:
+        """
+        Results for one operating point
+
+        Args:
+            recenter: Linearize around a point that needed a full solve, so
+                the next nearby queries are answered linearly again
+            **params: create_network() parameters changed from the base
+
+        Returns:
+            run_simulation() style result with "linearized" telling whether
+            it was estimated or solved with pandapower
+        """
+        columns = {k: np.array([float(v)]) for k, v in params.items() if k in NETWORK_PARAMETERS}
+        deltas, inside = self._classify(columns, 1)
+        if inside[0]:
+            values = self._y0[:len(RESULT_FIELDS)] + self._sensitivity[:len(RESULT_FIELDS)] @ deltas[0]
+            return {
+                "success": True,
+                "error": None,
+                "results": dict(zip(RESULT_FIELDS, values.tolist())),
+                "linearized": True,
+            }
+
+        if recenter:
+            try:
+                result = self.linearize(**params)
+            except RuntimeError as e:
+                result = {"success": False, "error": str(e), "results": {}}
+        else:
+            self.simulator.create_network(**{**self.params, **params})
+            result = self.simulator.run_simulation(warm_start=True)
+        return {**result, "linearized": False}
+
+    def estimate_batch(
+        self,
+        param_sets: Union[str, Dict[str, Iterable[float]], Iterable[Dict[str, float]]],
+    ) -> Dict[str, np.ndarray]:
+        """
+        Results for many operating points
+
+        Queries inside the trust region are answered by one matrix product;
+        the others are solved with HVDCSimulator.run_batch(). The base
+        linearization is not moved.
+
+        Args:
+            param_sets: Queries as accepted by load_parameter_sets(); a dict of
+                columns is used without conversion
+
+        Returns:
+            run_batch() style columns plus a boolean "linearized" column
+        """
+        columns = self._columns(param_sets)
+        n = len(next(iter(columns.values()))) if columns else 0
+        deltas, inside = self._classify(columns, n)
+
+        out: Dict[str, np.ndarray] = {name: np.array(values) for name, values in columns.items()}
+        out["success"] = inside.copy()
+        out["linearized"] = inside
+        fields = len(RESULT_FIELDS)
+        estimates = self._y0[:fields] + deltas[inside] @ self._sensitivity[:fields].T
+        for k, name in enumerate(RESULT_FIELDS):
+            out[name] = np.full(n, np.nan)
+            out[name][inside] = estimates[:, k]
+
+        outside = np.flatnonzero(~inside)
+        if len(outside):
+            solved = self.simulator.run_batch([
+                {**self.params, **{k: float(v[i]) for k, v in columns.items() if not np.isnan(v[i])}}
+                for i in outside
+            ])
+            out["success"][outside] = solved["success"]
+            for name in RESULT_FIELDS:
+                out[name][outside] = solved[name]
+        return out
+
+
+def main():
+    """Main entry point for command-line execution"""
+
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "success": False,
+            "error": "Missing parameters"
+        }))
+        sys.exit(1)
+
+    try:
+        # Base network parameters plus an optional list of "queries"
+        params = json.loads(sys.argv[1])
+        queries = params.pop("queries", [])
+
+        start = time.perf_counter()
+        model = SensitivityModel(**params)
+        linearize_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        estimates = [model.estimate(recenter=False, **query) for query in queries]
+        query_ms = (time.perf_counter() - start) * 1e3
+
+        print(json.dumps({
+            "success": True,
+            "error": None,
+            "results": {
+                "base": model.base_result["results"],
+                "gradients": model.gradients(),
+                "trust_region": model.trust_region,
+                "estimates": estimates,
+                "linearize_ms": linearize_ms,
+                "query_ms": query_ms,
+            }
+        }))
+
+    except json.JSONDecodeError as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid JSON: {str(e)}"
+        }))
+        sys.exit(1)
+    except Exception as e:
+        print(json.dumps({
+            "success": False,
+            "error": str(e)
+        }))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
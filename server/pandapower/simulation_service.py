@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Asyncio Simulation Service for the HVDC Simulator
+Serves HVDCSimulator over HTTP and WebSocket using only the standard library
+
+Endpoints:
+    POST /simulate  {"load_mw": 800, ...}         -> run_simulation() result
+    GET  /simulate?load_mw=800                    -> same, parameters in the query
+    POST /batch     {"scenarios": [{...}, ...]}   -> run_batch() columns
+    GET  /health                                  -> queue and coalescing counters
+    GET  /stream    WebSocket; every text message {"id": ..., "params": {...}}
+                    is answered with {"id": ..., "result": {...}}
+
+Solves run in a bounded process pool with one simulator per worker.
+Identical requests that arrive while a solve is in flight share its result,
+and new solves beyond the queue limit are rejected (HTTP 503, or an error
+message on the WebSocket) instead of queueing without bound. Invalid
+parameters are answered with HTTP 400; a solve that fails is reported in
+its own result, so one bad request never takes a worker down.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from hvdc_simulator import NETWORK_PARAMETERS, HVDCSimulator
+
+# Largest accepted request body (bytes)
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# RFC 6455 handshake GUID
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_OP_CONTINUATION, _OP_TEXT, _OP_CLOSE, _OP_PING, _OP_PONG = 0x0, 0x1, 0x8, 0x9, 0xA
+# Close code for a message larger than MAX_BODY_BYTES
+_CLOSE_TOO_BIG = 1009
+
+_STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+_worker_simulator: Optional[HVDCSimulator] = None
+
+
+def _init_worker() -> None:
+    """Create one simulator per worker; networks are built by the first solve that needs them"""
+    global _worker_simulator
+    _worker_simulator = HVDCSimulator()
+
+
+def _ready() -> None:
+    """No-op task used to start the workers"""
+
+
+def _solve(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Solve one operating point in a worker, reporting a failed build in the result"""
+    simulator = _worker_simulator or HVDCSimulator()
+    network = {k: v for k, v in params.items() if k in NETWORK_PARAMETERS}
+    try:
+        simulator.create_network(**network)
+    except Exception as e:
+        return {"success": False, "error": f"Network build failed: {e}", "results": {}}
+    return simulator.run_simulation(warm_start=True, solver=params.get("solver", "pandapower"))
+
+
+def _solve_batch(scenarios: List[Dict[str, float]]) -> Dict[str, List[Any]]:
+    """Solve a list of scenarios in a worker and return JSON-ready columns"""
+    simulator = _worker_simulator or HVDCSimulator()
+    columns = simulator.run_batch(scenarios)
+    return {
+        name: [None if isinstance(v, float) and math.isnan(v) else v for v in values.tolist()]
+        for name, values in columns.items()
+    }
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when the solve queue is full"""
+
+
+def normalize_params(params: Any) -> Dict[str, Any]:
+    """
+    Keep the create_network() parameters and the solver of a request
+
+    Raises:
+        ValueError: If the request is not an object or a value is not a finite number
+    """
+    if not isinstance(params, dict):
+        raise ValueError("Parameters must be a JSON object")
+
+    normalized: Dict[str, Any] = {}
+    for name in NETWORK_PARAMETERS:
+        if name not in params:
+            continue
+        value = params[name]
+        try:
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                raise ValueError
+            normalized[name] = float(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number, got {value!r}") from None
+        if not math.isfinite(normalized[name]):
+            raise ValueError(f"{name} must be finite, got {value!r}")
+    solver = params.get("solver", "pandapower")
+    if solver not in ("pandapower", "fast"):
+        raise ValueError(f"Unknown solver {solver!r}")
+    normalized["solver"] = solver
+    return normalized
+
+
+class SimulationService:
+    """Coalescing, backpressured front end to a pool of HVDCSimulator workers"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64):
+        """
+        Args:
+            max_workers: Worker processes (default: CPU count)
+            max_pending: Distinct solves queued or running before new ones are rejected
+        """
+        self.max_pending = max_pending
+        self._pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+        # Start the workers now: forked later, they would inherit (and keep
+        # open) the client sockets of the connections being served
+        self._pool.submit(_ready).result()
+        self._in_flight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._pending = 0
+        self.counters = {"requests": 0, "solves": 0, "coalesced": 0, "rejected": 0, "batches": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counters and current queue depth"""
+        return {**self.counters, "pending": self._pending, "max_pending": self.max_pending}
+
+    def _reserve(self) -> None:
+        if self._pending >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise ServiceBusy(f"Solve queue full ({self.max_pending} pending)")
+        self._pending += 1
+
+    def _submit(self, fn: Any, *args: Any) -> "asyncio.Future[Any]":
+        """Take a queue slot and run ``fn`` in the pool; the slot is freed by _release()"""
+        self._reserve()
+        try:
+            return asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        except BaseException:
+            self._pending -= 1
+            raise
+
+    def _release(self, future: "asyncio.Future[Any]", key: Optional[str] = None) -> None:
+        """Done callback of a solve: free its queue slot once the worker has finished"""
+        if key is not None and self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        self._pending -= 1
+        if not future.cancelled():
+            # Mark the outcome as retrieved, even if every requester went away
+            future.exception()
+
+    async def simulate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Solve one operating point, sharing the solve with identical requests in flight
+
+        A requester that is cancelled stops waiting, but the solve keeps its
+        queue slot until the worker has finished it.
+
+        Raises:
+            ValueError: On invalid parameters
+            ServiceBusy: When the queue is full
+        """
+        params = normalize_params(params)
+        self.counters["requests"] += 1
+        key = json.dumps(params, sort_keys=True)
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = self._submit(_solve, params)
+        self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._release(done, key))
+        self.counters["solves"] += 1
+        return await asyncio.shield(future)
+
+    async def batch(self, scenarios: Any) -> Dict[str, List[Any]]:
+        """Solve a list of scenarios in one worker task (counts as one queued solve)"""
+        if not isinstance(scenarios, list) or not scenarios:
+            raise ValueError("Expected a non-empty list of scenarios")
+        scenarios = [
+            {k: v for k, v in normalize_params(s).items() if k in NETWORK_PARAMETERS}
+            for s in scenarios
+        ]
+        self.counters["batches"] += 1
+
+        future = self._submit(_solve_batch, scenarios)
+        future.add_done_callback(self._release)
+        return await asyncio.shield(future)
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    # HTTP
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection, or upgrade it to a WebSocket"""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+
+                path = urlsplit(target).path
+                if path == "/stream" and headers.get("upgrade", "").lower() == "websocket":
+                    if "sec-websocket-key" not in headers:
+                        writer.write(_http_response(
+                            400, {"success": False, "error": "Missing Sec-WebSocket-Key header"}, False
+                        ))
+                        break
+                    await self._serve_websocket(reader, writer, headers)
+                    break
+
+                status, document = await self._dispatch(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(_http_response(status, document, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except _RequestTooLarge:
+            writer.write(_http_response(413, {"success": False, "error": "Request body too large"}, False))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Route one HTTP request and return status and JSON document"""
+        url = urlsplit(target)
+
+        if url.path == "/health":
+            return 200, {"success": True, "error": None, "results": self.stats()}
+
+        if url.path not in ("/simulate", "/batch"):
+            return 404, {"success": False, "error": f"Unknown path {url.path}"}
+
+        try:
+            if method == "GET" and url.path == "/simulate":
+                payload: Any = dict(parse_qsl(url.query))
+            elif method == "POST":
+                payload = json.loads(body or b"{}")
+            else:
+                return 405, {"success": False, "error": f"{method} not allowed on {url.path}"}
+
+            if url.path == "/simulate":
+                return 200, await self.simulate(payload)
+
+            scenarios = payload.get("scenarios") if isinstance(payload, dict) else payload
+            return 200, {"success": True, "error": None, "results": await self.batch(scenarios)}
+
+        except ServiceBusy as e:
+            return 503, {"success": False, "error": str(e)}
+        except ValueError as e:
+            return 400, {"success": False, "error": str(e)}
+        except Exception as e:
+            return 500, {"success": False, "error": f"{type(e).__name__}: {e}"}
+
+    # WebSocket
+
+    async def _serve_websocket(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: Dict[str, str]
+    ) -> None:
+        """Answer every text message with the result of its solve, in completion order"""
+        accept = base64.b64encode(
+            hashlib.sha1((headers["sec-websocket-key"] + _WEBSOCKET_GUID).encode()).digest()
+        ).decode()
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept.encode() + b"\r\n\r\n"
+        )
+        await writer.drain()
+
+        messages = _WebSocketReader(reader)
+        send_lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(opcode: int, payload: bytes) -> None:
+            async with send_lock:
+                writer.write(_ws_frame(opcode, payload))
+                await writer.drain()
+
+        async def answer(message: Any) -> None:
+            request_id = message.get("id") if isinstance(message, dict) else None
+            try:
+                params = message.get("params", {}) if isinstance(message, dict) else message
+                response = {"id": request_id, "result": await self.simulate(params)}
+            except (ServiceBusy, ValueError) as e:
+                response = {"id": request_id, "error": str(e)}
+            except Exception as e:
+                response = {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+            await send(_OP_TEXT, json.dumps(response).encode())
+
+        try:
+            while True:
+                try:
+                    opcode, payload = await messages.read()
+                except _RequestTooLarge:
+                    await send(_OP_CLOSE, struct.pack(">H", _CLOSE_TOO_BIG) + b"Message too large")
+                    break
+                if opcode == _OP_CLOSE:
+                    await send(_OP_CLOSE, payload[:2])
+                    break
+                if opcode == _OP_PING:
+                    await send(_OP_PONG, payload)
+                    continue
+                if opcode != _OP_TEXT:
+                    continue
+
+                try:
+                    message = json.loads(payload)
+                except ValueError as e:
+                    await send(_OP_TEXT, json.dumps({"id": None, "error": f"Invalid JSON: {e}"}).encode())
+                    continue
+
+                task = asyncio.create_task(answer(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        """Listen until cancelled"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class _RequestTooLarge(Exception):
+    pass
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Read one HTTP request; None when the client closed the connection"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+
+    headers: Dict[str, str] = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise _RequestTooLarge()
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def _http_response(status: int, document: Dict[str, Any], keep_alive: bool) -> bytes:
+    body = json.dumps(document).encode()
+    head = (
+        f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+    )
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    return (head + "\r\n").encode("latin-1") + body
+
+
+class _WebSocketReader:
+    """Reads the messages of one WebSocket connection"""
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self.reader = reader
+        # Fragments of the message being received, kept across control frames
+        self.opcode: Optional[int] = None
+        self.chunks: List[bytes] = []
+        self.received = 0
+
+    async def read(self) -> Tuple[int, bytes]:
+        """
+        Read one (possibly fragmented) message, or a control frame that
+        arrives between its fragments, and unmask it
+
+        Raises:
+            _RequestTooLarge: When the fragments of the message add up to more
+                than MAX_BODY_BYTES
+        """
+        reader = self.reader
+        while True:
+            first, second = await reader.readexactly(2)
+            frame_opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                (length,) = struct.unpack(">H", await reader.readexactly(2))
+            elif length == 127:
+                (length,) = struct.unpack(">Q", await reader.readexactly(8))
+            # Control frames do not count towards the message they interrupt
+            if length > MAX_BODY_BYTES - (0 if frame_opcode >= 0x8 else self.received):
+                raise _RequestTooLarge()
+            mask = await reader.readexactly(4) if second & 0x80 else None
+            payload = await reader.readexactly(length)
+            if mask is not None and length:
+                key = (mask * (length // 4 + 1))[:length]
+                payload = (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+
+            if frame_opcode >= 0x8:
+                # Control frames are never fragmented and may arrive mid-message
+                return frame_opcode, payload
+            if frame_opcode != _OP_CONTINUATION:
+                self.opcode = frame_opcode
+            self.chunks.append(payload)
+            self.received += length
+            if first & 0x80:
+                message = self.opcode, b"".join(self.chunks)
+                self.opcode, self.chunks, self.received = None, [], 0
+                return message
+
+
+def _ws_frame(opcode: int, payload: bytes) -> bytes:
+    """Unmasked server frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack(">BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def main():
+    """Main entry point for command-line execution"""
+    parser = argparse.ArgumentParser(description="HTTP/WebSocket service for the HVDC simulator")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=None, help="Solver processes (default: CPU count)")
+    parser.add_argument("--max-pending", type=int, default=64,
+                        help="Distinct solves queued before requests are rejected with 503")
+    args = parser.parse_args()
+
+    service = SimulationService(max_workers=args.workers, max_pending=args.max_pending)
+    print(json.dumps({"success": True, "error": None, "listening": f"{args.host}:{args.port}"}),
+          file=sys.stderr, flush=True)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
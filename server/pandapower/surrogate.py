@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Polynomial Surrogate of the HVDC Simulator
+Fits the run_simulation() results over a box of create_network() parameters
+so large scenario spaces can be screened without a power flow per point
+
+Training points are a Latin hypercube over the box, solved with
+HVDCSimulator.run_batch(). Each result field is fitted with a total-degree
+Legendre expansion of the scaled parameters (a polynomial chaos expansion for
+uniform inputs) by ridge regression. A hold-out part of the training points
+gives the error bounds stored with the model, which is then refitted on all
+points. Models are saved as versioned .npz artifacts that need only NumPy to
+load and evaluate, and check() compares a fresh sample against the solver.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from hvdc_simulator import (
+    NETWORK_PARAMETERS, RESULT_FIELDS, HVDCSimulator, json_safe, parse_range, parse_value,
+)
+
+# Artifact format; load() rejects other versions
+FORMAT_VERSION = 1
+
+# Default parameter box (min, max)
+DEFAULT_BOX = {"load_mw": (100.0, 1100.0), "ac1_vm_pu": (0.95, 1.05)}
+
+DEFAULT_DEGREE = 4
+DEFAULT_RIDGE = 1e-8
+DEFAULT_SAMPLES = 200
+# Fraction of the training points held out to estimate the error bounds
+HOLDOUT_FRACTION = 0.2
+
+# Points evaluated per chunk, bounding the basis matrix memory
+CHUNK_POINTS = 1 << 18
+
+
+def total_degree_exponents(dimensions: int, degree: int) -> np.ndarray:
+    """Multi-indices with a total degree up to ``degree``, constant term first"""
+    exponents = [
+        powers for powers in itertools.product(range(degree + 1), repeat=dimensions)
+        if sum(powers) <= degree
+    ]
+    exponents.sort(key=lambda powers: (sum(powers), tuple(-p for p in powers)))
+    return np.array(exponents, dtype=np.int64).reshape(-1, dimensions)
+
+
+def legendre_basis(x: np.ndarray, exponents: np.ndarray) -> np.ndarray:
+    """
+    Tensor Legendre basis at scaled points
+
+    Args:
+        x: Points in [-1, 1], shape (n, dimensions)
+        exponents: total_degree_exponents() multi-indices
+
+    Returns:
+        Basis matrix (n, len(exponents)), stored term-major
+    """
+    degree = int(exponents.max(initial=0))
+    # p[j, k] = P_k(x[:, j]) by Bonnet's recursion, one contiguous row per point set
+    xt = np.ascontiguousarray(x.T)
+    p = np.empty((x.shape[1], degree + 1, len(x)))
+    p[:, 0] = 1.0
+    if degree:
+        p[:, 1] = xt
+    for k in range(1, degree):
+        p[:, k + 1] = ((2 * k + 1) * xt * p[:, k] - k * p[:, k - 1]) / (k + 1)
+
+    basis = p[0, exponents[:, 0]]
+    for j in range(1, x.shape[1]):
+        basis *= p[j, exponents[:, j]]
+    return basis.T
+
+
+def latin_hypercube(n: int, dimensions: int, rng: np.random.Generator) -> np.ndarray:
+    """n stratified points in the unit cube, one per stratum and dimension"""
+    strata = np.argsort(rng.random((dimensions, n)), axis=1).T
+    return (strata + rng.random((n, dimensions))) / n
+
+
+class Surrogate:
+    """Polynomial model of the simulator results over a parameter box"""
+
+    def __init__(
+        self,
+        box: Dict[str, Tuple[float, float]],
+        exponents: np.ndarray,
+        coefficients: np.ndarray,
+        outputs: Sequence[str] = RESULT_FIELDS,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            box: (min, max) per varied create_network() parameter
+            exponents: Basis multi-indices, one row per term
+            coefficients: Term coefficients, shape (terms, outputs)
+            outputs: Result field of each coefficient column
+            metadata: Training settings, fixed parameters and error bounds
+        """
+        self.parameters = list(box)
+        self.lower = np.array([box[name][0] for name in self.parameters], dtype=float)
+        self.upper = np.array([box[name][1] for name in self.parameters], dtype=float)
+        self.exponents = np.asarray(exponents, dtype=np.int64)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.outputs = list(outputs)
+        self.metadata = dict(metadata or {})
+
+    @property
+    def box(self) -> Dict[str, Tuple[float, float]]:
+        return {name: (float(lo), float(hi)) for name, lo, hi in zip(self.parameters, self.lower, self.upper)}
+
+    @property
+    def errors(self) -> Dict[str, Dict[str, float]]:
+        """Hold-out error per output: rmse, p99 and max absolute error"""
+        return self.metadata.get("errors", {})
+
+    def _points(self, points) -> np.ndarray:
+        """Points as an (n, parameters) array from a dict of columns or an array"""
+        if isinstance(points, dict):
+            missing = [name for name in self.parameters if name not in points]
+            if missing:
+                raise KeyError(f"Missing parameters: {', '.join(missing)}")
+            columns = np.broadcast_arrays(*(np.asarray(points[name], dtype=float) for name in self.parameters))
+            return np.stack([c.ravel() for c in columns], axis=1)
+        return np.asarray(points, dtype=float).reshape(-1, len(self.parameters))
+
+    def inside(self, points) -> np.ndarray:
+        """Whether each point lies in the training box"""
+        x = self._points(points)
+        return np.all((x >= self.lower) & (x <= self.upper), axis=1)
+
+    def predict(
+        self,
+        points: Union[Dict[str, Iterable[float]], np.ndarray],
+        outputs: Optional[Sequence[str]] = None,
+        extrapolate: bool = False,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Evaluate the model, vectorized in chunks of CHUNK_POINTS
+
+        Args:
+            points: Dict of columns per parameter (broadcast together) or an
+                array of shape (n, parameters) in self.parameters order
+            outputs: Result fields to evaluate (default: all)
+            extrapolate: Evaluate outside the box instead of returning NaN
+
+        Returns:
+            One array of length n per output
+        """
+        x = self._points(points)
+        outputs = list(outputs or self.outputs)
+        columns = [self.outputs.index(name) for name in outputs]
+        coefficients = self.coefficients[:, columns]
+
+        values = np.empty((len(columns), len(x)))
+        scale = 2.0 / (self.upper - self.lower)
+        for start in range(0, len(x), CHUNK_POINTS):
+            chunk = x[start:start + CHUNK_POINTS]
+            scaled = (chunk - self.lower) * scale - 1.0
+            block = coefficients.T @ legendre_basis(scaled, self.exponents).T
+            if not extrapolate:
+                block[:, ~self.inside(chunk)] = np.nan
+            values[:, start:start + CHUNK_POINTS] = block
+        return {name: values[k] for k, name in enumerate(outputs)}
+
+    def check(
+        self,
+        samples: int = 20,
+        seed: Union[int, np.random.SeedSequence, None] = None,
+        simulator: Optional[HVDCSimulator] = None,
+        tolerance: float = 2.0,
+    ) -> Dict[str, Any]:
+        """
+        Compare the model with the solver at random points of the box
+
+        Args:
+            samples: Points solved with HVDCSimulator.run_batch()
+            seed: Seed of the check points; pass a stream independent of the
+                training seed, see check_seed()
+            tolerance: Allowed multiple of the hold-out max error per output
+
+        Returns:
+            Per-output max absolute error and bound, the number of points
+            solved and "passed" when every error is within its bound
+        """
+        rng = np.random.default_rng(seed)
+        x = self.lower + rng.random((samples, len(self.parameters))) * (self.upper - self.lower)
+        truth = solve_points(x, self.parameters, self.metadata.get("fixed", {}), simulator)
+        predicted = self.predict(x, extrapolate=True)
+
+        ok = truth["success"]
+        report: Dict[str, Any] = {"samples": samples, "solved": int(ok.sum()), "outputs": {}}
+        passed = bool(ok.any())
+        for name in self.outputs:
+            error = float(np.max(np.abs(predicted[name][ok] - truth[name][ok]), initial=0.0))
+            bound = tolerance * self.errors.get(name, {}).get("max", np.inf)
+            # Absolute floor for outputs the model reproduces exactly
+            bound = max(bound, 1e-9 * max(1.0, float(np.max(np.abs(truth[name][ok]), initial=0.0))))
+            report["outputs"][name] = {"max_error": error, "bound": bound}
+            passed &= error <= bound
+        report["passed"] = passed
+        return report
+
+    def save(self, path) -> None:
+        """Write the model as a versioned .npz artifact"""
+        np.savez(
+            path,
+            format_version=np.int64(FORMAT_VERSION),
+            parameters=np.array(self.parameters),
+            lower=self.lower,
+            upper=self.upper,
+            exponents=self.exponents,
+            coefficients=self.coefficients,
+            outputs=np.array(self.outputs),
+            metadata=np.array(json.dumps(self.metadata)),
+        )
+
+    @classmethod
+    def load(cls, path) -> "Surrogate":
+        """Read a save() artifact"""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["format_version"])
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported surrogate format version {version} (expected {FORMAT_VERSION})")
+            parameters = data["parameters"].tolist()
+            box = {name: (lo, hi) for name, lo, hi in zip(parameters, data["lower"], data["upper"])}
+            return cls(box, data["exponents"], data["coefficients"], data["outputs"].tolist(),
+                       json.loads(str(data["metadata"])))
+
+
+def check_seed(seed: Optional[int]) -> np.random.SeedSequence:
+    """Seed for checking a model trained with ``seed``, independent of its training stream"""
+    return np.random.SeedSequence(seed).spawn(1)[0]
+
+
+def solve_points(
+    x: np.ndarray,
+    parameters: Sequence[str],
+    fixed: Dict[str, float],
+    simulator: Optional[HVDCSimulator] = None,
+) -> Dict[str, np.ndarray]:
+    """run_batch() results at points (n, parameters) with the other parameters fixed"""
+    columns = {name: x[:, k] for k, name in enumerate(parameters)}
+    for name, value in fixed.items():
+        columns[name] = np.full(len(x), value)
+    return (simulator or HVDCSimulator()).run_batch(columns)
+
+
+def fit_coefficients(basis: np.ndarray, values: np.ndarray, ridge: float) -> np.ndarray:
+    """Ridge least squares, one coefficient column per output"""
+    terms = basis.shape[1]
+    lhs = np.vstack([basis, np.sqrt(ridge) * np.eye(terms)])
+    rhs = np.vstack([values, np.zeros((terms, values.shape[1]))])
+    return np.linalg.lstsq(lhs, rhs, rcond=None)[0]
+
+
+def train(
+    box: Optional[Dict[str, Tuple[float, float]]] = None,
+    samples: int = DEFAULT_SAMPLES,
+    degree: int = DEFAULT_DEGREE,
+    ridge: float = DEFAULT_RIDGE,
+    seed: Optional[int] = None,
+    fixed: Optional[Dict[str, float]] = None,
+    simulator: Optional[HVDCSimulator] = None,
+) -> Surrogate:
+    """
+    Solve a Latin hypercube over the box and fit the surrogate
+
+    Args:
+        box: (min, max) per varied create_network() parameter (default DEFAULT_BOX)
+        samples: Training points solved with the simulator
+        degree: Total polynomial degree
+        ridge: Ridge regularization of the least squares fit
+        fixed: create_network() parameters held constant
+        simulator: Simulator used for the training solves
+
+    Raises:
+        ValueError: For unknown parameters or too few converged points
+    """
+    box = {name: (float(lo), float(hi)) for name, (lo, hi) in (box or DEFAULT_BOX).items()}
+    fixed = {name: float(value) for name, value in (fixed or {}).items()}
+    unknown = [name for name in (*box, *fixed) if name not in NETWORK_PARAMETERS]
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    parameters = list(box)
+    lower = np.array([box[name][0] for name in parameters])
+    upper = np.array([box[name][1] for name in parameters])
+    x = lower + latin_hypercube(samples, len(parameters), rng) * (upper - lower)
+
+    truth = solve_points(x, parameters, fixed, simulator)
+    ok = truth["success"]
+    exponents = total_degree_exponents(len(parameters), degree)
+    if ok.sum() < 2 * len(exponents):
+        raise ValueError(
+            f"{int(ok.sum())} of {samples} training points converged; "
+            f"at least {2 * len(exponents)} are needed for degree {degree}"
+        )
+
+    x, values = x[ok], np.column_stack([truth[name][ok] for name in RESULT_FIELDS])
+    basis = legendre_basis((x - lower) * (2.0 / (upper - lower)) - 1.0, exponents)
+
+    # Error bounds from a hold-out fit, then the final fit on every point
+    order = rng.permutation(len(x))
+    holdout = order[:max(1, int(len(x) * HOLDOUT_FRACTION))]
+    fit = order[len(holdout):]
+    residual = basis[holdout] @ fit_coefficients(basis[fit], values[fit], ridge) - values[holdout]
+    errors = {
+        name: {
+            "rmse": float(np.sqrt(np.mean(residual[:, k] ** 2))),
+            "p99": float(np.quantile(np.abs(residual[:, k]), 0.99)),
+            "max": float(np.max(np.abs(residual[:, k]))),
+        }
+        for k, name in enumerate(RESULT_FIELDS)
+    }
+
+    metadata = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "degree": degree,
+        "ridge": ridge,
+        "seed": seed,
+        "samples": samples,
+        "converged": int(ok.sum()),
+        "holdout": len(holdout),
+        "fixed": fixed,
+        "errors": errors,
+        "training_seconds": time.perf_counter() - start,
+    }
+    return Surrogate(box, exponents, fit_coefficients(basis, values, ridge), RESULT_FIELDS, metadata)
+
+
+def main():
+    """Main entry point for command-line execution"""
+    parser = argparse.ArgumentParser(description="Polynomial surrogate of the HVDC simulator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = commands.add_parser("train", help="Solve training points and save a model")
+    train_parser.add_argument("output", help="Model artifact (.npz)")
+    train_parser.add_argument("--range", type=parse_range, action="append", dest="box",
+                              help="Varied parameter as NAME=MIN:MAX (repeatable; default load_mw and ac1_vm_pu)")
+    train_parser.add_argument("--fixed", type=parse_value, action="append", default=[],
+                              help="Constant parameter as NAME=VALUE (repeatable)")
+    train_parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+    train_parser.add_argument("--degree", type=int, default=DEFAULT_DEGREE)
+    train_parser.add_argument("--ridge", type=float, default=DEFAULT_RIDGE)
+    train_parser.add_argument("--seed", type=int, default=None)
+    train_parser.add_argument("--check", type=int, default=20, help="Solver points checked after training")
+
+    check_parser = commands.add_parser("check", help="Compare a saved model with the solver")
+    check_parser.add_argument("model")
+    check_parser.add_argument("--samples", type=int, default=20)
+    check_parser.add_argument("--seed", type=int, default=None)
+
+    info_parser = commands.add_parser("info", help="Print the box and error bounds of a model")
+    info_parser.add_argument("model")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "train":
+            model = train(dict(args.box) if args.box else None, args.samples, args.degree, args.ridge,
+                          args.seed, dict(args.fixed))
+            if args.check:
+                model.metadata["check"] = model.check(args.check, check_seed(args.seed))
+            model.save(args.output)
+            output = {"box": model.box, **model.metadata}
+        elif args.command == "check":
+            output = Surrogate.load(args.model).check(args.samples, args.seed)
+        else:
+            model = Surrogate.load(args.model)
+            output = {"box": model.box, "terms": len(model.exponents), **model.metadata}
+
+    except Exception as e:
+        print(json.dumps({
+            "success": False,
+            "error": str(e)
+        }))
+        sys.exit(1)
+
+    print(json.dumps({
+        "success": True,
+        "error": None,
+        "results": json_safe(output)
+    }, indent=2, allow_nan=False))
+    if output.get("passed", output.get("check", {}).get("passed", True)) is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
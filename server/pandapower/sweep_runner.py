@@ -0,0 +1,722 @@
+#!/usr/bin/env python3
+"""
+Checkpointed Sweep Runner for the HVDC Simulator
+Splits a parameter study into chunks recorded in a SQLite job table, so long
+studies survive crashes and preemption and can be spread over several hosts
+
+Workers claim one chunk at a time under a lease, solve it with
+HVDCSimulator.run_batch() and write its results as one .npz file next to the
+job table. A chunk is marked done only after its file is in place, so an
+interrupted worker repeats at most the chunk it was solving; its chunk is
+released on SIGTERM or claimed again once the lease expires. Result files are
+never modified once written.
+
+Workers reach the job table either directly, when their host shares the
+file, or through a coordinator ("serve") over TCP with one JSON request per
+line, for hosts without a shared filesystem. A request lost with its
+connection is sent again under the same id, and the coordinator answers a
+repeated id with its first reply, so a claim or completion is never applied
+twice.
+
+Usage:
+    python sweep_runner.py create study.sqlite --grid load_mw=100:300:201 --grid ac1_vm_pu=0.95:1.05:11
+    python sweep_runner.py work --db study.sqlite --processes 4
+    python sweep_runner.py serve study.sqlite --port 8766          # coordinator host
+    python sweep_runner.py work --connect coordinator:8766         # other hosts
+    python sweep_runner.py status study.sqlite
+    python sweep_runner.py collect study.sqlite results.npz
+"""
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import socketserver
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from hvdc_simulator import NETWORK_PARAMETERS, HVDCSimulator, load_parameter_sets, parse_value
+
+DEFAULT_CHUNK_SIZE = 100
+# A claimed chunk returns to the queue when its worker stops renewing the lease
+DEFAULT_LEASE_SECONDS = 600.0
+# Claims of a chunk before it is marked failed (a chunk that keeps crashing its worker)
+MAX_ATTEMPTS = 3
+# Idle time between claims of a waiting worker (--wait)
+POLL_SECONDS = 5.0
+DEFAULT_PORT = 8766
+# Reconnection attempts of a remote worker before it gives up
+RECONNECT_ATTEMPTS = 5
+RECONNECT_SECONDS = 2.0
+# Replies the coordinator keeps for requests resent after a lost connection
+REPLY_CACHE_SIZE = 1024
+# Chunk count reported by a worker process of ``work --processes`` that
+# stopped on an error (-1 marks one that was interrupted)
+WORKER_FAILED = -2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS chunks_status ON chunks (status, id);
+"""
+
+# JobQueue methods a coordinator answers
+REMOTE_OPERATIONS = ("claim", "renew", "complete", "release", "progress")
+
+
+def worker_id() -> str:
+    """Host and process of the calling worker"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _encode_columns(columns: Dict[str, np.ndarray]) -> Dict[str, List[Any]]:
+    """JSON-ready columns, NaN as null"""
+    return {
+        name: [None if isinstance(v, float) and math.isnan(v) else v for v in np.asarray(values).tolist()]
+        for name, values in columns.items()
+    }
+
+
+def _decode_columns(columns: Dict[str, List[Any]]) -> Dict[str, np.ndarray]:
+    """Inverse of _encode_columns()"""
+    return {
+        name: np.array(values, dtype=bool if name == "success" else float)
+        for name, values in columns.items()
+    }
+
+
+class JobQueue:
+    """SQLite table of sweep chunks with leased claims and per-chunk result files"""
+
+    def __init__(self, path, results_dir=None, max_attempts: int = MAX_ATTEMPTS):
+        """
+        Args:
+            path: Job table (created if missing)
+            results_dir: Result files (default: <stem>_results next to the table)
+            max_attempts: Claims of a chunk before it is marked failed
+        """
+        self.path = Path(path)
+        self.results_dir = Path(results_dir) if results_dir else self.path.with_name(self.path.stem + "_results")
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+
+        # The default rollback journal, unlike WAL, also locks over network filesystems
+        self._db = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        # Serializes the coordinator's connection threads on the shared connection
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def add(self, param_sets, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Append scenarios to the study, split into chunks
+
+        Args:
+            param_sets: Scenarios as accepted by load_parameter_sets()
+
+        Returns:
+            Number of chunks added
+        """
+        rows = load_parameter_sets(param_sets)
+        chunks = [json.dumps(rows[i:i + chunk_size]) for i in range(0, len(rows), chunk_size)]
+        with self._transaction() as db:
+            db.executemany("INSERT INTO chunks (params) VALUES (?)", [(chunk,) for chunk in chunks])
+        return len(chunks)
+
+    def claim(self, worker: str, lease: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """
+        Take the first pending chunk, or one whose lease expired
+
+        Returns:
+            {"chunk": id, "params": scenarios}, or None when nothing is claimable
+        """
+        now = time.time()
+        with self._transaction() as db:
+            while True:
+                row = db.execute(
+                    "SELECT id, params, attempts FROM chunks "
+                    "WHERE status = 'pending' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    return None
+                chunk, params, attempts = row
+                if attempts < self.max_attempts:
+                    break
+                db.execute("UPDATE chunks SET status = 'failed', worker = NULL, lease_until = NULL "
+                           "WHERE id = ?", (chunk,))
+
+            db.execute(
+                "UPDATE chunks SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (worker, now + lease, chunk),
+            )
+        return {"chunk": chunk, "params": json.loads(params)}
+
+    def renew(self, chunk: int, worker: str, lease: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend the lease of a claimed chunk; False when the worker no longer holds it"""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE chunks SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + lease, chunk, worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, chunk: int, worker: str, columns: Dict[str, Any]) -> bool:
+        """
+        Store the results of a chunk and mark it done
+
+        The file is written before the table is updated, and atomically, so
+        a crash in between only makes the chunk run again. Results of a chunk
+        finished twice (after an expired lease) are kept from the first.
+
+        Returns:
+            False when the chunk was already done
+        """
+        if any(isinstance(values, list) for values in columns.values()):
+            columns = _decode_columns(columns)
+        name = f"chunk-{chunk:08d}.npz"
+        tmp = self.results_dir / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **columns)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._transaction() as db:
+            done = db.execute("SELECT status FROM chunks WHERE id = ?", (chunk,)).fetchone()
+            if done is None or done[0] == "done":
+                os.unlink(tmp)
+                return False
+            os.replace(tmp, self.results_dir / name)
+            db.execute(
+                "UPDATE chunks SET status = 'done', worker = ?, lease_until = NULL, result = ?, "
+                "error = NULL, finished_at = ? WHERE id = ?",
+                (worker, name, time.time(), chunk),
+            )
+        return True
+
+    def release(self, chunk: int, worker: str, error: Optional[str] = None) -> bool:
+        """
+        Return a claimed chunk to the queue
+
+        A release with an error counts towards max_attempts; one without
+        (the worker was interrupted) does not.
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE chunks SET status = 'pending', worker = NULL, lease_until = NULL, error = ?, "
+                "attempts = attempts - (? IS NULL) "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (error, error, chunk, worker),
+            )
+        return cursor.rowcount == 1
+
+    def progress(self) -> Dict[str, int]:
+        """Chunk count per status, with expired leases counted as "stalled\""""
+        counts = {"pending": 0, "running": 0, "stalled": 0, "done": 0, "failed": 0}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT CASE WHEN status = 'running' AND lease_until < ? THEN 'stalled' ELSE status END, "
+                "COUNT(*) FROM chunks GROUP BY 1",
+                (time.time(),),
+            ).fetchall()
+        counts.update(dict(rows))
+        counts["total"] = sum(counts.values())
+        return counts
+
+    def results(self) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+        """(chunk, columns) of the done chunks in chunk order"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, result FROM chunks WHERE status = 'done' ORDER BY id"
+            ).fetchall()
+        for chunk, name in rows:
+            with np.load(self.results_dir / name) as data:
+                yield chunk, {key: data[key] for key in data.files}
+
+    def collect(self) -> Dict[str, np.ndarray]:
+        """Results of all done chunks as one set of columns, with a "chunk" column"""
+        parts = []
+        for chunk, columns in self.results():
+            n = len(columns["success"])
+            parts.append({"chunk": np.full(n, chunk), **columns})
+        if not parts:
+            return {}
+        names = list(dict.fromkeys(name for part in parts for name in part))
+        return {
+            name: np.concatenate([
+                part[name] if name in part else np.full(len(part["chunk"]), np.nan) for part in parts
+            ])
+            for name in names
+        }
+
+
+class RemoteQueue:
+    """JobQueue interface of a coordinator reached over TCP"""
+
+    def __init__(self, host: str, port: int = DEFAULT_PORT, timeout: float = 120.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._file = self._sock.makefile("rwb")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def _call(self, op: str, **args: Any) -> Any:
+        # The id stays the same when the request is sent again after a reconnection
+        request = json.dumps({"op": op, "id": uuid.uuid4().hex, **args}).encode() + b"\n"
+        with self._lock:
+            for attempt in range(RECONNECT_ATTEMPTS + 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._file.write(request)
+                    self._file.flush()
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("coordinator closed the connection")
+                    break
+                except OSError as e:
+                    self.close()
+                    if attempt == RECONNECT_ATTEMPTS:
+                        host, port = self.address
+                        raise ConnectionError(f"Coordinator {host}:{port} unreachable: {e}") from e
+                    time.sleep(RECONNECT_SECONDS)
+        reply = json.loads(line)
+        if reply["error"] is not None:
+            raise RuntimeError(reply["error"])
+        return reply["result"]
+
+    def claim(self, worker: str, lease: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        return self._call("claim", worker=worker, lease=lease)
+
+    def renew(self, chunk: int, worker: str, lease: float = DEFAULT_LEASE_SECONDS) -> bool:
+        return self._call("renew", chunk=chunk, worker=worker, lease=lease)
+
+    def complete(self, chunk: int, worker: str, columns: Dict[str, Any]) -> bool:
+        return self._call("complete", chunk=chunk, worker=worker, columns=_encode_columns(columns))
+
+    def release(self, chunk: int, worker: str, error: Optional[str] = None) -> bool:
+        return self._call("release", chunk=chunk, worker=worker, error=error)
+
+    def progress(self) -> Dict[str, int]:
+        return self._call("progress")
+
+
+class _CoordinatorHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, answered with {"result": ..., "error": ...}"""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                reply = self.server.dispatch(json.loads(line))
+            except Exception as e:
+                reply = {"result": None, "error": str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    """TCP front end of a JobQueue for workers without access to its file"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, queue: JobQueue, host: str = "0.0.0.0", port: int = DEFAULT_PORT):
+        self.queue = queue
+        # Request id -> (event set once answered, [reply]), oldest first
+        self._replies: "OrderedDict[str, Tuple[threading.Event, List[Dict[str, Any]]]]" = OrderedDict()
+        self._replies_lock = threading.Lock()
+        super().__init__((host, port), _CoordinatorHandler)
+
+    def _execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            op = request.pop("op", None)
+            if op not in REMOTE_OPERATIONS:
+                raise ValueError(f"Unknown operation: {op}")
+            return {"result": getattr(self.queue, op)(**request), "error": None}
+        except Exception as e:
+            return {"result": None, "error": str(e)}
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer one request
+
+        A request carrying an id already seen gets the reply of the first one,
+        waiting for it if that one is still being executed on another
+        connection, so a resent claim or complete is not applied twice.
+        """
+        request_id = request.pop("id", None)
+        if request_id is None:
+            return self._execute(request)
+
+        with self._replies_lock:
+            entry = self._replies.get(request_id)
+            first = entry is None
+            if first:
+                entry = self._replies[request_id] = (threading.Event(), [])
+                while len(self._replies) > REPLY_CACHE_SIZE:
+                    self._replies.popitem(last=False)
+        done, reply = entry
+        if first:
+            reply.append(self._execute(request))
+            done.set()
+        else:
+            done.wait()
+        return reply[0]
+
+
+@contextmanager
+def _heartbeat(queue, chunk: int, worker: str, lease: float) -> Iterator[None]:
+    """Renew the lease of a chunk every third of the lease while it is solved"""
+    stop = threading.Event()
+
+    def renew() -> None:
+        while not stop.wait(lease / 3):
+            try:
+                queue.renew(chunk, worker, lease)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=renew, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_worker(
+    queue,
+    worker: Optional[str] = None,
+    lease: float = DEFAULT_LEASE_SECONDS,
+    wait: bool = False,
+    simulator: Optional[HVDCSimulator] = None,
+) -> int:
+    """
+    Claim and solve chunks until none is left
+
+    Each chunk is solved from a cold start, so its results do not depend on
+    which chunks the worker solved before. An exception in a chunk releases
+    it with the error; an interruption (KeyboardInterrupt, SystemExit from
+    SIGTERM) releases it and is re-raised.
+
+    Args:
+        queue: JobQueue or RemoteQueue
+        worker: Worker name recorded with claims (default: worker_id())
+        lease: Lease of a claimed chunk, renewed while it is solved
+        wait: Keep polling while other workers hold chunks, to take over
+            those whose worker is lost
+
+    Returns:
+        Number of chunks completed by this worker
+    """
+    worker = worker or worker_id()
+    simulator = simulator or HVDCSimulator()
+    completed = 0
+
+    while True:
+        claimed = queue.claim(worker, lease)
+        if claimed is None:
+            progress = queue.progress()
+            if wait and progress["running"] + progress["stalled"]:
+                time.sleep(POLL_SECONDS)
+                continue
+            return completed
+
+        chunk = claimed["chunk"]
+        try:
+            with _heartbeat(queue, chunk, worker, lease):
+                columns = simulator.run_batch(claimed["params"], cold_start=True)
+        except Exception as e:
+            queue.release(chunk, worker, error=f"{type(e).__name__}: {e}")
+            continue
+        except BaseException:
+            queue.release(chunk, worker)
+            raise
+
+        queue.complete(chunk, worker, columns)
+        completed += 1
+
+
+def _job_table(db: str) -> JobQueue:
+    """JobQueue of an existing study; only ``create`` makes a new job table"""
+    if not os.path.exists(db):
+        raise FileNotFoundError(f"No job table at {db}")
+    return JobQueue(db)
+
+
+def _open_queue(db: Optional[str], connect: Optional[str]):
+    if connect:
+        host, _, port = connect.rpartition(":")
+        return RemoteQueue(host or "127.0.0.1", int(port))
+    return _job_table(db)
+
+
+def _raise_exit(signum, frame) -> None:
+    """SIGTERM handler: unwind so the claimed chunk is released"""
+    sys.exit(128 + signum)
+
+
+def _worker_process(
+    db: Optional[str], connect: Optional[str], lease: float, wait: bool, completed, index: int
+) -> None:
+    """
+    Worker of ``work --processes``
+
+    Stores its chunk count in completed[index], or WORKER_FAILED after an
+    error; the entry is left unchanged when the worker is interrupted.
+    """
+    signal.signal(signal.SIGTERM, _raise_exit)
+    queue = None
+    try:
+        queue = _open_queue(db, connect)
+        completed[index] = run_worker(queue, lease=lease, wait=wait)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    except Exception as e:
+        completed[index] = WORKER_FAILED
+        print(f"Worker {index} failed: {type(e).__name__}: {e}", file=sys.stderr)
+    finally:
+        if queue is not None:
+            queue.close()
+
+
+def _run_processes(args) -> Optional[int]:
+    """
+    Run ``args.processes`` worker processes until the study is done
+
+    Returns:
+        Chunks completed by all workers, None when one was interrupted
+
+    Raises:
+        RuntimeError: If a worker stopped on an error
+    """
+    # Chunks completed per worker; -1 for a worker that was interrupted
+    counts = multiprocessing.Array("l", [-1] * args.processes)
+    processes = [
+        multiprocessing.Process(
+            target=_worker_process, args=(args.db, args.connect, args.lease, args.wait, counts, i)
+        )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        # Preemption: every worker releases its chunk before exiting
+        for process in processes:
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+    failed = sum(count == WORKER_FAILED for count in counts)
+    if failed:
+        raise RuntimeError(f"{failed} of {len(processes)} worker processes failed")
+    return sum(counts) if min(counts) >= 0 else None
+
+
+def grid(axes: Dict[str, Tuple[float, float, int]], fixed: Optional[Dict[str, float]] = None) -> List[Dict[str, float]]:
+    """Scenarios of a full grid: NAME -> (start, stop, count), the last axis varying fastest"""
+    values = [np.linspace(start, stop, int(count)) for start, stop, count in axes.values()]
+    fixed = dict(fixed or {})
+    return [
+        {**fixed, **{name: float(v) for name, v in zip(axes, point)}}
+        for point in itertools.product(*values)
+    ]
+
+
+def _parse_axis(text: str) -> Tuple[str, Tuple[float, float, int]]:
+    """NAME=START:STOP:COUNT"""
+    try:
+        name, spec = text.split("=", 1)
+        start, stop, count = spec.split(":")
+        return name, (float(start), float(stop), int(count))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=START:STOP:COUNT, got {text!r}")
+
+
+def main():
+    """Main entry point for command-line execution"""
+    parser = argparse.ArgumentParser(description="Checkpointed sweep runner for the HVDC simulator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="Add scenarios to a study")
+    create.add_argument("db", help="Job table (SQLite)")
+    create.add_argument("--params", help="Scenario file: CSV with parameter columns or JSON list")
+    create.add_argument("--grid", type=_parse_axis, action="append", default=[],
+                        help="Grid axis as NAME=START:STOP:COUNT (repeatable)")
+    create.add_argument("--fixed", type=parse_value, action="append", default=[],
+                        help="Constant parameter of the grid as NAME=VALUE (repeatable)")
+    create.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    work = commands.add_parser("work", help="Solve chunks until the study is done")
+    source = work.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", help="Job table reachable from this host")
+    source.add_argument("--connect", help="Coordinator as HOST:PORT")
+    work.add_argument("--processes", type=int, default=1, help="Worker processes on this host")
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="Chunk lease (s)")
+    work.add_argument("--wait", action="store_true",
+                      help="Keep polling while other workers hold chunks, taking over lost ones")
+
+    serve = commands.add_parser("serve", help="Coordinate remote workers over TCP")
+    serve.add_argument("db")
+    serve.add_argument("--host", default="0.0.0.0", help="Address to listen on")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+
+    status = commands.add_parser("status", help="Print chunk counts per status")
+    status.add_argument("db")
+
+    collect = commands.add_parser("collect", help="Concatenate the results of done chunks")
+    collect.add_argument("db")
+    collect.add_argument("output", help="Output file (.npz or .csv)")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "create":
+            scenarios = []
+            if args.params:
+                if args.params.endswith(".json"):
+                    with open(args.params) as f:
+                        scenarios += load_parameter_sets(json.load(f))
+                else:
+                    scenarios += load_parameter_sets(args.params)
+            if args.grid:
+                unknown = [name for name, _ in args.grid + args.fixed if name not in NETWORK_PARAMETERS]
+                if unknown:
+                    parser.error(f"unknown parameters: {', '.join(unknown)}")
+                scenarios += grid(dict(args.grid), dict(args.fixed))
+            if not scenarios:
+                parser.error("create needs --params or --grid")
+            with JobQueue(args.db) as queue:
+                chunks = queue.add(scenarios, args.chunk_size)
+                output = {"scenarios": len(scenarios), "chunks": chunks, **queue.progress()}
+
+        elif args.command == "work":
+            start = time.perf_counter()
+            queue = _open_queue(args.db, args.connect)
+            try:
+                # Fail on a missing job table or coordinator before any worker starts
+                queue.progress()
+                if args.processes > 1:
+                    completed = _run_processes(args)
+                else:
+                    signal.signal(signal.SIGTERM, _raise_exit)
+                    try:
+                        completed = run_worker(queue, lease=args.lease, wait=args.wait)
+                    except (KeyboardInterrupt, SystemExit):
+                        completed = None
+                output = {"completed": completed, "elapsed_s": time.perf_counter() - start, **queue.progress()}
+            finally:
+                queue.close()
+
+        elif args.command == "serve":
+            with _job_table(args.db) as queue, Coordinator(queue, args.host, args.port) as server:
+                print(json.dumps({"success": True, "error": None, "listening": f"{args.host}:{args.port}"}),
+                      file=sys.stderr, flush=True)
+                signal.signal(signal.SIGTERM, _raise_exit)
+                try:
+                    server.serve_forever()
+                except (KeyboardInterrupt, SystemExit):
+                    pass
+                output = queue.progress()
+
+        elif args.command == "status":
+            with _job_table(args.db) as queue:
+                output = queue.progress()
+
+        else:
+            with _job_table(args.db) as queue:
+                columns = queue.collect()
+            if args.output.endswith(".csv"):
+                import csv
+
+                with open(args.output, "w", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(list(columns))
+                    writer.writerows(zip(*(values.tolist() for values in columns.values())))
+            else:
+                np.savez(args.output, **columns)
+            output = {"rows": len(columns.get("chunk", [])), "output": args.output}
+
+    except json.JSONDecodeError as e:
+        print(json.dumps({
+            "success": False,
+            "error": f"Invalid JSON: {str(e)}"
+        }))
+        sys.exit(1)
+
+    except Exception as e:
+        print(json.dumps({
+            "success": False,
+            "error": str(e)
+        }))
+        sys.exit(1)
+
+    print(json.dumps({
+        "success": True,
+        "error": None,
+        "results": output
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Adaptive capability sweep: traversal order, refinement against a dense grid
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandapower")
+
+from adaptive_sweep import STATUS_FAILED, STATUS_OK, AdaptiveSweep, classify, serpentine
+from hvdc_simulator import NETWORK_DEFAULTS
+
+
+def test_serpentine_visits_neighbours():
+    grid = np.array(list(np.ndindex(3, 4, 2)))
+
+    order = serpentine(grid[::-1])
+
+    assert sorted(map(tuple, order)) == sorted(map(tuple, grid))
+    assert (np.abs(np.diff(order, axis=0)).sum(axis=1) == 1).all()
+
+
+def test_refined_map_matches_dense_grid():
+    # Transfers beyond about 2 GW do not converge
+    sweep = AdaptiveSweep({"load_mw": (200.0, 3000.0)}, coarse=3, levels=2, max_workers=1)
+
+    result = sweep.run()
+
+    columns = {name: np.full(sweep.points, value) for name, value in NETWORK_DEFAULTS.items()}
+    columns["load_mw"] = result["axes"]["load_mw"]
+    status, efficiency = classify(columns)
+    np.testing.assert_array_equal(result["status"], status)
+    assert {STATUS_FAILED, STATUS_OK} <= set(status.tolist())
+    assert result["solves"] < result["dense_points"]
+    solved = result["solved"]
+    np.testing.assert_allclose(result["efficiency"][solved], efficiency[solved])
+
+
+def test_import_stays_light():
+    # The sweep needs neither scipy nor the sensitivity model until it solves
+    code = "import sys, adaptive_sweep; print(sorted({'scipy', 'sensitivity', 'pandapower'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
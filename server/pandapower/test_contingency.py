@@ -0,0 +1,53 @@
+"""
+N-1 screening: case listing, restored networks and serial/parallel agreement
+"""
+
+import pytest
+
+pytest.importorskip("pandapower")
+
+from contingency import ContingencyAnalyzer, list_contingencies, rank_violations, solve_contingency
+from hvdc_simulator import HVDCSimulator
+
+
+@pytest.fixture
+def simulator():
+    simulator = HVDCSimulator()
+    simulator.create_network(load_mw=500.0)
+    return simulator
+
+
+def test_lists_in_service_elements(simulator):
+    simulator.net.trafo.at[1, "in_service"] = False
+
+    cases = list_contingencies(simulator.net)
+
+    assert [case["id"] for case in cases] == ["trafo:0", "line:0", "ext_grid:0"]
+    assert cases[1]["name"] == "HVDC Line"
+
+
+def test_outage_is_restored(simulator):
+    limits = {"vm_min_pu": 0.9, "vm_max_pu": 1.1, "max_loading_percent": 100.0}
+    case = list_contingencies(simulator.net, ["line"])[0]
+
+    row = solve_contingency(simulator.net, case, limits)
+
+    assert row["id"] == "line:0" and row["isolated_buses"] > 0
+    assert simulator.net.line["in_service"].all()
+    assert solve_contingency(simulator.net, None, limits)["severity"] == 0.0
+
+
+def test_parallel_run_matches_serial(simulator):
+    serial = ContingencyAnalyzer(simulator, max_workers=1).run()
+    parallel = ContingencyAnalyzer(simulator, max_workers=2).run()
+
+    strip = lambda rows: [{k: v for k, v in row.items() if k != "error"} for row in rows]
+    assert strip(parallel["contingencies"]) == strip(serial["contingencies"])
+    assert parallel["violations"] == serial["violations"] == len(serial["contingencies"])
+
+
+def test_ranking_puts_diverged_cases_first():
+    rows = [{"id": "b", "severity": 0.2}, {"id": "a", "severity": float("inf")},
+            {"id": "c", "severity": 0.2}, {"id": "d", "severity": 0.0}]
+
+    assert [row["id"] for row in rank_violations(rows)] == ["a", "b", "c", "d"]
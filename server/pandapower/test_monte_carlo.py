@@ -0,0 +1,58 @@
+"""
+Monte Carlo analysis: reproducibility, early stopping and running statistics
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandapower")
+
+from monte_carlo import MonteCarloAnalyzer, RunningStatistics
+
+BASE = {"load_mw": 500.0}
+
+
+def estimates(**settings):
+    analyzer = MonteCarloAnalyzer(n_samples=24, chunk_size=4, max_workers=2, min_samples=8, **settings)
+    return list(analyzer.iter_estimates(BASE))
+
+
+def test_seeded_runs_repeat():
+    first = estimates(seed=7, tolerance=0.0)
+    second = estimates(seed=7, tolerance=0.0)
+
+    # Warm-started solves depend on which worker solved what before, so the
+    # outputs agree to the power flow tolerance rather than bit for bit
+    assert [run["samples"] for run in first] == [run["samples"] for run in second]
+    for a, b in zip(first, second):
+        assert a["IFF"] == pytest.approx(b["IFF"], rel=1e-9)
+        assert a["variance"] == pytest.approx(b["variance"], rel=1e-6)
+    assert first[-1]["interval95"] == pytest.approx(second[-1]["interval95"], rel=1e-9)
+    assert first[-1]["IFF"] != pytest.approx(estimates(seed=8, tolerance=0.0)[-1]["IFF"], rel=1e-6)
+
+
+def test_interval_only_on_final_estimate():
+    runs = estimates(seed=1, tolerance=0.0)
+
+    assert [run["samples"] for run in runs] == list(range(4, 25, 4))
+    assert all(run["interval95"] is None for run in runs[:-1])
+    low, high = runs[-1]["interval95"]
+    assert low <= runs[-1]["IFF"] <= high
+
+
+def test_early_stop_reports_interval():
+    runs = estimates(seed=1, tolerance=1.0)
+
+    assert len(runs) == 2 and runs[-1]["converged"]
+    assert runs[-1]["interval95"] is not None
+
+
+def test_running_statistics_match_batch():
+    values = np.random.default_rng(0).normal(0.9, 0.05, 103)
+    stats = RunningStatistics()
+    for chunk in np.array_split(values, 7):
+        stats.update(chunk)
+
+    assert stats.count == values.size
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.variance == pytest.approx(values.var(ddof=1))
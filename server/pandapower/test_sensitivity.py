@@ -0,0 +1,68 @@
+"""
+Linearized sensitivities: analytic gradients, estimates and fallback solves
+"""
+
+import pytest
+
+pytest.importorskip("pandapower")
+
+from hvdc_simulator import RESULT_FIELDS, HVDCSimulator
+from sensitivity import PARAMETERS, SensitivityModel
+
+BASE = {"load_mw": 400.0, "ac1_vm_pu": 1.0}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return SensitivityModel(**BASE)
+
+
+def _solve(**params):
+    simulator = HVDCSimulator()
+    simulator.create_network(**{**BASE, **params})
+    result = simulator.run_simulation()
+    assert result["success"]
+    return result["results"]
+
+
+@pytest.mark.parametrize("parameter, step", [("load_mw", 1.0), ("ac1_vm_pu", 1e-4)])
+def test_gradients_match_differences_of_full_solves(model, parameter, step):
+    upper = _solve(**{parameter: BASE[parameter] + step})
+    lower = _solve(**{parameter: BASE[parameter] - step})
+
+    gradients = model.gradients()[parameter]
+    for field in RESULT_FIELDS:
+        expected = (upper[field] - lower[field]) / (2 * step)
+        assert gradients[field] == pytest.approx(expected, rel=1e-3, abs=1e-5), field
+
+
+def test_estimates_match_pandapower_inside_trust_region(model):
+    query = {"load_mw": 410.0, "ac1_vm_pu": 1.005}
+
+    estimate = model.estimate(recenter=False, **query)
+    solved = _solve(**query)
+
+    assert estimate["linearized"]
+    for field in RESULT_FIELDS:
+        assert estimate["results"][field] == pytest.approx(solved[field], rel=1e-3), field
+
+
+def test_batch_solves_queries_outside_trust_region(model):
+    out = model.estimate_batch({"load_mw": [405.0, 600.0]})
+
+    assert out["linearized"].tolist() == [True, False]
+    assert out["success"].all()
+    assert out["totalLoad"][1] == pytest.approx(600.0)
+    assert model.params["load_mw"] == BASE["load_mw"]
+
+
+def test_recenters_on_a_full_solve():
+    model = SensitivityModel(**BASE)
+
+    result = model.estimate(load_mw=600.0)
+
+    assert not result["linearized"] and result["success"]
+    assert model.params["load_mw"] == 600.0
+    assert model.estimate(load_mw=605.0)["linearized"]
+    assert set(model.gradients()) == set(PARAMETERS)
+
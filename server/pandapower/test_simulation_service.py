@@ -0,0 +1,149 @@
+"""
+Simulation service: validation, per-request errors, queue slots and WebSocket limits
+"""
+
+import asyncio
+import struct
+
+import pytest
+
+pytest.importorskip("pandapower")
+
+import simulation_service
+from simulation_service import SimulationService, normalize_params
+
+
+@pytest.fixture
+def service():
+    service = SimulationService(max_workers=1, max_pending=4)
+    yield service
+    service.close()
+
+
+@pytest.mark.parametrize("params", [
+    {"load_mw": None}, {"load_mw": [1]}, {"load_mw": True}, {"load_mw": "x"}, {"load_mw": "nan"},
+    {"solver": "direct"}, [],
+])
+def test_rejects_invalid_parameters(params):
+    with pytest.raises(ValueError):
+        normalize_params(params)
+
+
+def test_status_codes(service):
+    async def scenario():
+        ok = await service._dispatch("GET", "/simulate?load_mw=400", b"")
+        invalid = await service._dispatch("POST", "/simulate", b'{"load_mw": null}')
+        service._pool.shutdown()
+        broken = await service._dispatch("POST", "/simulate", b'{"load_mw": 500}')
+        return ok, invalid, broken
+
+    (ok, result), (invalid, _), (broken, error) = asyncio.run(scenario())
+
+    assert ok == 200 and result["success"]
+    assert invalid == 400
+    assert broken == 500 and not error["success"]
+    assert service.stats()["pending"] == 0
+
+
+def test_failed_build_is_reported_per_request(monkeypatch):
+    original = simulation_service.HVDCSimulator.create_network
+
+    def create_network(self, **params):
+        if params.get("load_mw") == 13.0:
+            raise RuntimeError("bad operating point")
+        return original(self, **params)
+
+    # Patched before the pool is forked, so the workers see it too
+    monkeypatch.setattr(simulation_service.HVDCSimulator, "create_network", create_network)
+    service = SimulationService(max_workers=1)
+    try:
+        async def scenario():
+            return await service.simulate({"load_mw": 13}), await service.simulate({"load_mw": 400})
+
+        failed, solved = asyncio.run(scenario())
+    finally:
+        service.close()
+
+    assert not failed["success"] and "bad operating point" in failed["error"]
+    assert solved["success"]
+
+
+def test_cancelled_request_keeps_slot_until_solved(service):
+    async def scenario():
+        request = asyncio.create_task(service.simulate({"load_mw": 450}))
+        await asyncio.sleep(0.05)
+        request.cancel()
+        await asyncio.sleep(0)
+        during = service.stats()["pending"]
+        while service._in_flight:
+            await asyncio.sleep(0.01)
+        return during, service.stats()["pending"]
+
+    during, after = asyncio.run(scenario())
+
+    assert (during, after) == (1, 0)
+
+
+UPGRADE = (b"GET /stream HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+           b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n")
+
+
+def exchange(service, request, frames=b"", until=None):
+    """Send a request (and frames after a 101 answer); return the answer and what follows"""
+    async def scenario():
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        head = await reader.readuntil(b"\r\n\r\n")
+        if head.startswith(b"HTTP/1.1 101"):
+            writer.write(frames)
+            await writer.drain()
+        rest = await (reader.readuntil(until) if until else reader.read())
+        writer.close()
+        server.close()
+        return head, rest
+
+    return asyncio.run(scenario())
+
+
+def masked(first, payload):
+    """Client frame with a zero mask"""
+    return struct.pack(">BB", first, 0x80 | len(payload)) + b"\0\0\0\0" + payload
+
+
+@pytest.mark.parametrize("frames", [
+    # One text frame announcing a 4 KiB payload
+    struct.pack(">BBH", 0x81, 0x80 | 126, 4096) + b"\0\0\0\0",
+    # Small fragments that only together exceed the limit
+    masked(0x01, b"x" * 100) + b"".join(masked(0x00, b"x" * 100) for _ in range(20)),
+])
+def test_oversized_websocket_message_is_closed_with_1009(service, monkeypatch, frames):
+    monkeypatch.setattr(simulation_service, "MAX_BODY_BYTES", 1024)
+
+    handshake, frame = exchange(service, UPGRADE, frames)
+
+    assert handshake.startswith(b"HTTP/1.1 101")
+    assert frame[0] == 0x88
+    assert struct.unpack(">H", frame[2:4])[0] == 1009
+    assert b"HTTP/1.1 413" not in frame
+
+
+def test_fragmented_websocket_message_within_limit_is_answered(service, monkeypatch):
+    monkeypatch.setattr(simulation_service, "MAX_BODY_BYTES", 1024)
+    message = b'{"id": 7, "params": {"load_mw": 400}}'
+    frames = masked(0x01, message[:10]) + masked(0x89, b"ping") + masked(0x80, message[10:])
+
+    _, rest = exchange(service, UPGRADE, frames, until=b"}}")
+
+    assert rest.startswith(b"\x8a\x04ping")
+    assert b'"id": 7' in rest and b'"success": true' in rest
+
+
+def test_upgrade_without_key_is_rejected(service):
+    request = UPGRADE.replace(b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n", b"")
+
+    head, body = exchange(service, request)
+
+    assert head.startswith(b"HTTP/1.1 400")
+    assert b"Sec-WebSocket-Key" in body
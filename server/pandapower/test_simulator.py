@@ -0,0 +1,77 @@
+"""
+End-to-end runs of HVDCSimulator: build the network, solve it, report
+"""
+
+import argparse
+import inspect
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pandapower")
+
+from hvdc_simulator import NETWORK_DEFAULTS, NETWORK_PARAMETERS, HVDCSimulator, parse_range, parse_value
+
+
+@pytest.mark.parametrize("load_mw", [100.0, 500.0, 1000.0])
+def test_create_and_run(load_mw):
+    simulator = HVDCSimulator()
+    simulator.create_network(load_mw=load_mw)
+    result = simulator.run_simulation()
+
+    assert result["success"], result["error"]
+    results = result["results"]
+    assert results["totalLoad"] == pytest.approx(load_mw)
+    assert 0.0 < results["losses"] < 0.1 * load_mw
+    assert 90.0 < results["efficiency"] < 100.0
+
+
+@pytest.mark.parametrize("load_mw, ac1_vm_pu", [(100.0, 1.0), (700.0, 0.98), (1200.0, 1.03)])
+def test_fast_solver_matches_pandapower(load_mw, ac1_vm_pu):
+    simulator = HVDCSimulator()
+    # Calibrate the fast solver at another operating point first
+    simulator.create_network(load_mw=400.0)
+    assert simulator.run_simulation(solver="fast", instrument=True)["telemetry"]["iterations"] == 0
+
+    simulator.create_network(load_mw=load_mw, ac1_vm_pu=ac1_vm_pu)
+    fast = simulator.run_simulation(solver="fast", instrument=True)
+    reference = simulator.run_simulation()["results"]
+
+    assert fast["telemetry"]["iterations"] > 0
+    for name, value in reference.items():
+        assert fast["results"][name] == pytest.approx(value, rel=1e-6)
+
+
+def test_network_defaults_follow_create_network():
+    signature = inspect.signature(HVDCSimulator.create_network)
+
+    assert set(NETWORK_DEFAULTS) == set(NETWORK_PARAMETERS)
+    for name, value in NETWORK_DEFAULTS.items():
+        assert signature.parameters[name].default == value
+
+
+def test_cli_parsers():
+    assert parse_range("load_mw=100:1100") == ("load_mw", (100.0, 1100.0))
+    assert parse_value("ac1_vm_pu=1.02") == ("ac1_vm_pu", 1.02)
+    for parser, text in [(parse_range, "load_mw=100"), (parse_range, "load_mw"), (parse_value, "load_mw=x")]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parser(text)
+
+
+def test_spawned_workers_import_this_module():
+    # Unpickling the class in a spawned worker imports hvdc_simulator by name
+    # with the parent's sys.path, which must not resolve to server/hvdc_simulator.py
+    # (the pool then never answers, hence the timeout)
+    code = (
+        "import inspect, multiprocessing, hvdc_simulator\n"
+        "with multiprocessing.get_context('spawn').Pool(1) as pool:\n"
+        "    task = pool.apply_async(inspect.getfile, (hvdc_simulator.HVDCSimulator,))\n"
+        "    print(task.get(timeout=60))\n"
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=here)
+
+    assert result.returncode == 0, result.stderr
+    assert os.path.dirname(os.path.abspath(result.stdout.strip())) == here
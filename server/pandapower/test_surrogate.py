@@ -0,0 +1,75 @@
+"""
+Polynomial surrogate: fit and artifacts, check seeding and the CLI output
+"""
+
+import json
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandapower")
+
+import surrogate
+from surrogate import Surrogate, check_seed, train
+
+BOX = {"load_mw": (200.0, 600.0), "ac1_vm_pu": (0.98, 1.02)}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return train(BOX, samples=40, degree=2, seed=3)
+
+
+def run_main(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", ["surrogate.py", *args])
+    code = 0
+    try:
+        surrogate.main()
+    except SystemExit as e:
+        code = e.code
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_saved_model_predicts_like_the_original(model, tmp_path):
+    path = tmp_path / "model.npz"
+    model.save(path)
+    loaded = Surrogate.load(path)
+
+    points = {"load_mw": [300.0, 500.0, 700.0], "ac1_vm_pu": 1.0}
+    expected = model.predict(points)
+    predicted = loaded.predict(points)
+
+    assert loaded.box == model.box and loaded.metadata == model.metadata
+    for name, values in expected.items():
+        np.testing.assert_array_equal(predicted[name], values)
+    assert np.isnan(predicted["losses"][2])
+    assert model.check(10, seed=1)["passed"]
+
+
+def test_check_seed_is_independent_of_training_seed():
+    training = np.random.default_rng(5).random(8)
+
+    first = np.random.default_rng(check_seed(5)).random(8)
+    second = np.random.default_rng(check_seed(5)).random(8)
+
+    np.testing.assert_array_equal(first, second)
+    assert not np.isclose(first[:, None], training[None, :]).any()
+
+
+def test_cli_reports_unbounded_errors_as_null(model, tmp_path, monkeypatch, capsys):
+    path = tmp_path / "model.npz"
+    Surrogate(model.box, model.exponents, model.coefficients, model.outputs, {}).save(path)
+
+    code, output = run_main(monkeypatch, capsys, "check", str(path), "--samples", "3", "--seed", "0")
+
+    assert code == 0 and output["success"] and output["error"] is None
+    assert output["results"]["outputs"]["losses"]["bound"] is None
+    assert output["results"]["passed"]
+
+
+def test_cli_wraps_errors(tmp_path, monkeypatch, capsys):
+    code, output = run_main(monkeypatch, capsys, "info", str(tmp_path / "missing.npz"))
+
+    assert code == 1
+    assert output["success"] is False and "missing.npz" in output["error"]
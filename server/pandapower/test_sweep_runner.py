@@ -0,0 +1,207 @@
+"""
+Sweep job queue: claims and leases, completion, the coordinator and the CLI
+"""
+
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandapower")
+
+import sweep_runner
+from sweep_runner import Coordinator, JobQueue, RemoteQueue, run_worker
+
+SCENARIOS = [{"load_mw": load} for load in (200.0, 300.0, 400.0, 500.0, 600.0)]
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sweep_runner.py")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    with JobQueue(tmp_path / "study.sqlite", max_attempts=2) as queue:
+        queue.add(SCENARIOS, chunk_size=2)
+        yield queue
+
+
+@pytest.fixture
+def coordinator(queue):
+    server = Coordinator(queue, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run_main(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", ["sweep_runner.py", *args])
+    code = 0
+    try:
+        sweep_runner.main()
+    except SystemExit as e:
+        code = e.code
+    return code, json.loads(capsys.readouterr().out)
+
+
+def work(db, *args):
+    return subprocess.Popen(
+        [sys.executable, SCRIPT, "work", "--db", str(db), *args],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+
+
+def columns(n):
+    return {"success": np.ones(n, dtype=bool), "losses": np.arange(n, dtype=float)}
+
+
+def test_claims_take_chunks_in_order(queue):
+    first = queue.claim("a")
+    second = queue.claim("b")
+
+    assert (first["chunk"], second["chunk"]) == (1, 2)
+    assert first["params"] == SCENARIOS[:2]
+    assert queue.progress()["running"] == 2 and queue.progress()["pending"] == 1
+
+
+def test_expired_lease_is_claimed_again(queue):
+    chunk = queue.claim("a", lease=-1.0)["chunk"]
+    assert queue.progress()["stalled"] == 1
+
+    assert queue.claim("b")["chunk"] == chunk
+    assert not queue.renew(chunk, "a")
+    assert queue.renew(chunk, "b")
+
+
+def test_release_counts_attempts_only_with_an_error(queue):
+    chunk = queue.claim("a")["chunk"]
+    assert queue.release(chunk, "a")
+    assert not queue.release(chunk, "a")
+
+    for _ in range(2):
+        assert queue.claim("a")["chunk"] == chunk
+        queue.release(chunk, "a", error="RuntimeError: boom")
+
+    # The third chunk-1 claim would exceed max_attempts: the chunk fails
+    assert queue.claim("a")["chunk"] == 2
+    assert queue.progress()["failed"] == 1
+
+
+def test_complete_keeps_the_first_result(queue):
+    chunk = queue.claim("a", lease=-1.0)["chunk"]
+    assert queue.claim("b")["chunk"] == chunk
+
+    assert queue.complete(chunk, "b", columns(2))
+    assert not queue.complete(chunk, "a", {"success": np.zeros(2, dtype=bool), "losses": [9.0, 9.0]})
+
+    collected = queue.collect()
+    np.testing.assert_array_equal(collected["losses"], [0.0, 1.0])
+    np.testing.assert_array_equal(collected["chunk"], [chunk, chunk])
+    assert queue.progress()["done"] == 1
+
+
+def test_coordinator_answers_a_resent_request_once(queue, coordinator):
+    def send(request):
+        with socket.create_connection(coordinator.server_address) as sock, sock.makefile("rwb") as f:
+            f.write(json.dumps(request).encode() + b"\n")
+            f.flush()
+            return json.loads(f.readline())
+
+    first = send({"op": "claim", "id": "r1", "worker": "a"})
+    again = send({"op": "claim", "id": "r1", "worker": "a"})
+    other = send({"op": "claim", "id": "r2", "worker": "a"})
+
+    assert first == again and first["result"]["chunk"] == 1
+    assert other["result"]["chunk"] == 2
+    assert queue.progress()["running"] == 2
+    assert send({"op": "drop", "id": "r3"})["error"] == "Unknown operation: drop"
+
+
+def test_remote_worker_completes_the_study(queue, coordinator):
+    remote = RemoteQueue(*coordinator.server_address)
+    try:
+        assert run_worker(remote) == 3
+    finally:
+        remote.close()
+
+    collected = queue.collect()
+    assert collected["success"].all()
+    np.testing.assert_allclose(collected["totalLoad"], [s["load_mw"] for s in SCENARIOS])
+
+
+def test_work_reports_chunks_completed_by_all_processes(tmp_path):
+    db = tmp_path / "study.sqlite"
+    with JobQueue(db) as queue:
+        queue.add(SCENARIOS, chunk_size=1)
+
+    stdout, stderr = work(db, "--processes", "2").communicate()
+
+    output = json.loads(stdout.strip().splitlines()[-1])
+    assert output["success"], stderr
+    assert output["results"]["completed"] == output["results"]["done"] == len(SCENARIOS)
+
+
+def test_sigterm_releases_the_chunk_and_a_second_worker_resumes(tmp_path):
+    db = tmp_path / "study.sqlite"
+    with JobQueue(db) as queue:
+        queue.add([{"load_mw": 200.0 + i} for i in range(120)], chunk_size=30)
+
+    first = work(db)
+    table = sqlite3.connect(str(db), timeout=60)
+    deadline = time.monotonic() + 120
+    # Stop the worker in the middle of a chunk after it finished another
+    while True:
+        assert first.poll() is None and time.monotonic() < deadline
+        statuses = dict(table.execute("SELECT status, COUNT(*) FROM chunks GROUP BY status").fetchall())
+        if statuses.get("done") and statuses.get("running"):
+            break
+        time.sleep(0.05)
+    interrupted = table.execute("SELECT id FROM chunks WHERE status = 'running'").fetchone()[0]
+    first.send_signal(signal.SIGTERM)
+    stdout, stderr = first.communicate(timeout=60)
+
+    output = json.loads(stdout)
+    assert output["success"] and output["results"]["completed"] is None, stderr
+    assert table.execute("SELECT status, attempts, worker FROM chunks WHERE id = ?",
+                         (interrupted,)).fetchone() == ("pending", 0, None)
+    remaining = output["results"]["pending"]
+    assert remaining and output["results"]["running"] == 0
+
+    stdout, stderr = work(db).communicate(timeout=300)
+
+    output = json.loads(stdout)
+    assert output["success"], stderr
+    assert output["results"]["completed"] == remaining
+    assert output["results"]["done"] == output["results"]["total"] == 4
+    table.close()
+
+
+@pytest.mark.parametrize("command", ["collect", "status", "work"])
+def test_cli_reports_a_missing_job_table(tmp_path, monkeypatch, capsys, command):
+    db = tmp_path / "missing.sqlite"
+    args = {"collect": [str(db), str(tmp_path / "out.npz")], "status": [str(db)], "work": ["--db", str(db)]}
+
+    code, output = run_main(monkeypatch, capsys, command, *args[command])
+
+    assert code == 1
+    assert output["success"] is False and "missing.sqlite" in output["error"]
+    assert not db.exists()
+
+
+def test_cli_reports_an_unreachable_coordinator(monkeypatch, capsys):
+    monkeypatch.setattr(sweep_runner, "RECONNECT_SECONDS", 0.0)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    code, output = run_main(monkeypatch, capsys, "work", "--connect", f"127.0.0.1:{port}")
+
+    assert code == 1
+    assert output["success"] is False and f"127.0.0.1:{port} unreachable" in output["error"]
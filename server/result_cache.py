@@ -0,0 +1,143 @@
+"""
+Simulation Result Cache
+Memoizes power flow results keyed by a quantized operating point
+
+Operating points closer than the configured tolerance share a cache entry.
+Entries are evicted least-recently-used beyond ``max_size`` and expire after
+``ttl`` seconds. An optional SQLite file keeps results across worker restarts.
+Results are copied in and out, so callers may modify what they get back.
+"""
+
+import copy
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Size-bounded LRU/TTL cache of simulation results"""
+
+    def __init__(self, defaults, tolerance=1e-3, max_size=1024, ttl=None, path=None):
+        """
+        Args:
+            defaults: Parameter names and their default values; only these
+                parameters take part in the key
+            tolerance: Quantization step, either one value for all parameters
+                or a dict per parameter name
+            max_size: Maximum number of entries kept in memory and on disk
+            ttl: Entry lifetime in seconds (None keeps entries until evicted)
+            path: SQLite file used as persistent backing store
+        """
+        self.defaults = dict(defaults)
+        if isinstance(tolerance, dict):
+            self.tolerance = {name: tolerance.get(name, 1e-3) for name in self.defaults}
+        else:
+            self.tolerance = {name: tolerance for name in self.defaults}
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, created REAL NOT NULL, result TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def key(self, params, *extra):
+        """
+        Quantized cache key for a parameter dictionary
+
+        Args:
+            params: Simulation parameters (missing ones take their default)
+            extra: Additional hashable key parts, e.g. the solver name
+        """
+        params = params if isinstance(params, dict) else {}
+        quantized = tuple(
+            int(math.floor(float(params.get(name, default)) / self.tolerance[name] + 0.5))
+            for name, default in self.defaults.items()
+        )
+        return quantized + tuple(extra)
+
+    def get(self, key):
+        """Return a copy of the cached result for ``key``, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, result = entry
+                if self._expired(created, now):
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(result)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, result FROM results WHERE key = ?", (json.dumps(key),)
+                ).fetchone()
+                if row is not None and not self._expired(row[0], now):
+                    self._store(key, row[0], json.loads(row[1]))
+                    self.hits += 1
+                    return json.loads(row[1])
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        """Store a result; with a backing store it is written through to disk"""
+        created = time.time()
+        with self._lock:
+            self._store(key, created, copy.deepcopy(result))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, created, result) VALUES (?, ?, ?)",
+                    (json.dumps(key), created, json.dumps(result)),
+                )
+                self._db.execute(
+                    "DELETE FROM results WHERE key NOT IN "
+                    "(SELECT key FROM results ORDER BY created DESC LIMIT ?)",
+                    (self.max_size,),
+                )
+                self._db.commit()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+        }
+
+    def clear(self):
+        """Drop all entries, including the backing store"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def _store(self, key, created, result):
+        self._entries[key] = (created, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
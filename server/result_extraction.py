@@ -0,0 +1,239 @@
+"""
+Vectorized Result Extraction for the Back-to-Back HVDC Network
+Reads the pandapower result tables once as NumPy arrays and derives the
+station metrics used by hvdc_simulator.py and HVDCSimulator
+
+read_results() takes one contiguous array per needed column instead of a
+.loc lookup per value. compute_metrics() works on those arrays, or on the
+stack_results() arrays of many runs, with an optional leading run axis.
+"""
+
+import numpy as np
+
+# Bus positions in creation order: AC 1, AC 2, DC rectifier, DC inverter
+DEFAULT_BUSES = (0, 1, 2, 3)
+# Transformer positions: rectifier, inverter
+DEFAULT_TRAFOS = (0, 1)
+
+# layout() of any network built from an empty net in the default order
+DEFAULT_LAYOUT = {"bus": np.array(DEFAULT_BUSES), "trafo": np.array(DEFAULT_TRAFOS)}
+
+
+def layout(net, buses=DEFAULT_BUSES, trafos=DEFAULT_TRAFOS):
+    """
+    Array positions of the back-to-back elements in the result tables
+
+    The positions only change with the topology, so callers compute them
+    once per network.
+
+    Args:
+        net: pandapower network
+        buses: Bus indices of AC 1, AC 2, DC rectifier and DC inverter
+        trafos: Transformer indices of the rectifier and inverter
+    """
+    return {
+        "bus": net.bus.index.get_indexer(list(buses)),
+        "trafo": net.trafo.index.get_indexer(list(trafos)),
+    }
+
+
+def read_results(net, copy=False):
+    """
+    Result columns of a solved network as NumPy arrays
+
+    Args:
+        copy: Return copies that stay valid after the next solve of ``net``
+    """
+    res_trafo = net.res_trafo
+    arrays = {
+        "vn_kv": net.bus["vn_kv"].values,
+        "vm_pu": net.res_bus["vm_pu"].values,
+        "trafo_p_hv_mw": res_trafo["p_hv_mw"].values,
+        "trafo_q_hv_mvar": res_trafo["q_hv_mvar"].values,
+        "trafo_p_lv_mw": res_trafo["p_lv_mw"].values,
+        "trafo_pl_mw": res_trafo["pl_mw"].values,
+    }
+    if copy:
+        arrays = {name: np.array(values, dtype=float) for name, values in arrays.items()}
+    return arrays
+
+
+def from_solution(solution, vn_kv):
+    """
+    read_results() layout of a DCLinkSolver solution, without touching the net tables
+
+    Args:
+        vn_kv: Nominal bus voltages in net.bus order (DCLinkSolver.vn_kv)
+    """
+    trafo = solution["trafo"]
+    return {
+        "vn_kv": vn_kv,
+        "vm_pu": solution["vm_pu"],
+        "trafo_p_hv_mw": trafo["p_from_mw"],
+        "trafo_q_hv_mvar": trafo["q_from_mvar"],
+        "trafo_p_lv_mw": trafo["p_to_mw"],
+        "trafo_pl_mw": trafo["pl_mw"],
+    }
+
+
+def stack_results(snapshots):
+    """
+    Stack read_results() snapshots of many runs along a leading axis
+
+    ``None`` entries (failed runs) become NaN rows. Returns None when no run
+    succeeded.
+    """
+    template = next((s for s in snapshots if s is not None), None)
+    if template is None:
+        return None
+
+    stacked = {}
+    for name, values in template.items():
+        blank = np.full(np.shape(values), np.nan)
+        stacked[name] = np.stack([blank if s is None else s[name] for s in snapshots])
+    return stacked
+
+
+def _ratio(numerator, denominator, scale=100.0):
+    """scale * numerator / denominator, 0 where the denominator is not positive"""
+    denominator = np.asarray(denominator, dtype=float)
+    # NaN denominators (failed runs) stay NaN
+    out = np.where(np.isnan(denominator), np.nan, 0.0)
+    np.divide(np.multiply(numerator, scale), denominator, out=out, where=denominator > 0)
+    return out
+
+
+def compute_metrics(arrays, positions, load_mw):
+    """
+    Station voltages, flows, losses, efficiencies and DC current
+
+    Args:
+        arrays: read_results() / from_solution() arrays, optionally stacked
+        positions: layout() of the network
+        load_mw: Load set-point (scalar or one value per stacked run)
+
+    Returns:
+        Dictionary of arrays with the shape of the leading run axis
+        (0-d for a single run)
+    """
+    bus = positions["bus"]
+    trafo = positions["trafo"]
+
+    vm = arrays["vm_pu"][..., bus]
+    kv = arrays["vn_kv"][..., bus]
+    p_hv = arrays["trafo_p_hv_mw"][..., trafo]
+    q_hv = arrays["trafo_q_hv_mvar"][..., trafo]
+    p_lv = arrays["trafo_p_lv_mw"][..., trafo]
+    pl = arrays["trafo_pl_mw"][..., trafo]
+    load_mw = np.asarray(load_mw, dtype=float)
+
+    # Power into the DC rectifier and out of the DC inverter
+    p_rect = np.abs(p_lv[..., 0])
+    p_inv = np.abs(p_hv[..., 1])
+    loss_rect = p_rect - p_inv  # Rectifier losses
+    loss_inv = p_inv - load_mw  # Inverter + line losses
+
+    dc_kv = kv[..., 2]
+    return {
+        "vm_ac1_pu": vm[..., 0],
+        "vm_ac2_pu": vm[..., 1],
+        "vm_dc_rect_pu": vm[..., 2],
+        "vm_dc_inv_pu": vm[..., 3],
+        "ac1_kv": kv[..., 0] * vm[..., 0],
+        "ac2_kv": kv[..., 1] * vm[..., 1],
+        "dc_rect_kv": dc_kv * vm[..., 2],
+        "dc_inv_kv": kv[..., 3] * vm[..., 3],
+        "rect_trafo_p_mw": p_hv[..., 0],
+        "rect_trafo_q_mvar": q_hv[..., 0],
+        "inv_trafo_p_mw": p_hv[..., 1],
+        "inv_trafo_q_mvar": q_hv[..., 1],
+        "rect_trafo_loss_mw": pl[..., 0],
+        "inv_trafo_loss_mw": pl[..., 1],
+        "trafo_loss_mw": pl[..., 0] + pl[..., 1],
+        "p_rect_mw": p_rect,
+        "p_inv_mw": p_inv,
+        "load_mw": np.broadcast_to(load_mw, p_rect.shape),
+        "rect_loss_mw": loss_rect,
+        "inv_loss_mw": loss_inv,
+        "converter_loss_mw": loss_rect + loss_inv,
+        "efficiency": _ratio(load_mw, p_rect),
+        "rect_efficiency": _ratio(p_rect - loss_rect, p_rect),
+        "inv_efficiency": _ratio(p_inv - loss_inv, p_inv),
+        # I = P / V
+        "dc_current_a": _ratio(p_rect, dc_kv * vm[..., 2], scale=1000.0),
+    }
+
+
+def _ratio_derivative(numerator, d_numerator, denominator, d_denominator, scale=100.0):
+    """Derivative of _ratio() for one run, along the trailing axis of the d_ arrays"""
+    if not denominator > 0:
+        return np.zeros(np.shape(d_numerator))
+    return scale * (d_numerator * denominator - numerator * d_denominator) / denominator ** 2
+
+
+def metric_derivatives(arrays, derivatives, positions, load_mw, load_derivative):
+    """
+    Derivatives of compute_metrics() of one run along changes of its inputs
+
+    Args:
+        arrays: read_results() / from_solution() arrays of a single run
+        derivatives: The same entries except vn_kv (nominal voltages do not
+            change), each with a trailing axis of directions
+        positions: layout() of the network
+        load_mw: Load set-point of the run
+        load_derivative: Load change along each direction
+
+    Returns:
+        Dictionary with the compute_metrics() keys, one value per direction
+    """
+    bus = positions["bus"]
+    trafo = positions["trafo"]
+
+    vm = arrays["vm_pu"][bus]
+    kv = arrays["vn_kv"][bus]
+    p_hv = arrays["trafo_p_hv_mw"][trafo]
+    p_lv = arrays["trafo_p_lv_mw"][trafo]
+    d_vm = derivatives["vm_pu"][bus]
+    d_p_hv = derivatives["trafo_p_hv_mw"][trafo]
+    d_q_hv = derivatives["trafo_q_hv_mvar"][trafo]
+    d_p_lv = derivatives["trafo_p_lv_mw"][trafo]
+    d_pl = derivatives["trafo_pl_mw"][trafo]
+    load_mw = float(load_mw)
+    d_load = np.asarray(load_derivative, dtype=float)
+
+    p_rect = abs(p_lv[0])
+    p_inv = abs(p_hv[1])
+    d_p_rect = np.sign(p_lv[0]) * d_p_lv[0]
+    d_p_inv = np.sign(p_hv[1]) * d_p_hv[1]
+    d_loss_rect = d_p_rect - d_p_inv
+    d_loss_inv = d_p_inv - d_load
+
+    dc_kv = kv[2]
+    return {
+        "vm_ac1_pu": d_vm[0],
+        "vm_ac2_pu": d_vm[1],
+        "vm_dc_rect_pu": d_vm[2],
+        "vm_dc_inv_pu": d_vm[3],
+        "ac1_kv": kv[0] * d_vm[0],
+        "ac2_kv": kv[1] * d_vm[1],
+        "dc_rect_kv": dc_kv * d_vm[2],
+        "dc_inv_kv": kv[3] * d_vm[3],
+        "rect_trafo_p_mw": d_p_hv[0],
+        "rect_trafo_q_mvar": d_q_hv[0],
+        "inv_trafo_p_mw": d_p_hv[1],
+        "inv_trafo_q_mvar": d_q_hv[1],
+        "rect_trafo_loss_mw": d_pl[0],
+        "inv_trafo_loss_mw": d_pl[1],
+        "trafo_loss_mw": d_pl[0] + d_pl[1],
+        "p_rect_mw": d_p_rect,
+        "p_inv_mw": d_p_inv,
+        "load_mw": d_load,
+        "rect_loss_mw": d_loss_rect,
+        "inv_loss_mw": d_loss_inv,
+        "converter_loss_mw": d_loss_rect + d_loss_inv,
+        "efficiency": _ratio_derivative(load_mw, d_load, p_rect, d_p_rect),
+        # rect_efficiency is p_inv / p_rect, inv_efficiency is load / p_inv
+        "rect_efficiency": _ratio_derivative(p_inv, d_p_inv, p_rect, d_p_rect),
+        "inv_efficiency": _ratio_derivative(load_mw, d_load, p_inv, d_p_inv),
+        "dc_current_a": _ratio_derivative(p_rect, d_p_rect, dc_kv * vm[2], dc_kv * d_vm[2], scale=1000.0),
+    }
@@ -0,0 +1,236 @@
+"""
+Shared Sample Ring Buffer
+Fixed-layout ring of float64 samples in a memory-mapped file
+
+The simulator appends the numeric results of every solve; readers in other
+processes map the same file and get NumPy views of the latest samples
+without parsing or copying anything. Place the file on /dev/shm for a ring
+that lives in RAM only.
+
+Layout (little-endian):
+    header      magic, capacity, field count, length of the name block and
+                the sequence counter (number of samples ever appended)
+    names       JSON list of the field names, padded to 8 bytes
+    data        float64[2 * (capacity + 1), 1 + fields]; column 0 is the
+                Unix time of the sample
+    stamps      uint64[2 * (capacity + 1)], the seqlock word of each data row
+
+Every sample is written twice, at slot ``i % slots`` and ``i % slots +
+slots``, so the latest ``n <= capacity`` samples are always one contiguous
+block. The sequence counter is advanced after the rows are written; the
+spare slot keeps a returned window intact during the next append.
+
+A row's stamp is odd while sample ``i`` is being written into it and
+``2 * i + 2`` once it is complete. Readers check the stamps of the rows
+they return against the samples they expect, and read again when a writer
+was in the middle of a row or has already moved past it.
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import time
+
+import numpy as np
+
+_MAGIC = b'HVDCRNG2'
+_HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('capacity', '<u8'),
+    ('n_fields', '<u8'),
+    ('names_bytes', '<u8'),
+    ('sequence', '<u8'),
+])
+_HEADER_BYTES = 64
+_TIME = 'time'
+
+# Reads of a window that a writer keeps overtaking before giving up
+_READ_ATTEMPTS = 100
+
+
+class SampleRing:
+    """Memory-mapped ring of fixed-layout float64 samples"""
+
+    def __init__(self, path, fields=None, capacity=4096, readonly=False):
+        """
+        Open the ring at ``path``, creating it when needed
+
+        Args:
+            path: Backing file
+            fields: Sample field names in append() order. The ring is created
+                when ``path`` does not exist; an existing ring is reused (its
+                capacity is kept) and must hold the same fields. None opens an
+                existing ring.
+            capacity: Number of samples kept when the ring is created
+            readonly: Map the file read-only (for consumers)
+
+        Raises:
+            ValueError: If ``path`` is not a ring, or holds other fields
+        """
+        if fields is not None and not readonly:
+            fields = [str(name) for name in fields]
+            if _TIME in fields:
+                raise ValueError(f"'{_TIME}' is reserved for the sample timestamp")
+            if not os.path.exists(path):
+                _create(path, fields, capacity)
+
+        self.path = path
+        self.readonly = readonly
+        self._file = open(path, 'rb' if readonly else 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE)
+
+        header = np.frombuffer(self._map, _HEADER, 1).copy()[0]
+        if header['magic'] != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a sample ring")
+        self.capacity = int(header['capacity'])
+        n_fields = int(header['n_fields'])
+        names_bytes = int(header['names_bytes'])
+
+        names = bytes(self._map[_HEADER_BYTES:_HEADER_BYTES + names_bytes]).rstrip(b'\0')
+        self.fields = [_TIME] + json.loads(names)
+        if fields is not None and self.fields[1:] != list(fields):
+            self.close()
+            raise ValueError(f"{path} holds fields {self.fields[1:]}, not {list(fields)}")
+        self.columns = {name: i for i, name in enumerate(self.fields)}
+
+        self._slots = self.capacity + 1
+        self._sequence = np.frombuffer(self._map, '<u8', 1, offset=_HEADER.fields['sequence'][1])
+        data_offset = _HEADER_BYTES + names_bytes
+        self._data = np.frombuffer(
+            self._map, '<f8', 2 * self._slots * (n_fields + 1), offset=data_offset,
+        ).reshape(2 * self._slots, n_fields + 1)
+        self._stamps = np.frombuffer(
+            self._map, '<u8', 2 * self._slots, offset=data_offset + self._data.nbytes,
+        )
+
+    @property
+    def sequence(self):
+        """Number of samples appended since the ring was created"""
+        return int(self._sequence[0])
+
+    def append(self, values, timestamp=None):
+        """
+        Append one sample
+
+        Args:
+            values: One number per field, in field order
+            timestamp: Unix time of the sample (default: now)
+
+        Returns:
+            Sequence number of the sample
+        """
+        row = np.empty(len(self.fields))
+        row[0] = time.time() if timestamp is None else timestamp
+        row[1:] = values
+
+        # Writers in several processes (e.g. one-shot CLI runs) take turns
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            sequence = int(self._sequence[0])
+            slot = sequence % self._slots
+            for index in (slot, slot + self._slots):
+                self._stamps[index] = 2 * sequence + 1
+                self._data[index] = row
+                self._stamps[index] = 2 * sequence + 2
+            self._sequence[0] = sequence + 1
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        return sequence
+
+    def latest(self, n=None, copy=False):
+        """
+        View of the latest ``n`` samples, oldest first
+
+        By default the rows are not copied. They are complete when returned
+        and stay valid until ``capacity - n + 1`` further samples are
+        appended; pass ``copy=True`` to keep them longer.
+
+        Args:
+            n: Number of samples (default and maximum: capacity)
+            copy: Return a private copy, checked to be free of torn rows
+
+        Returns:
+            Array of shape (n, len(fields)), fewer rows while the ring fills
+
+        Raises:
+            RuntimeError: If writers overtook the read every time it was tried
+        """
+        for _ in range(_READ_ATTEMPTS):
+            sequence = int(self._sequence[0])
+            count = min(self.capacity if n is None else n, self.capacity, sequence)
+            end = sequence % self._slots + self._slots
+            rows = self._data[end - count:end]
+            if copy:
+                rows = rows.copy()
+            expected = 2 * np.arange(sequence - count, sequence, dtype='<u8') + 2
+            if np.array_equal(self._stamps[end - count:end], expected):
+                return rows
+        raise RuntimeError(f"Samples in {self.path} were overwritten faster than they could be read")
+
+    def column(self, name, n=None, copy=False):
+        """One field over the latest ``n`` samples (see latest())"""
+        return self.latest(n, copy)[:, self.columns[name]]
+
+    def since(self, sequence, copy=False):
+        """
+        Samples appended after ``sequence`` (a previous return value)
+
+        Returns:
+            (rows, sequence, dropped): the latest() rows, the sequence to pass
+            next time, and the number of samples overwritten before reading
+        """
+        for _ in range(_READ_ATTEMPTS):
+            current = int(self._sequence[0])
+            missed = max(current - sequence, 0)
+            rows = self.latest(missed, copy)
+            # A sample appended in between shifts the window; read it again
+            if int(self._sequence[0]) == current:
+                return rows, current, missed - len(rows)
+        raise RuntimeError(f"Samples in {self.path} were overwritten faster than they could be read")
+
+    def close(self):
+        self._sequence = self._data = self._stamps = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Views returned by latest() are still alive; the mapping
+                # goes away with the last of them
+                pass
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _names_block(fields):
+    names = json.dumps(list(fields)).encode('utf-8')
+    return names + b'\0' * (-len(names) % 8)
+
+
+def _create(path, fields, capacity):
+    """Write an empty ring to a temporary file and move it into place"""
+    if capacity < 1:
+        raise ValueError("Ring capacity must be at least 1")
+
+    names = _names_block(fields)
+    header = np.zeros(1, _HEADER)
+    header['magic'] = _MAGIC
+    header['capacity'] = capacity
+    header['n_fields'] = len(fields)
+    header['names_bytes'] = len(names)
+    # float64 data rows followed by one uint64 stamp per row
+    data_bytes = 2 * (capacity + 1) * (len(fields) + 2) * 8
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(header.tobytes().ljust(_HEADER_BYTES, b'\0'))
+        f.write(names)
+        f.truncate(_HEADER_BYTES + len(names) + data_bytes)
+    os.replace(tmp, path)
@@ -0,0 +1,138 @@
+"""
+Simulation Telemetry
+Phase timings, solver statistics and profiling hooks for instrumented runs
+"""
+
+import cProfile
+import importlib
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+# First-import durations (s) of the modules loaded through timed_import()
+IMPORT_TIMES = {}
+
+
+def timed_import(name):
+    """
+    Import a module on first use and record how long that import took
+
+    Heavy dependencies are loaded this way so start-up paths that never
+    need them do not pay for them.
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = time.perf_counter() - start
+    return module
+
+
+class PhaseTimer:
+    """Collects wall-clock durations of named phases in milliseconds"""
+
+    def __init__(self, **initial_ms):
+        self.phases_ms = dict(initial_ms)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases_ms[name] = self.phases_ms.get(name, 0.0) + (time.perf_counter() - start) * 1e3
+
+    def record(self, name, seconds):
+        self.phases_ms[name] = seconds * 1e3
+
+
+@contextmanager
+def optional_phase(timer, name):
+    """``timer.phase(name)`` when instrumenting, a no-op otherwise"""
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
+
+
+# Stands in for phases_ms['serialize'] while the document is encoded
+SERIALIZE_PLACEHOLDER = '\x00serialize\x00'
+
+
+def timed_encode(phases_ms, encode, pack):
+    """
+    Encode a document once and report that encode as its 'serialize' phase
+
+    The document is encoded with SERIALIZE_PLACEHOLDER as its serialize time,
+    whose encoding is then replaced by the measured milliseconds, so the
+    output is exactly what was timed.
+
+    Args:
+        phases_ms: Phase timings inside the document
+        encode: Zero-argument callable returning the encoded document
+        pack: Encodes a single value the same way (returns str or bytes,
+            like ``encode``)
+    """
+    phases_ms['serialize'] = SERIALIZE_PLACEHOLDER
+    start = time.perf_counter()
+    try:
+        encoded = encode()
+    finally:
+        phases_ms['serialize'] = (time.perf_counter() - start) * 1e3
+    return encoded.replace(pack(SERIALIZE_PLACEHOLDER), pack(phases_ms['serialize']), 1)
+
+
+@contextmanager
+def profiled(path):
+    """Run the block under cProfile and dump pstats data to ``path`` (no-op for None)"""
+    if path is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def peak_rss_kib():
+    """Peak resident set size of this process in KiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return peak / 1024 if sys.platform == 'darwin' else float(peak)
+
+
+def power_flow_stats(net):
+    """
+    Newton-Raphson statistics of the last pandapower solve of ``net``
+
+    Returns:
+        Dictionary with the iteration count and the final power mismatch
+        (largest P/Q residual over non-slack buses, in MVA)
+    """
+    ppc = net['_ppc']
+    if not ppc or 'internal' not in ppc:
+        return {'iterations': None, 'mismatch_mva': None}
+
+    internal = ppc['internal']
+    v = internal['V']
+    mismatch = v * np.conj(internal['Ybus'] @ v) - internal['Sbus']
+    residuals = np.concatenate([
+        mismatch[internal['pv']].real,
+        mismatch[internal['pq']].real,
+        mismatch[internal['pq']].imag,
+    ])
+    largest = float(np.max(np.abs(residuals))) if residuals.size else 0.0
+
+    return {
+        'iterations': int(ppc.get('iterations', 0)),
+        'mismatch_mva': largest * float(internal['baseMVA']),
+    }
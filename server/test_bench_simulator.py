@@ -0,0 +1,43 @@
+"""
+Benchmark harness: ring network cases and the JSON report
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pandapower")
+
+from bench_simulator import benchmark_networks
+from hvdc_simulator import SOLVERS
+
+
+def test_ring_benchmarks_cover_every_phase_and_size():
+    results = benchmark_networks([4, 30], repeat=2, warmup=0)
+
+    for stations in (4, 30):
+        phases = ["build", *(f"solve/{solver}" for solver in SOLVERS), "extract"]
+        for phase in phases:
+            stats = results[f"{phase}/ring-{stations}"]
+            assert stats["n"] == 2 and stats["p50_us"] > 0
+            assert stats["stations"] == stations and stats["buses"] == 2 * stations
+
+
+def test_cli_writes_a_json_row_per_benchmark(tmp_path):
+    output = tmp_path / "bench.json"
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_simulator.py")
+    result = subprocess.run(
+        [sys.executable, script, "--repeat", "1", "--warmup", "0", "--batch-sizes", "1",
+         "--batch-repeat", "1", "--ring-sizes", "4", "--ring-repeat", "1", "--output", str(output)],
+        capture_output=True, text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    benchmarks = json.loads(output.read_text())["benchmarks"]
+    assert {"solve/fast", "batch/fast/1", "solve/pandapower/ring-4", "extract/ring-4"} <= set(benchmarks)
+    for name, stats in benchmarks.items():
+        assert stats["buses"] > 0 and stats["p50_us"] > 0, name
+        assert name in result.stdout
@@ -0,0 +1,90 @@
+"""
+Reduced-order converter dynamics: steady state, fault response and batching
+"""
+
+import json
+import sys
+
+import numpy as np
+import pytest
+
+import converter_dynamics
+from converter_dynamics import SIGNALS, ConverterDynamics, load_scenarios, simulate_transients
+
+FAULTS = {"fault_retained_pu": [1.0, 0.9, 0.5, 0.5], "fault_bus": [2, 2, 2, 1]}
+
+
+def test_prefault_state_is_steady():
+    waveforms, summary = simulate_transients({"load_mw": [400.0, 1000.0], "scr1": [2.0, 4.0]},
+                                             duration_s=0.2, every=10)
+    prefault = np.broadcast_to(summary["p_prefault_mw"][:, None], waveforms["p_inv_mw"].shape)
+    np.testing.assert_allclose(waveforms["p_inv_mw"], prefault, rtol=1e-9)
+    np.testing.assert_allclose(waveforms["vdi_kv"], 422.84, rtol=1e-9)
+    assert not waveforms["commutation_failure"].any()
+    assert np.isnan(summary["recovery_s"]).all()
+
+
+def test_deep_inverter_dips_cause_commutation_failure_and_recover():
+    waveforms, summary = simulate_transients(FAULTS, duration_s=0.4, every=10)
+
+    assert summary["commutation_failures"].tolist()[:3] == [0, 0, 1]
+    # Rectifier-side dips do not endanger commutation, they starve the current
+    assert summary["commutation_failures"][3] == 0
+    assert summary["gamma_min_deg"][1] < 18.0
+    assert summary["id_peak_ka"][2] > 1.5 * summary["p_prefault_mw"][2] / 422.84
+
+    assert np.isnan(summary["recovery_s"][0])
+    assert (summary["recovery_s"][1:] < 0.1).all()
+    np.testing.assert_allclose(waveforms["p_inv_mw"][:, -1], summary["p_prefault_mw"], rtol=1e-3)
+
+
+def test_batch_matches_single_runs():
+    batch, batch_summary = simulate_transients(FAULTS, duration_s=0.2, every=20)
+    for i in range(4):
+        single, summary = simulate_transients({k: v[i] for k, v in FAULTS.items()}, duration_s=0.2, every=20)
+        for name in SIGNALS:
+            np.testing.assert_allclose(batch[name][i], single[name][0], rtol=1e-12, atol=1e-9)
+        assert batch_summary["commutation_failures"][i] == summary["commutation_failures"][0]
+
+
+def test_blocks_stream_the_full_run():
+    model = ConverterDynamics(FAULTS, duration_s=0.2)
+    full = model.run(every=5)
+    blocks = list(model.blocks(every=5, block_samples=7))
+
+    assert max(len(block["time"]) for block in blocks) == 7
+    assert full["time"][-1] == pytest.approx(0.2)
+    for name in ("time",) + SIGNALS:
+        np.testing.assert_array_equal(np.concatenate([block[name] for block in blocks], axis=-1), full[name])
+
+    every_step = model.run(every=1)
+    np.testing.assert_array_equal(every_step["id_ka"][:, 4::5], full["id_ka"])
+
+
+def test_load_scenarios_broadcasts_and_reads_csv(tmp_path):
+    params = load_scenarios({"load_mw": [500.0, 800.0], "scr2": 2.5, "unknown": 1.0})
+    assert params["load_mw"].tolist() == [500.0, 800.0]
+    assert params["scr2"].tolist() == [2.5, 2.5]
+    assert params["fault_retained_pu"].tolist() == [1.0, 1.0]
+    assert "unknown" not in params
+
+    path = tmp_path / "faults.csv"
+    path.write_text("load_mw,fault_bus\n500,1\n800,\n")
+    params = load_scenarios(path)
+    assert params["fault_bus"].tolist() == [1.0, 2.0]
+
+
+@pytest.mark.parametrize("args, message", [
+    (["--every", "0"], "--every must be at least 1"),
+    (["--step", "0"], "step must be positive"),
+    (['[1, 2]'], "Scenarios must be objects"),
+    (['{"load_mw": '], "Expecting value"),
+])
+def test_cli_reports_invalid_input(monkeypatch, capsys, args, message):
+    monkeypatch.setattr(sys, "argv", ["converter_dynamics.py", *args, "--duration", "0.01"])
+    with pytest.raises(SystemExit) as exit_info:
+        converter_dynamics.main()
+
+    output = json.loads(capsys.readouterr().out)
+    assert exit_info.value.code == 1
+    assert output["success"] is False and message in output["error"]
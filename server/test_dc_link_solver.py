@@ -0,0 +1,75 @@
+"""
+Cross-checks of the direct DC-link solver against pandapower
+"""
+
+import numpy as np
+import pytest
+
+pp = pytest.importorskip("pandapower")
+
+from dc_link_solver import DCLinkSolver, compare_with_pandapower, get_solver
+from hvdc_simulator import create_hvdc_network
+
+# Operating point the shared network is calibrated at
+CALIBRATION = {"load_mw": 300.0}
+
+
+@pytest.fixture(scope="module")
+def calibrated():
+    """Network of create_hvdc_network() with its solver calibrated at CALIBRATION"""
+    net = create_hvdc_network(CALIBRATION)
+    return net, get_solver(net)
+
+
+def set_operating_point(net, load_mw, ac1_vm_pu=1.0, ac2_vm_pu=1.0):
+    net.load.at[net.load.index[0], "p_mw"] = load_mw
+    net.load.at[net.load.index[0], "q_mvar"] = load_mw * 0.3
+    net.ext_grid["vm_pu"] = [ac1_vm_pu, ac2_vm_pu]
+
+
+# The load sits on the slack bus of external grid 2, so only the grid
+# set-points move the solution away from the calibration point
+@pytest.mark.parametrize("load_mw, ac1_vm_pu, ac2_vm_pu", [
+    (50.0, 1.02, 1.0),
+    (900.0, 1.0, 0.95),
+    (1100.0, 0.97, 1.0),
+    (600.0, 1.04, 0.96),
+])
+def test_matches_pandapower_away_from_calibration(calibrated, load_mw, ac1_vm_pu, ac2_vm_pu):
+    net, solver = calibrated
+    set_operating_point(net, load_mw, ac1_vm_pu, ac2_vm_pu)
+
+    deviation = compare_with_pandapower(net)
+
+    assert get_solver(net) is solver
+    assert deviation["converged"]
+    assert deviation["iterations"] > 0
+    assert deviation["vm_pu"] < 1e-8
+    assert deviation["p_mw"] < 1e-6
+    assert deviation["q_mvar"] < 1e-6
+
+
+def test_solver_is_kept_per_template():
+    net = create_hvdc_network(CALIBRATION)
+    solver = get_solver(net)
+
+    assert get_solver(net) is solver
+    assert get_solver(create_hvdc_network(CALIBRATION)) is not solver
+
+
+def test_write_results_fills_result_tables(calibrated):
+    net, solver = calibrated
+    net.res_bus["vm_pu"] = np.nan
+
+    solver.write_results(net, solver.solve(np.array([500.0]), np.array([150.0]), np.ones(2)))
+
+    assert np.isfinite(net.res_bus["vm_pu"].values).all()
+    assert np.isfinite(net.res_impedance["pl_mw"].values).all()
+
+
+def test_reports_non_convergence():
+    solver = DCLinkSolver(create_hvdc_network(CALIBRATION), max_iteration=1)
+
+    solution = solver.solve(np.array([300.0]), np.array([90.0]), np.array([1.5, 0.5]))
+
+    assert not solution["converged"]
@@ -0,0 +1,113 @@
+"""
+History store: range queries, downsampling, compaction and crash repair
+"""
+
+import numpy as np
+import pytest
+
+from history_store import HistoryStore, import_csv, to_timestamp
+
+
+def filled_store(path, hours=2):
+    store = HistoryStore(path, ['losses', 'dcCurrent'])
+    t = np.arange(hours * 3600, dtype=float)
+    store.append(t[:3600], {'losses': t[:3600] % 60, 'dcCurrent': 1000.0})
+    store.append(t[3600:], {'losses': t[3600:] % 60})
+    return store
+
+
+def test_query_returns_window_views(tmp_path):
+    with filled_store(tmp_path) as store:
+        window = store.query(3590, 3610, ['losses', 'dcCurrent'])
+        assert window['timestamp'].tolist() == list(range(3590, 3610))
+        assert window['losses'][0] == 3590 % 60
+        assert np.isnan(window['dcCurrent'][-1]) and window['dcCurrent'][0] == 1000.0
+        assert isinstance(window['losses'], np.memmap)
+
+        with pytest.raises(ValueError, match="before the last"):
+            store.append([0.0], {'losses': [1.0]})
+
+    reader = HistoryStore(tmp_path, readonly=True)
+    assert len(reader.query(end=60)['timestamp']) == 60
+    with pytest.raises(KeyError):
+        reader.query(columns=['missing'])
+
+
+def test_downsample_buckets(tmp_path):
+    with filled_store(tmp_path) as store:
+        store.append([7200.0, 7201.0], {'losses': [np.nan, np.nan]})
+        summary = store.downsample(bucket=600)
+
+    assert summary['timestamp'][:2].tolist() == [0.0, 600.0]
+    assert summary['count'].tolist() == [600] * 12 + [2]
+    assert summary['losses']['min'][0] == 0 and summary['losses']['max'][0] == 59
+    assert summary['losses']['mean'][0] == pytest.approx(29.5)
+    assert np.isnan(summary['losses']['mean'][-1])
+    assert summary['dcCurrent']['mean'][:6].tolist() == [1000.0] * 6
+    assert np.isnan(summary['dcCurrent']['mean'][6])
+
+
+def test_compact_summarizes_old_rows(tmp_path):
+    with filled_store(tmp_path) as store:
+        reader = HistoryStore(tmp_path, readonly=True)
+        assert store.compact(before=3600, bucket=60) == 60 + 3600
+        store.append([7200.0], {'losses': [5.0]})
+
+        assert reader.query(end=3600)['losses'].tolist() == [29.5] * 60
+        assert reader.query(start=3600)['timestamp'][0] == 3600
+        assert reader.last_timestamp() == 7200.0
+
+        assert store.compact(before=3600, drop=True) == 3601
+        assert reader.info()['rows'] == 3601
+
+
+def test_repairs_interrupted_append(tmp_path):
+    with filled_store(tmp_path, hours=1) as store:
+        # Metric written, timestamp not: the row does not exist yet
+        with open(store._path('losses'), 'ab') as f:
+            f.write(np.zeros(3).tobytes())
+
+    with HistoryStore(tmp_path) as store:
+        assert store._file_rows('losses') == len(store) == 3600
+        store.append([3600.0], {'losses': [7.0]})
+        assert store.query(start=3600)['losses'].tolist() == [7.0]
+
+
+def test_failed_append_leaves_columns_aligned(tmp_path, monkeypatch):
+    with HistoryStore(tmp_path, ['a', 'b']) as store:
+        store.append([1.0, 2.0], {'a': [1.0, 2.0], 'b': [1.0, 2.0]})
+        with pytest.raises(ValueError, match="'b' has 3 values"):
+            store.append([3.0, 4.0], {'a': [3.0, 4.0], 'b': [3.0, 4.0, 5.0]})
+
+        # A write error after some columns are written trims them again
+        writer = HistoryStore._writer
+
+        def failing_writer(self, name):
+            if name == 'b':
+                raise OSError("disk full")
+            return writer(self, name)
+
+        monkeypatch.setattr(HistoryStore, '_writer', failing_writer)
+        with pytest.raises(OSError):
+            store.append([3.0], {'a': [3.0], 'b': [3.0]})
+        monkeypatch.undo()
+
+        store.append([5.0], {'a': [5.0], 'b': [5.0]})
+        rows = store.query()
+        assert rows['timestamp'].tolist() == [1.0, 2.0, 5.0]
+        assert rows['a'].tolist() == rows['b'].tolist() == [1.0, 2.0, 5.0]
+
+
+def test_imports_csv(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text(
+        "simulation_id,timestamp,scenario,IFF_indice_fidelidade\n"
+        "1,2025-12-30T01:36:09.419Z,recovery,0.9135\n"
+        "2,2025-12-30T02:06:04.854Z,transient,n/a\n"
+    )
+    with HistoryStore(tmp_path / 'store') as store:
+        assert import_csv(store, path) == 2
+        assert store.columns == ['simulation_id', 'IFF_indice_fidelidade']
+        rows = store.query(start='2025-12-30T02:00:00Z')
+        assert rows['timestamp'][0] == pytest.approx(to_timestamp('2025-12-30T02:06:04.854Z'))
+        assert np.isnan(rows['IFF_indice_fidelidade'][0])
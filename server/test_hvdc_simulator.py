@@ -0,0 +1,76 @@
+"""
+End-to-end runs of the CLI simulator: build the network, solve it, report
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandapower")
+
+from hvdc_simulator import (
+    create_hvdc_network, create_result_cache, handle_request, run_batch, run_simulation, simulate,
+)
+
+
+@pytest.mark.parametrize("solver", ["pandapower", "fast"])
+def test_create_and_run(solver):
+    result = run_simulation(create_hvdc_network({"load_mw": 500.0}), solver=solver)
+
+    assert result["status"] == "success"
+    assert result["convergence"] is True
+    for value in result["bus_voltages"].values():
+        assert 0.9 < value < 1.1
+    assert result["losses"]["total_loss_mw"] >= 0.0
+
+
+def test_simulate_solvers_agree():
+    params = {"load_mw": 800.0, "ac1_vm_pu": 0.98}
+    reference = simulate(params)
+    fast = simulate(params, solver="fast")
+
+    assert reference["status"] == fast["status"] == "success"
+    for name, value in reference["bus_voltages"].items():
+        assert fast["bus_voltages"][name] == pytest.approx(value, abs=1e-6)
+
+
+def test_batch_reports_bad_scenarios_as_rows():
+    columns = run_batch([{"load_mw": 400.0}, {"load_mw": 500.0, "power_mva": None}, {"load_mw": 600.0}])
+
+    assert columns["convergence"].tolist() == [True, False, True]
+    assert np.isnan(columns["bus_dc1_voltage_pu"][1])
+    assert not np.isnan(columns["bus_dc1_voltage_pu"][[0, 2]]).any()
+
+
+def test_cached_results_are_fresh_copies():
+    cache = create_result_cache()
+    first = simulate({"load_mw": 450.0}, cache=cache)
+    first["bus_voltages"].clear()
+
+    hit = simulate({"load_mw": 450.0}, cache=cache)
+
+    assert cache.stats()["hits"] == 1
+    assert hit["bus_voltages"]
+
+
+def test_cache_hits_are_stamped_with_the_lookup_time():
+    cache = create_result_cache()
+    stale = {**simulate({"load_mw": 450.0}), "timestamp": "2000-01-01T00:00:00"}
+    cache.put(cache.key({"load_mw": 450.0}, "pandapower"), stale)
+
+    assert simulate({"load_mw": 450.0}, cache=cache)["timestamp"] > "2000-01-01T00:00:00"
+
+
+@pytest.mark.parametrize("fmt", ["json", "msgpack"])
+def test_instrumented_response_reports_its_own_serialization(fmt):
+    msgpack = pytest.importorskip("msgpack") if fmt == "msgpack" else None
+    response = handle_request(json.dumps({"id": 5, "params": {"load_mw": 500.0}, "instrument": True}), fmt)
+
+    if msgpack is not None:
+        assert int.from_bytes(response[:4], "big") == len(response) - 4
+        document = msgpack.unpackb(response[4:])
+    else:
+        document = json.loads(response)
+    phases = document["result"]["telemetry"]["phases_ms"]
+    assert isinstance(phases["serialize"], float) and phases["serialize"] >= 0.0
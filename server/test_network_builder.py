@@ -0,0 +1,107 @@
+"""
+Multi-terminal network builder: index maps, extraction and sparse solves
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+pp = pytest.importorskip("pandapower")
+
+from dc_link_solver import DCLinkSolver
+from network_builder import (
+    build_network, extract_grid_results, load_network_spec, ring_spec, simulate_grid,
+)
+
+
+def test_builds_named_elements():
+    grid = build_network({
+        "stations": [
+            {"name": "North", "ac_kv": 345, "slack": True},
+            {"name": "South", "ac_kv": 230, "load_mw": 800},
+            {"name": "East", "ac_kv": 230, "load_mw": 300, "dc_kv": 400},
+        ],
+        "links": [{"name": "N-S", "from": "North", "to": "South"}, {"from": "North", "to": "East"}],
+    })
+    net = grid["net"]
+
+    assert len(net.bus) == 6
+    assert list(grid["links"]) == ["N-S", "North-East"]
+    assert net.bus.at[grid["dc_bus"][2], "vn_kv"] == 400
+    assert grid["ext_grid"].tolist() == [0, -1, -1]
+    assert net.load.loc[grid["load"][1:], "p_mw"].tolist() == [800, 300]
+
+
+def test_extraction_matches_result_tables():
+    grid = build_network(ring_spec(20, slack_every=10))
+    pp.runpp(grid["net"])
+
+    results = extract_grid_results(grid)
+
+    net = grid["net"]
+    np.testing.assert_allclose(results["stations"]["ac_vm_pu"], net.res_bus.loc[grid["ac_bus"], "vm_pu"])
+    np.testing.assert_allclose(results["links"]["loss_mw"], net.res_impedance["pl_mw"].values, atol=1e-9)
+    assert results["totals"]["total_loss_mw"] == pytest.approx(
+        net.res_trafo["pl_mw"].sum() + net.res_impedance["pl_mw"].sum())
+
+
+def test_sparse_solver_matches_pandapower():
+    grid = build_network(ring_spec(150))
+    net = grid["net"]
+    solver = DCLinkSolver(net)
+    assert solver.sparse
+
+    net.load["p_mw"] *= 1.2
+    solution = solver.solve_net(net)
+    pp.runpp(net)
+
+    assert solution["converged"]
+    np.testing.assert_allclose(solution["vm_pu"], net.res_bus["vm_pu"].values, atol=1e-8)
+    np.testing.assert_allclose(solution["impedance"]["p_from_mw"], net.res_impedance["p_from_mw"].values,
+                               atol=1e-6)
+
+
+def test_simulate_grid_solvers_agree():
+    grid = build_network(ring_spec(60, slack_every=20))
+
+    reference = simulate_grid(grid)
+    grid["net"].load["p_mw"] *= 0.9
+    fast = simulate_grid(grid, "fast")
+    pandapower = simulate_grid(grid)
+
+    assert reference["status"] == fast["status"] == "success"
+    np.testing.assert_allclose(fast["stations"]["dc_vm_pu"], pandapower["stations"]["dc_vm_pu"], atol=1e-8)
+
+
+def test_loads_json_and_yaml(tmp_path):
+    spec = ring_spec(4, slack_every=4)
+    json_path = tmp_path / "grid.json"
+    json_path.write_text(json.dumps(spec))
+    assert load_network_spec(json_path)["stations"] == spec["stations"]
+
+    yaml = pytest.importorskip("yaml")
+    yaml_path = tmp_path / "grid.yaml"
+    yaml_path.write_text(yaml.safe_dump(spec))
+    assert load_network_spec(str(yaml_path))["links"] == spec["links"]
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"stations": []}, "no stations"),
+    ({"stations": [{"name": "A"}]}, "slack"),
+    ({"stations": [{"name": "A", "slack": True}], "links": [{"from": "A", "to": "B"}]}, "unknown station"),
+])
+def test_rejects_invalid_descriptions(spec, message):
+    with pytest.raises(ValueError, match=message):
+        load_network_spec(spec)
+
+
+def test_import_does_not_load_pandapower():
+    code = "import sys, network_builder; print('pandapower' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+
+    assert output.strip() == "False"
@@ -0,0 +1,41 @@
+"""
+Result cache: quantized keys, copies in and out, and the SQLite backing store
+"""
+
+from result_cache import ResultCache
+
+DEFAULTS = {"load_mw": 1000.0, "ac1_vm_pu": 1.0}
+
+
+def test_nearby_operating_points_share_a_key():
+    cache = ResultCache(DEFAULTS, tolerance=1e-3)
+
+    assert cache.key({"load_mw": 500.0}) == cache.key({"load_mw": 500.0002})
+    assert cache.key({"load_mw": 500.0}) != cache.key({"load_mw": 500.002})
+    assert cache.key({}, "fast") != cache.key({}, "pandapower")
+
+
+def test_results_are_copied_in_and_out():
+    cache = ResultCache(DEFAULTS)
+    key = cache.key({})
+    result = {"status": "success", "losses": {"total_loss_mw": 1.0}}
+    cache.put(key, result)
+
+    result["losses"]["total_loss_mw"] = 2.0
+    hit = cache.get(key)
+    hit["losses"]["total_loss_mw"] = 3.0
+
+    assert cache.get(key)["losses"]["total_loss_mw"] == 1.0
+    assert cache.stats()["hits"] == 2
+
+
+def test_backing_store_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = ResultCache(DEFAULTS, path=path)
+    first.put(first.key({"load_mw": 700.0}), {"status": "success"})
+
+    second = ResultCache(DEFAULTS, path=path)
+
+    assert second.get(second.key({"load_mw": 700.0})) == {"status": "success"}
+    assert second.get(second.key({"load_mw": 800.0})) is None
+    assert second.stats()["misses"] == 1
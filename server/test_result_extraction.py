@@ -0,0 +1,75 @@
+"""
+Vectorized result extraction against direct reads of the result tables
+"""
+
+import numpy as np
+import pytest
+
+pp = pytest.importorskip("pandapower")
+
+from dc_link_solver import DCLinkSolver
+from result_extraction import (
+    DEFAULT_LAYOUT, compute_metrics, from_solution, metric_derivatives, read_results, stack_results,
+)
+from hvdc_simulator import create_hvdc_network
+
+
+def solved_net(load_mw, ac1_vm_pu=1.0):
+    net = create_hvdc_network({"load_mw": load_mw, "ac1_vm_pu": ac1_vm_pu})
+    pp.runpp(net)
+    return net
+
+
+def test_single_run_matches_result_tables():
+    net = solved_net(300.0)
+
+    metrics = compute_metrics(read_results(net), DEFAULT_LAYOUT, 300.0)
+
+    p_rect = abs(net.res_trafo.at[0, "p_lv_mw"])
+    assert float(metrics["vm_dc_rect_pu"]) == net.res_bus.at[2, "vm_pu"]
+    assert float(metrics["trafo_loss_mw"]) == pytest.approx(net.res_trafo["pl_mw"].sum())
+    assert float(metrics["efficiency"]) == pytest.approx(300.0 / p_rect * 100)
+    assert float(metrics["dc_current_a"]) == pytest.approx(
+        p_rect * 1000 / (422.84 * net.res_bus.at[2, "vm_pu"]))
+
+
+def test_stacked_runs_match_single_runs():
+    loads = [50.0, 300.0, 900.0]
+    snapshots = [read_results(solved_net(load, vm_pu), copy=True)
+                 for load, vm_pu in zip(loads, [1.02, 1.0, 0.97])]
+
+    batch = compute_metrics(stack_results(snapshots + [None]), DEFAULT_LAYOUT, loads + [np.nan])
+
+    for i, (snapshot, load) in enumerate(zip(snapshots, loads)):
+        single = compute_metrics(snapshot, DEFAULT_LAYOUT, load)
+        for name, value in single.items():
+            assert batch[name][i] == pytest.approx(float(value)), name
+    assert all(np.isnan(values[-1]) for values in batch.values())
+
+
+def test_metric_derivatives_match_differences():
+    solver = DCLinkSolver(solved_net(300.0, ac1_vm_pu=1.03), sparse=False)
+    v = solver.v
+    rng = np.random.default_rng(0)
+    dva = rng.normal(size=(len(v), 2))
+    dvm = rng.normal(size=(len(v), 2))
+    d_load = np.array([1.0, -2.0])
+
+    def metrics(t):
+        shifted = np.abs(v) + t * dvm[:, 0]
+        state = shifted * np.exp(1j * (np.angle(v) + t * dva[:, 0]))
+        return compute_metrics(from_solution(solver.evaluate(state), solver.vn_kv), DEFAULT_LAYOUT,
+                               300.0 + t * d_load[0])
+
+    solution = from_solution(solver.evaluate(v), solver.vn_kv)
+    derivatives = metric_derivatives(
+        solution, from_solution(solver.evaluate_derivatives(v, dva, dvm), solver.vn_kv),
+        DEFAULT_LAYOUT, 300.0, d_load,
+    )
+
+    step = 1e-7
+    upper, lower = metrics(step), metrics(-step)
+    assert set(derivatives) == set(upper)
+    for name, value in derivatives.items():
+        expected = (float(upper[name]) - float(lower[name])) / (2 * step)
+        assert value[0] == pytest.approx(expected, rel=1e-4, abs=1e-4), name
@@ -0,0 +1,101 @@
+"""
+Sample ring: wrap-around, zero-copy windows and sharing through the file
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from sample_ring import SampleRing
+
+FIELDS = ('convergence', 'total_loss_mw')
+
+
+def fill(ring, count, start=0):
+    for i in range(start, start + count):
+        ring.append([1.0, float(i)], timestamp=float(i))
+
+
+def test_latest_is_contiguous_view_across_wrap(tmp_path):
+    with SampleRing(tmp_path / 'ring', FIELDS, capacity=8) as ring:
+        fill(ring, 3)
+        assert ring.column('total_loss_mw').tolist() == [0.0, 1.0, 2.0]
+
+        fill(ring, 10, start=3)
+        window = ring.latest(8)
+        assert window.flags['C_CONTIGUOUS']
+        assert np.shares_memory(window, ring._data)
+        assert window[:, ring.columns['time']].tolist() == list(range(5, 13))
+
+        # The spare slot keeps a full window intact during the next append
+        fill(ring, 1, start=13)
+        assert window[:, 2].tolist() == list(range(5, 13))
+
+
+def test_reader_follows_writer(tmp_path):
+    path = tmp_path / 'ring'
+    writer = SampleRing(path, FIELDS, capacity=4)
+    reader = SampleRing(path, readonly=True)
+    assert reader.fields == ['time', *FIELDS]
+
+    fill(writer, 2)
+    rows, sequence, dropped = reader.since(0)
+    assert (rows[:, 2].tolist(), sequence, dropped) == ([0.0, 1.0], 2, 0)
+
+    fill(writer, 6, start=2)
+    rows, sequence, dropped = reader.since(sequence)
+    assert (rows[:, 2].tolist(), sequence, dropped) == ([4.0, 5.0, 6.0, 7.0], 8, 2)
+    with pytest.raises(ValueError):
+        rows[0, 0] = 0.0
+
+    reader.close()
+    writer.close()
+
+
+def test_reopen_keeps_matching_ring(tmp_path):
+    path = tmp_path / 'ring'
+    with SampleRing(path, FIELDS, capacity=4) as ring:
+        fill(ring, 3)
+    with SampleRing(path, FIELDS, capacity=16) as ring:
+        assert (ring.capacity, ring.sequence) == (4, 3)
+    with pytest.raises(ValueError, match='holds fields'):
+        SampleRing(path, ['other'], capacity=16)
+    with SampleRing(path, readonly=True) as ring:
+        assert ring.sequence == 3
+
+
+def test_torn_rows_are_not_returned(tmp_path):
+    with SampleRing(tmp_path / 'ring', FIELDS, capacity=4) as ring:
+        fill(ring, 3)
+        # A writer stopped half way through the newest row
+        row = 2 % ring._slots + ring._slots
+        ring._stamps[row] += 1
+
+        with pytest.raises(RuntimeError, match='overwritten'):
+            ring.latest(copy=True)
+
+        ring._stamps[row] -= 1
+        assert ring.latest(copy=True)[:, 2].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_copies_are_consistent_under_concurrent_writes(tmp_path):
+    path = tmp_path / 'ring'
+    SampleRing(path, FIELDS, capacity=4).close()
+
+    pid = os.fork()
+    if pid == 0:
+        with SampleRing(path, FIELDS) as writer:
+            for i in range(20000):
+                writer.append([float(i), float(i)], timestamp=float(i))
+        os._exit(0)
+
+    with SampleRing(path, readonly=True) as reader:
+        while True:
+            finished = os.waitpid(pid, os.WNOHANG)[0] == pid
+            rows = reader.latest(copy=True)
+            assert (rows[:, 0] == rows[:, 1]).all() and (rows[:, 1] == rows[:, 2]).all()
+            assert (np.diff(rows[:, 0]) == 1.0).all()
+            if finished:
+                break
+        assert rows[-1, 0] == 19999.0